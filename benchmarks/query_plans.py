@@ -0,0 +1,214 @@
+import json
+import re
+import tempfile
+from pathlib import Path
+
+import database
+import instrumentation
+from benchmarks.suite import START_YEAR
+from benchmarks.synthetic import fresh_database, generate_portfolio
+from services import (
+    assignment_service, dashboard_service, forecast_service, ownership_service, payments_service,
+    receipt_service, receivables_service, taxes_service, unit_service,
+)
+
+# Query-plan regression check: run a workload of service calls against a synthetic
+# portfolio, capture every SQL statement they execute (through the connection's trace
+# callback, with parameters bound), and EXPLAIN QUERY PLAN each distinct statement.
+# A statement is flagged when its plan reads a whole large table (SCAN <table>, with or
+# without an index) or builds an AUTOMATIC index, i.e. no index answers a join/filter.
+# Statements run by triggers are not captured: their plans cannot be explained outside
+# the trigger.
+
+# Tables with at least this many rows in the populated database count as large
+LARGE_TABLE_ROWS = 1000
+
+# Portfolio the plans are checked against (generate_portfolio arguments)
+PORTFOLIO = {'owners': 60, 'units': 1500, 'years': 1}
+
+# Whole-table reads that a workload step does by design, as step name -> tables
+ALLOWED_SCANS = {
+    'list_receipt_logs_with_names': {'receipt_log'},
+    'list_units': {'units'},
+    'list_assignments_with_names': {'assignments'},
+    'list_ownerships_with_names': {'ownerships'},
+    'generate_receipts_report': {'owners'},
+    'compute_taxes_for_year': {'owners'},
+    'generate_taxes_report': {'owners'},
+    'aging_report': {'open_receivables'},
+    'vacancy_report': {'units', 'assignments'},
+    'get_counts': {'owners', 'units', 'clients', 'assignments'},
+    # most assignments are active in any month, so reading them all beats an index
+    'diff_receipts_for_month': {'assignments'},
+    'batch_generate_receipts_for_month': {'assignments'},
+    'forecast_billing': {'assignments'},
+    # newest rows only: ORDER BY uid DESC LIMIT n walks the table backwards and stops
+    'get_recent_receipts': {'receipt_log'},
+}
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLAN_TABLE = re.compile(r"^(?:SCAN|SEARCH) (\S+)")
+_ALIASES = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+
+
+def _workload(year, counts):
+    """(step name, callable) service calls covering the listings, reports, generation and writes."""
+    period = f"{year}-06-01"
+    next_month = f"01/{year + 1}"
+    new_unit = counts['units'] + 1
+    return (
+        ('list_units', unit_service.list_units),
+        ('list_units_page', lambda: unit_service.list_units_page(limit=50, city='Rabat')),
+        ('get_unit', lambda: unit_service.get_unit(1)),
+        ('list_ownerships_with_names', lambda: ownership_service.list_ownerships_with_names(1)),
+        ('list_assignments_with_names', assignment_service.list_assignments_with_names),
+        ('list_assignments_page', lambda: assignment_service.list_assignments_page(limit=50, owner_id=1)),
+        ('create_unit', lambda: unit_service.create_unit('U-PLAN')),
+        ('create_ownership', lambda: ownership_service.create_ownership(new_unit, 1, 100)),
+        ('create_assignment', lambda: assignment_service.create_assignment(
+            new_unit, 1, 1, 100, start_date=f"01/01/{year}", rent_amount=3000)),
+        ('create_receipt', lambda: receipt_service.create_receipt(counts['assignments'] + 1, period, period, 3000)),
+        ('create_payment', lambda: payments_service.create_payment(1, 1.0, period)),
+        ('diff_receipts_for_month', lambda: receipt_service.diff_receipts_for_month(next_month, f"05/01/{year + 1}")),
+        ('batch_generate_receipts_for_month',
+         lambda: receipt_service.batch_generate_receipts_for_month(next_month, f"05/01/{year + 1}")),
+        ('list_receipt_logs_with_names', receipt_service.list_receipt_logs_with_names),
+        ('list_receipt_logs_page', lambda: receipt_service.list_receipt_logs_page(limit=50, year=year, owner_id=1)),
+        ('get_payments_for_owner_year', lambda: payments_service.get_payments_for_owner_year(1, year)),
+        ('generate_receipts_report', lambda: receipt_service.generate_receipts_report(year, owner_id=1)),
+        ('compute_owner_taxes_for_year', lambda: taxes_service.compute_owner_taxes_for_year(1, year)),
+        ('compute_taxes_for_year', lambda: taxes_service.compute_taxes_for_year(year)),
+        ('generate_taxes_report', lambda: taxes_service.generate_taxes_report(year)),
+        ('get_counts', lambda: dashboard_service.get_counts(today=period)),
+        ('get_recent_receipts', dashboard_service.get_recent_receipts),
+        ('get_monthly_kpis', lambda: dashboard_service.get_monthly_kpis(period)),
+        ('aging_report', lambda: receivables_service.aging_report('owner', as_of=f"{year + 1}-01-31")),
+        ('list_outstanding', lambda: receivables_service.list_outstanding(client_id=1)),
+        ('forecast_billing', lambda: forecast_service.forecast_billing(next_month, f"12/{year + 1}")),
+        ('vacancy_report', lambda: forecast_service.vacancy_report(next_month, f"12/{year + 1}")),
+    )
+
+
+def check_query_plans(out_path=None, workdir=None, seed=0, portfolio=None):
+    """Populate a synthetic database, run the workload and explain every statement it issued.
+
+    Returns {'large_tables': {table: rows}, 'statements': [{'sql', 'steps', 'plan', 'scans',
+    'automatic_indexes', 'flagged'}], 'flagged': number of flagged statements}, also
+    written to out_path as JSON. Databases are created in workdir (default: a temporary directory).
+    """
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="rentax-plans-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    portfolio = dict(PORTFOLIO if portfolio is None else portfolio)
+    saved = database.DB_PATH, database.SCHEMA_PATH
+    was_enabled = instrumentation.is_enabled()
+    instrumentation.disable()
+    try:
+        fresh_database(workdir / f"plans-{seed}.db")
+        counts = generate_portfolio(start_year=START_YEAR, seed=seed, **portfolio)
+        dashboard_service.clear_dashboard_cache()
+
+        conn = database.get_connection()
+        try:
+            statements = {}
+            step = [None]
+
+            def capture(sql):
+                keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+                if keyword in _EXPLAINABLE:
+                    entry = statements.setdefault(_LITERALS.sub('?', ' '.join(sql.split())), {'sql': sql, 'steps': []})
+                    if step[0] not in entry['steps']:
+                        entry['steps'].append(step[0])
+
+            conn.set_trace_callback(capture)
+            try:
+                for name, call in _workload(START_YEAR + portfolio['years'] - 1, counts):
+                    step[0] = name
+                    call()
+            finally:
+                conn.set_trace_callback(None)
+
+            cur = conn.cursor()
+            large = _large_tables(cur)
+            report = []
+            for entry in statements.values():
+                report.append(_explain(cur, entry['sql'], entry['steps'], large))
+        finally:
+            conn.close()
+    finally:
+        database.close_all_connections()
+        database.DB_PATH, database.SCHEMA_PATH = saved
+        if was_enabled:
+            instrumentation.enable()
+
+    result = {
+        'large_tables': large,
+        'statements': report,
+        'flagged': sum(1 for s in report if s['flagged']),
+    }
+    if out_path is not None:
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+def _large_tables(cur):
+    tables = [r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    rows = {t: cur.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables}
+    return {t: n for t, n in sorted(rows.items()) if n >= LARGE_TABLE_ROWS}
+
+
+def _explain(cur, sql, steps, large):
+    """Plan of one statement and the large tables it scans outside ALLOWED_SCANS."""
+    entry = {'sql': ' '.join(sql.split()), 'steps': steps, 'plan': [], 'scans': [], 'automatic_indexes': [], 'flagged': False}
+    try:
+        entry['plan'] = [r[3] for r in cur.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+    except database.sqlite3.Error as e:
+        entry['error'] = str(e)
+        return entry
+    aliases = {}
+    for table, alias in _ALIASES.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.upper() not in ('ON', 'WHERE', 'USING', 'JOIN', 'LEFT', 'INNER', 'GROUP', 'ORDER',
+                                           'LIMIT', 'VALUES', 'SELECT', 'SET', 'DEFAULT'):
+            aliases[alias.lower()] = table.lower()
+    allowed = set().union(*(ALLOWED_SCANS.get(s, set()) for s in steps))
+    for detail in entry['plan']:
+        match = _PLAN_TABLE.match(detail)
+        if not match:
+            continue
+        table = aliases.get(match.group(1).lower(), match.group(1).lower())
+        if table not in large:
+            continue
+        if 'AUTOMATIC' in detail:
+            entry['automatic_indexes'].append(table)
+        elif detail.startswith('SCAN ') and table not in allowed and table not in entry['scans']:
+            entry['scans'].append(table)
+    entry['flagged'] = bool(entry['scans'] or entry['automatic_indexes'])
+    return entry
+
+
+def format_report(result, flagged_only=True):
+    """Plain-text report: one block per (flagged) statement with its steps and plan."""
+    lines = [f"Large tables: {', '.join(f'{t} ({n})' for t, n in result['large_tables'].items())}"]
+    statements = [s for s in result['statements'] if s['flagged'] or not flagged_only]
+    for s in statements:
+        lines.append("")
+        problems = [f"SCAN {t}" for t in s['scans']] + [f"AUTOMATIC INDEX on {t}" for t in s['automatic_indexes']]
+        lines.append(f"[{', '.join(problems) or 'ok'}] {', '.join(s['steps'])}")
+        lines.append(f"  {s['sql'][:300]}")
+        lines.extend(f"    {detail}" for detail in s['plan'])
+    lines.append("")
+    lines.append(f"{result['flagged']} of {len(result['statements'])} statements flagged.")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 2:
+        print("Usage: python -m benchmarks.query_plans [REPORT.json]")
+        sys.exit(2)
+    result = check_query_plans(out_path=sys.argv[1] if len(sys.argv) == 2 else None)
+    print(format_report(result))
+    sys.exit(1 if result['flagged'] else 0)
@@ -0,0 +1,168 @@
+import json
+import platform
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import database
+from benchmarks.synthetic import fresh_database, generate_portfolio
+from services import receipt_service, receivables_service, taxes_service
+
+# Scale points: generate_portfolio arguments. 'large' is about 10M receipt_log rows.
+SCALES = {
+    'small': {'owners': 100, 'units': 1000, 'years': 1},
+    'medium': {'owners': 1000, 'units': 10000, 'years': 2},
+    'large': {'owners': 10000, 'units': 100000, 'years': 8},
+}
+
+START_YEAR = 2020
+
+# Upper bounds in seconds per scale point and workflow; check_thresholds reports runs above them.
+# Month generation at 'medium' (about 9k receipts) must stay well under a second.
+THRESHOLDS = {
+    'medium': {'batch_generate_receipts_for_month': 1.0},
+}
+
+
+def _workflows(start_year, years):
+    """(name, callable returning the number of rows produced) for each timed workflow."""
+    last_year = start_year + years - 1
+    return (
+        ('batch_generate_receipts_for_month',
+         lambda: receipt_service.batch_generate_receipts_for_month(f"01/{last_year + 1}", f"05/01/{last_year + 1}")),
+        ('list_receipt_logs_with_names', lambda: len(receipt_service.list_receipt_logs_with_names())),
+        ('list_receipt_logs_page', lambda: len(receipt_service.list_receipt_logs_page(limit=50, year=last_year)[0])),
+        ('generate_receipts_report', lambda: len(receipt_service.generate_receipts_report(last_year)[1])),
+        ('compute_taxes_for_year', lambda: len(taxes_service.compute_taxes_for_year(last_year))),
+        ('generate_taxes_report', lambda: len(taxes_service.generate_taxes_report(last_year)[1])),
+        ('aging_report', lambda: len(receivables_service.aging_report('owner', as_of=f"{last_year + 1}-01-31"))),
+    )
+
+
+def run_benchmarks(scales=('small',), out_path=None, workdir=None, seed=0):
+    """Build a fresh synthetic database for each scale point and time the core workflows on it.
+
+    scales are keys of SCALES. Databases are created in workdir (default: a temporary
+    directory) and left there. Returns the results, also written to out_path as JSON:
+    {'created_at', 'python', 'sqlite', 'seed', 'results': [{'scale', 'params', 'counts',
+    'workflows': [{'name', 'seconds', 'rows', 'rows_per_s'}]}]}.
+    """
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        raise ValueError(f"Unknown scale {unknown[0]!r}; expected one of: {', '.join(SCALES)}")
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="rentax-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    saved = database.DB_PATH, database.SCHEMA_PATH
+    try:
+        for scale in scales:
+            params = SCALES[scale]
+            fresh_database(workdir / f"bench-{scale}-{seed}.db")
+
+            timings = []
+            started = time.perf_counter()
+            counts = generate_portfolio(start_year=START_YEAR, seed=seed, **params)
+            timings.append(_timing('generate_portfolio', time.perf_counter() - started, counts['receipt_log']))
+            for name, workflow in _workflows(START_YEAR, params['years']):
+                started = time.perf_counter()
+                rows = workflow()
+                timings.append(_timing(name, time.perf_counter() - started, rows))
+            results.append({'scale': scale, 'params': dict(params), 'counts': counts, 'workflows': timings})
+    finally:
+        database.close_all_connections()
+        database.DB_PATH, database.SCHEMA_PATH = saved
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'seed': seed,
+        'results': results,
+    }
+    if out_path is not None:
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def check_thresholds(report):
+    """Return {'scale', 'name', 'seconds', 'threshold_s'} for each workflow of a report slower than THRESHOLDS."""
+    over = []
+    for result in _load(report)['results']:
+        limits = THRESHOLDS.get(result['scale'], {})
+        for w in result['workflows']:
+            limit = limits.get(w['name'])
+            if limit is not None and w['seconds'] > limit:
+                over.append({'scale': result['scale'], 'name': w['name'], 'seconds': w['seconds'], 'threshold_s': limit})
+    return over
+
+
+def _timing(name, seconds, rows):
+    return {
+        'name': name,
+        'seconds': round(seconds, 6),
+        'rows': rows,
+        'rows_per_s': round(rows / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def compare_results(before, after):
+    """Compare two run_benchmarks reports (dicts or JSON file paths) workflow by workflow.
+
+    Returns a list of {'scale', 'name', 'before_s', 'after_s', 'speedup'} for the
+    workflows present in both; speedup > 1 means after is faster.
+    """
+    before, after = (_load(r) for r in (before, after))
+    old = {(r['scale'], w['name']): w['seconds'] for r in before['results'] for w in r['workflows']}
+    rows = []
+    for r in after['results']:
+        for w in r['workflows']:
+            key = (r['scale'], w['name'])
+            if key in old:
+                rows.append({
+                    'scale': key[0], 'name': key[1], 'before_s': old[key], 'after_s': w['seconds'],
+                    'speedup': round(old[key] / w['seconds'], 2) if w['seconds'] > 0 else None,
+                })
+    return rows
+
+
+def _load(report):
+    if isinstance(report, dict):
+        return report
+    with open(report, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def format_table(columns, rows):
+    """Plain-text table of dicts, one line per row."""
+    cells = [[str(r[c]) for c in columns] for r in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    lines = [" | ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines.append("-+-".join("-" * w for w in widths))
+    lines.extend(" | ".join(v.ljust(w) for v, w in zip(row, widths)) for row in cells)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    if len(args) == 3 and args[0] == "--compare":
+        print(format_table(('scale', 'name', 'before_s', 'after_s', 'speedup'), compare_results(args[1], args[2])))
+    elif args and args[0] != "--compare" and all(a in SCALES for a in args[1:]):
+        report = run_benchmarks(args[1:] or ('small',), out_path=args[0])
+        for result in report['results']:
+            print(f"\n{result['scale']}: {result['counts']}")
+            print(format_table(('name', 'seconds', 'rows', 'rows_per_s'), result['workflows']))
+        over = check_thresholds(report)
+        if over:
+            print("\nOver threshold:")
+            print(format_table(('scale', 'name', 'seconds', 'threshold_s'), over))
+            sys.exit(1)
+    else:
+        print(f"Usage: python -m benchmarks.suite RESULTS.json [{'|'.join(SCALES)} ...]")
+        print("       python -m benchmarks.suite --compare BEFORE.json AFTER.json")
+        sys.exit(2)
@@ -0,0 +1,162 @@
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+import database
+from database import get_connection, transaction
+from services.payments_service import create_payments_bulk
+from services.receipt_service import batch_generate_receipts_for_range
+
+# Deterministic synthetic portfolios for benchmarks: the same arguments and seed always
+# produce the same database. Each unit gets one of these ownership layouts (with the
+# given probabilities) and a single assignment leasing it to one client, since the app
+# rejects overlapping assignments on a unit; the layout shapes its ownerships rows:
+#  - single: one owner at 100%
+#  - shared: two or three owners splitting the unit (50/50 or 40/30/30); the assignment
+#    is held by the first of them
+#  - alternating: one owner in odd months and another in even months; the assignment is
+#    an odd_even one held by the odd-month owner
+#  - cycle: one owner billed cycle_length months on, cycle_length months off
+# Receipts are generated month by month by the receipt service for every year of the
+# range, then most receipt_log rows are paid in full, some partially and the rest left open.
+LAYOUTS = (('single', 0.60), ('shared', 0.25), ('alternating', 0.10), ('cycle', 0.05))
+
+# Share of receipt_log rows paid in full / partially; the rest stay unpaid
+PAID_RATIO = 0.70
+PARTIAL_RATIO = 0.15
+
+_CITIES = ('Casablanca', 'Rabat', 'Marrakech', 'Tangier', 'Fes', 'Agadir')
+_UNIT_TYPES = ('apt', 'apt', 'apt', 'store', 'building')
+_BATCH_SIZE = 50000
+
+_SCHEMA_PATH = Path(__file__).resolve().parents[1] / "sql" / "schema.sql"
+
+
+def fresh_database(db_path):
+    """Point database at a new, empty database file (replacing any previous one) with the schema applied."""
+    database.close_all_connections()
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    database.DB_PATH, database.SCHEMA_PATH = Path(db_path), _SCHEMA_PATH
+    database.initialize_database()
+
+
+def generate_portfolio(owners, units, years=1, start_year=2020, clients=None, seed=0):
+    """Fill the (empty) current database with a synthetic portfolio and its receipt history.
+
+    owners and units are row counts; clients defaults to one per two units. Receipts are
+    generated for every month of years calendar years starting at start_year.
+    Returns row counts per table: {'owners', 'clients', 'units', 'ownerships',
+    'assignments', 'receipt_log', 'payments'}.
+    """
+    owners, units, years = int(owners), int(units), int(years)
+    if owners < 3 or units < 1 or years < 1:
+        raise ValueError("generate_portfolio needs at least 3 owners, 1 unit and 1 year")
+    clients = max(1, units // 2) if clients is None else int(clients)
+    rng = random.Random(seed)
+
+    conn = get_connection()
+    try:
+        if conn.execute("SELECT EXISTS (SELECT 1 FROM owners) OR EXISTS (SELECT 1 FROM units)").fetchone()[0]:
+            raise ValueError("generate_portfolio needs an empty database")
+    finally:
+        conn.close()
+
+    owner_rows = [(i, f"Owner {i:06d}", f"OWN{i:08d}", rng.randint(0, 5)) for i in range(1, owners + 1)]
+    client_rows = [(i, f"Client {i:06d}", f"CLI{i:08d}", 'PM' if rng.random() < 0.1 else 'PP') for i in range(1, clients + 1)]
+    unit_rows, ownership_rows, assignment_rows = [], [], []
+    months = 12 * years
+    for unit_id in range(1, units + 1):
+        unit_rows.append((unit_id, f"U{unit_id:07d}", rng.choice(_CITIES), rng.randint(0, 9), rng.choice(_UNIT_TYPES)))
+        client_id = rng.randint(1, clients)
+        rent = rng.randrange(2000, 15001, 100)
+        # most leases cover the whole range; some start late and some end early
+        start = rng.randrange(1, months) if rng.random() < 0.15 else 0
+        start_date = _month_start(start_year, start)
+        end_date = _month_start(start_year, rng.randrange(start, months)) if rng.random() < 0.10 else None
+
+        layout = _pick_layout(rng)
+        if layout == 'shared':
+            shares = (50.0, 50.0) if rng.random() < 0.7 else (40.0, 30.0, 30.0)
+            unit_owners = rng.sample(range(1, owners + 1), len(shares))
+            for owner_id, share in zip(unit_owners, shares):
+                ownership_rows.append((unit_id, owner_id, share, 0, None))
+            assignment_rows.append((unit_id, unit_owners[0], client_id, 100.0, 'none', None, None, start_date, end_date, rent))
+        elif layout == 'alternating':
+            odd_owner, even_owner = rng.sample(range(1, owners + 1), 2)
+            ownership_rows.append((unit_id, odd_owner, 100.0, 1, 'odd'))
+            ownership_rows.append((unit_id, even_owner, 100.0, 1, 'even'))
+            assignment_rows.append((unit_id, odd_owner, client_id, 100.0, 'odd_even', None, 1, start_date, end_date, rent))
+        else:
+            owner_id = rng.randint(1, owners)
+            ownership_rows.append((unit_id, owner_id, 100.0, 0, None))
+            if layout == 'cycle':
+                assignment_rows.append((unit_id, owner_id, client_id, 100.0, 'cycle', rng.choice((3, 6)), 1, start_date, end_date, rent))
+            else:
+                assignment_rows.append((unit_id, owner_id, client_id, 100.0, 'none', None, None, start_date, end_date, rent))
+
+    with transaction(immediate=True) as conn:
+        cur = conn.cursor()
+        cur.executemany("INSERT INTO owners (id, name, legal_id, family_count) VALUES (?, ?, ?, ?)", owner_rows)
+        cur.executemany("INSERT INTO clients (id, name, legal_id, client_type) VALUES (?, ?, ?, ?)", client_rows)
+        cur.executemany("INSERT INTO units (id, reference, city, floor, unit_type) VALUES (?, ?, ?, ?, ?)", unit_rows)
+        cur.executemany(
+            "INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate, odd_even) VALUES (?, ?, ?, ?, ?)",
+            ownership_rows,
+        )
+        cur.executemany(
+            "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length,"
+            " cycle_position, start_date, end_date, rent_amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            assignment_rows,
+        )
+
+    receipt_rows = batch_generate_receipts_for_range(
+        f"01/{start_year}", f"12/{start_year + years - 1}", issue_day=5, chunk_months=1,
+    )
+    payments = _pay_receipts(rng)
+    return {
+        'owners': owners, 'clients': clients, 'units': units, 'ownerships': len(ownership_rows),
+        'assignments': len(assignment_rows), 'receipt_log': receipt_rows, 'payments': payments,
+    }
+
+
+def _pick_layout(rng):
+    r = rng.random()
+    for layout, probability in LAYOUTS:
+        if r < probability:
+            return layout
+        r -= probability
+    return LAYOUTS[0][0]
+
+
+def _month_start(start_year, offset):
+    """ISO date of the 1st of the month offset months after January of start_year."""
+    year, month = divmod(offset, 12)
+    return f"{start_year + year:04d}-{month + 1:02d}-01"
+
+
+def _pay_receipts(rng):
+    """Record full or partial payments for receipt_log rows, _BATCH_SIZE rows at a time."""
+    recorded = 0
+    after = 0
+    while True:
+        conn = get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT uid, issue_date, amount FROM receipt_log WHERE uid > ? ORDER BY uid LIMIT ?",
+                (after, _BATCH_SIZE),
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return recorded
+        payments = []
+        for uid, issue_date, amount in rows:
+            r = rng.random()
+            if r >= PAID_RATIO + PARTIAL_RATIO:
+                continue
+            paid = amount if r < PAID_RATIO else round(amount * rng.choice((0.25, 0.5, 0.75)), 2)
+            received_at = (date.fromisoformat(issue_date) + timedelta(days=rng.randint(0, 40))).isoformat()
+            payments.append((uid, paid, received_at, None))
+        recorded += create_payments_bulk(payments)
+        after = rows[-1][0]
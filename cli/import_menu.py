@@ -0,0 +1,31 @@
+from services.import_service import IMPORT_KINDS, import_file
+
+
+def import_menu():
+    print("\n=== Import data ===")
+    print("Import order: owners, clients, units, then ownerships and assignments.")
+    for i, kind in enumerate(IMPORT_KINDS, start=1):
+        print(f"{i}. {kind.capitalize()}")
+    print("0. Back")
+
+    choice = input("Choose an option: ").strip()
+    if choice == "0":
+        return
+    if not choice.isdigit() or not 1 <= int(choice) <= len(IMPORT_KINDS):
+        print("Invalid choice.")
+        return
+    kind = IMPORT_KINDS[int(choice) - 1]
+
+    path = input("File (.csv or .xlsx): ").strip()
+    rejects_path = input("Rejects file (optional, .csv): ").strip() or None
+    try:
+        result = import_file(kind, path, rejects_path)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        return
+
+    print(f"Imported {result['imported']} {kind}, rejected {len(result['rejected'])}.")
+    for line, message in result['rejected'][:20]:
+        print(f"  line {line}: {message}")
+    if len(result['rejected']) > 20:
+        print(f"  ... see {rejects_path} for the rest" if rejects_path else "  ...")
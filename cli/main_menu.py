@@ -5,6 +5,7 @@ from cli.assignments_menu import assignments_menu
 from cli.receipts_menu import receipts_menu
 from cli.taxes_menu import taxes_menu
 from cli.ownerships_menu import ownerships_menu
+from cli.import_menu import import_menu
 
 
 def main_menu():
@@ -17,6 +18,7 @@ def main_menu():
         print("5. Receipts")
         print("6. Taxes")
         print("7. Ownerships")
+        print("8. Import data")
         print("0. Exit")
 
         choice = input("Choose an option: ").strip()
@@ -33,6 +35,8 @@ def main_menu():
             receipts_menu()
         elif choice == "6":
             taxes_menu()
+        elif choice == "8":
+            import_menu()
         elif choice == "0":
             print("Goodbye.")
             break
@@ -1,5 +1,6 @@
 from services.receipt_service import list_receipt_logs_with_names, create_receipt
 from services.taxes_service import write_csv_file
+from services.report_export import export_format_for_path, write_column_batches, write_report
 
 
 def receipts_menu():
@@ -9,6 +10,10 @@ def receipts_menu():
         print("2. Show receipt logs")
         print("3. Record payment for receipt log UID")
         print("4. Export receipts/payments CSV")
+        print("5. Generate receipts for a range of months (backfill)")
+        print("6. Preview receipts for a month (dry run)")
+        print("7. Reconcile bank statement")
+        print("8. Receivables aging report")
         print("0. Back")
 
         choice = input("Choose an option: ").strip()
@@ -28,12 +33,50 @@ def receipts_menu():
             record_payment()
         elif choice == "4":
             export_receipts_csv()
+        elif choice == "5":
+            from services.receipt_service import batch_generate_receipts_for_range
+            start = input("From month (mm/yyyy): ").strip()
+            end = input("To month (mm/yyyy): ").strip()
+            day = input("Issue day of month [1]: ").strip() or "1"
+            if not day.isdigit():
+                print("Issue day must be numeric.")
+                continue
+            try:
+                count = batch_generate_receipts_for_range(start, end, issue_day=int(day))
+                print(f"Generated {count} receipts for {start} to {end}.")
+            except Exception as e:
+                print(f"Error: {e}")
+        elif choice == "6":
+            preview_month_generation()
+        elif choice == "7":
+            reconcile_statement()
+        elif choice == "8":
+            show_aging_report()
         elif choice == "0":
             break
         else:
             print("Invalid choice.")
 
 
+def preview_month_generation():
+    from services.receipt_service import diff_receipts_for_month
+
+    month = input("Month to preview (mm/yyyy): ").strip()
+    issue_date = input("Issue date (dd/mm/yyyy): ").strip()
+    try:
+        diff = diff_receipts_for_month(month, issue_date)
+    except Exception as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"\n{len(diff['to_add'])} receipts would be added for {diff['period']} ({diff['already_present']} already present).")
+    if diff['to_add']:
+        print("\nAssignment | Owner | Client | Amount")
+        print("-" * 50)
+        for r in diff['to_add']:
+            print(f"{r['assignment_id']} | {r['owner_id']} | {r['client_id']} | {r['amount']:.2f}")
+
+
 def show_receipt_logs():
     rows = list_receipt_logs_with_names()
 
@@ -52,6 +95,47 @@ def show_receipt_logs():
     input("\nPress Enter to continue...")
 
 
+def reconcile_statement():
+    from services.reconciliation_service import reconcile_bank_statement
+
+    path = input("Bank statement file (.csv or .xlsx): ").strip()
+    review = input("Review file for unmatched lines [unmatched.csv]: ").strip() or "unmatched.csv"
+    dry_run = input("Dry run, record nothing? (y/N): ").strip().lower() == "y"
+    try:
+        result = reconcile_bank_statement(path, review_path=review, dry_run=dry_run)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return
+
+    if dry_run:
+        print(f"Matched {len(result['matched'])} lines (dry run, nothing recorded).")
+    else:
+        print(f"Matched {len(result['matched'])} lines, recorded {result['payments']} payments.")
+    if result['unmatched']:
+        print(f"{len(result['unmatched'])} unmatched lines written to {review}.")
+
+
+def show_aging_report():
+    from services.receivables_service import aging_report
+
+    by = input("Group by (owner/client/unit) [owner]: ").strip().lower() or "owner"
+    as_of = input("As of date (YYYY-MM-DD) [today]: ").strip() or None
+    try:
+        rows = aging_report(by, as_of)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if not rows:
+        print("\nNothing outstanding.")
+        return
+
+    print(f"\n{by.capitalize()} | Current | 30+ | 60+ | 90+ | Total")
+    print("-" * 80)
+    for r in rows:
+        print(f"{r['name'] or r['id']} | {r['current']:.2f} | {r['days_30']:.2f} | {r['days_60']:.2f} | {r['days_90_plus']:.2f} | {r['total']:.2f}")
+    input("\nPress Enter to continue...")
+
+
 def record_payment():
     from services.payments_service import create_payment
 
@@ -92,18 +176,27 @@ def export_receipts_csv():
     fmt_choice = input("Choose format [1]: ").strip() or '1'
     fmt_map = {'1': 'detailed', '2': 'by-owner', '3': 'minimal'}
     fmt = fmt_map.get(fmt_choice, 'detailed')
-    out = input(f"Output file (path) or '-' for stdout [receipts_{year}.csv]: ").strip() or f"receipts_{year}.csv"
+    out = input(f"Output file (path, .csv/.ndjson/.arrow/.parquet) or '-' for stdout [receipts_{year}.csv]: ").strip() or f"receipts_{year}.csv"
+    export_format = export_format_for_path(out)
 
-    from services.receipt_service import generate_receipts_report
+    from services.receipt_service import iter_receipts_report, iter_receipts_report_columns, RECEIPTS_REPORT_COLUMN_TYPES
 
+    typed = export_format != 'csv'
+    owner_id = int(owner) if owner else None
     try:
-        headers, rows = generate_receipts_report(year, csv_format=fmt, owner_id=(int(owner) if owner else None))
+        if export_format in ('arrow', 'parquet'):
+            headers, batches = iter_receipts_report_columns(year, csv_format=fmt, owner_id=owner_id)
+            write_column_batches(out, headers, batches, export_format, RECEIPTS_REPORT_COLUMN_TYPES)
+        else:
+            headers, rows = iter_receipts_report(year, csv_format=fmt, owner_id=owner_id, typed=typed)
+            if typed:
+                write_report(out, headers, rows, export_format, RECEIPTS_REPORT_COLUMN_TYPES)
+            else:
+                write_csv_file(out, headers, rows)
     except ValueError as e:
         print(f"Error: {e}")
         return
 
-    out_content = write_csv_file(out, headers, rows)
-    if out == '-':
-        print(out_content)
-    else:
-        print(f"Wrote CSV to {out}")
\ No newline at end of file
+    if out != '-':
+        print(f"Wrote {export_format.upper()} to {out}")
+
@@ -1,4 +1,5 @@
-from services.taxes_service import compute_owner_taxes_for_year, generate_taxes_report, write_csv_file
+from services.taxes_service import compute_owner_taxes_for_year, compute_taxes_for_year, iter_taxes_report, write_csv_file, TAXES_REPORT_COLUMN_TYPES
+from services.report_export import export_format_for_path, write_report
 
 
 def taxes_menu():
@@ -20,14 +21,7 @@ def taxes_menu():
         _print_tax_result(res)
     else:
         # list taxes for all owners
-        from database import get_connection
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM owners ORDER BY id")
-        owners = [r[0] for r in cur.fetchall()]
-        conn.close()
-        for oid in owners:
-            res = compute_owner_taxes_for_year(oid, year)
+        for res in compute_taxes_for_year(year):
             _print_tax_result(res)
 
     # Offer CSV export
@@ -40,13 +34,20 @@ def taxes_menu():
         fmt_choice = input("Choose format [1]: ").strip() or '1'
         fmt_map = {'1': 'detailed', '2': 'by-assignment', '3': 'minimal'}
         fmt = fmt_map.get(fmt_choice, 'detailed')
-        out = input("Output file (path) or '-' for stdout [taxes_{}.csv]: ".format(year)).strip() or f"taxes_{year}.csv"
-        headers, rows = generate_taxes_report(year, csv_format=fmt, owner_id=(int(owner) if owner else None))
-        out_content = write_csv_file(out, headers, rows)
-        if out == '-':
-            print(out_content)
-        else:
-            print(f"Wrote CSV to {out}")
+        out = input("Output file (path, .csv/.ndjson/.arrow/.parquet) or '-' for stdout [taxes_{}.csv]: ".format(year)).strip() or f"taxes_{year}.csv"
+        export_format = export_format_for_path(out)
+        typed = export_format != 'csv'
+        headers, rows = iter_taxes_report(year, csv_format=fmt, owner_id=(int(owner) if owner else None), typed=typed)
+        try:
+            if typed:
+                write_report(out, headers, rows, export_format, TAXES_REPORT_COLUMN_TYPES)
+            else:
+                write_csv_file(out, headers, rows)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        if out != '-':
+            print(f"Wrote {export_format.upper()} to {out}")
 
 
 def _print_tax_result(res):
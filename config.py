@@ -1,7 +1,8 @@
 # DB path and settings
 DB_PATH = 'database.db'
 
-# Tax configuration (editable per-year)
+# Default tax configuration. Per-year rules can be stored in the tax_schedules
+# table (services.tax_schedule.set_tax_schedule); years without one use this.
 TAX_CONFIG = {
     # fraction to keep after 40% abattement: taxable = gross * (1 - abattement)
     'abattement': 0.40,
@@ -28,3 +29,27 @@ TAX_CONFIG = {
     'family_deduction_per_person': 500,
     'family_deduction_max': 3000,
 }
+
+# Receipt numbering scheme (services.receipt_numbering): 'per_assignment',
+# 'per_owner_year' or 'global'
+RECEIPT_NUMBERING = 'per_assignment'
+
+# SQLite storage profile applied to every connection when it is opened
+# (database.py). WAL lets report readers run while receipts are being written;
+# busy_timeout (ms) makes a writer wait for the lock instead of failing with
+# "database is locked"; synchronous=NORMAL is durable across application crashes
+# under WAL (only a power loss can drop the last commits).
+STORAGE_PROFILE = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,
+    'cache_size': -32000,
+    'temp_store': 'MEMORY',
+}
+
+# Opt-in timing of service calls and their SQL (instrumentation.py); can also be
+# switched on with the RENTAX_INSTRUMENT=1 environment variable. Statements slower
+# than SLOW_QUERY_MS milliseconds are recorded with their SQL.
+INSTRUMENTATION = False
+SLOW_QUERY_MS = 100
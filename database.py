@@ -1,17 +1,273 @@
 import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
 
+import instrumentation
+from config import STORAGE_PROFILE
+
 DB_PATH = Path("database.db")
 SCHEMA_PATH = Path("sql/schema.sql")
 
+# PRAGMAs applied once when a pooled connection is opened (name -> value)
+PRAGMAS = {
+    "foreign_keys": "ON",
+}
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+# STORAGE_PROFILE (config.py) is applied after PRAGMAS; set an entry to None to skip it
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+# Weak references: when a thread exits its thread-local connection is released
+# and garbage collected (which closes it) instead of being kept open here
+_pool = weakref.WeakSet()
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection shared by every service call made on one thread.
+
+    Services keep the usual get_connection() / close() pairing; close() hands
+    the connection back to the pool instead of closing it. When the outermost
+    checkout is released any transaction that was not committed is rolled
+    back, which matches what closing a plain connection would have done.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.traced = False
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = instrumentation.InstrumentedCursor if self.traced else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if self.checkouts > 0:
+            self.checkouts -= 1
+        if self.checkouts == 0 and self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        with _pool_lock:
+            _pool.discard(self)
+        super().close()
+
+
+def _open_connection(path):
+    conn = sqlite3.connect(path, factory=PooledConnection)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+    for name, value in list(PRAGMAS.items()) + list(STORAGE_PROFILE.items()):
+        if value is not None:
+            conn.execute(f"PRAGMA {name} = {value};")
+    with _pool_lock:
+        _pool.add(conn)
+    return conn
+
+
+class _WriteQueue:
+    """First-come first-served lock held for the duration of a write transaction.
+
+    Threads of this process queue here for their turn instead of racing for
+    SQLite's write lock; other processes are handled by busy_timeout.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    def acquire(self):
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._cond.wait()
+
+    def release(self):
+        with self._cond:
+            self._serving += 1
+            self._cond.notify_all()
+
+    def waiting(self):
+        """Number of threads holding or waiting for the queue."""
+        with self._cond:
+            return self._next_ticket - self._serving
+
+
+_write_queue = _WriteQueue()
+
+
+def pending_writes():
+    """Number of write transactions of this process running or queued."""
+    return _write_queue.waiting()
+
+
+def get_connection():
+    """Return the calling thread's pooled connection to DB_PATH.
+
+    The connection is opened (and PRAGMAS applied) on first use and reused by
+    every later call on the same thread. If DB_PATH has changed since, the old
+    connection is closed and a new one opened.
+    """
+    path = str(DB_PATH)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path != path:
+        conn.close_for_real()
+        conn = None
+    if conn is None:
+        conn = _open_connection(path)
+        _local.conn = conn
+        _local.path = path
+    if conn.traced != instrumentation.is_enabled():
+        conn.traced = instrumentation.is_enabled()
+        conn.set_trace_callback(instrumentation.trace_statement if conn.traced else None)
+    conn.checkouts += 1
     return conn
 
 
+@contextmanager
+def transaction(immediate=False):
+    """Run a block in a single transaction on the pooled connection.
+
+    Commits when the block exits normally and rolls back on error. With
+    immediate=True the write lock is taken up front (BEGIN IMMEDIATE).
+    Nested use joins the enclosing transaction. Outermost transactions of
+    all threads go through one FIFO write queue, so concurrent service calls
+    run one after another instead of failing with "database is locked";
+    plain reads on other connections are not blocked (WAL).
+    """
+    conn = get_connection()
+    try:
+        if conn.in_transaction:
+            yield conn
+            return
+        _write_queue.acquire()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            _write_queue.release()
+    finally:
+        conn.close()
+
+
+def stream_rows(query, params=(), batch_size=1000):
+    """Yield the rows of a query, pulling them from the cursor batch_size at a time.
+
+    The pooled connection stays checked out until the generator is exhausted or closed.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        conn.close()
+
+
+def stream_batches(query, params=(), batch_size=1000):
+    """Yield the rows of a query as lists of up to batch_size tuples, straight from fetchmany."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.row_factory = None  # plain tuples
+        cur.execute(query, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        conn.close()
+
+
+def keyset_page(columns, from_sql, where, params, sort_expr, id_expr, limit, after=None, descending=False):
+    """Fetch one page of a listing ordered by (sort_expr, id_expr) using keyset pagination.
+
+    Runs SELECT columns FROM from_sql WHERE <where predicates ANDed> and seeks past the
+    previous page instead of using OFFSET. after is the cursor returned for the previous
+    page: the id when sorting by id_expr, otherwise a (sort value, id) tuple, so
+    sort_expr must not be nullable.
+    Returns (list of dicts, next_after) where next_after is None on the last page.
+    """
+    limit = int(limit)
+    if limit <= 0:
+        raise ValueError("limit must be a positive integer")
+    by_id = sort_expr == id_expr
+    op, direction = ('<', 'DESC') if descending else ('>', 'ASC')
+    clauses = list(where)
+    params = list(params)
+    if after is not None:
+        if by_id:
+            clauses.append(f"{id_expr} {op} ?")
+            params.append(after)
+        else:
+            clauses.append(f"({sort_expr}, {id_expr}) {op} (?, ?)")
+            params.extend(after)
+
+    q = f"SELECT {columns}, {sort_expr} AS _sort_key, {id_expr} AS _id_key FROM {from_sql}"
+    if clauses:
+        q += " WHERE " + " AND ".join(clauses)
+    q += f" ORDER BY {id_expr} {direction}" if by_id else f" ORDER BY {sort_expr} {direction}, {id_expr} {direction}"
+    q += " LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(q, tuple(params))
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_after = last["_id_key"] if by_id else (last["_sort_key"], last["_id_key"])
+    items = [{k: r[k] for k in r.keys() if k not in ("_sort_key", "_id_key")} for r in rows]
+    return items, next_after
+
+
+def close_connection():
+    """Really close the calling thread's pooled connection, if any."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close_for_real()
+        _local.conn = None
+        _local.path = None
+
+
+def close_all_connections():
+    """Close every pooled connection (e.g. before replacing the database file)."""
+    with _pool_lock:
+        conns = list(_pool)
+    for conn in conns:
+        try:
+            conn.close_for_real()
+        except sqlite3.ProgrammingError:
+            # opened on another thread; drop it from the pool anyway
+            with _pool_lock:
+                _pool.discard(conn)
+
+
 def initialize_database():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
@@ -21,8 +277,10 @@ def initialize_database():
     conn = get_connection()
     try:
         with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-            conn.executescript(f.read())
-        conn.commit()
+            script = f.read()
+        _prepare_existing_data(conn)
+        # one transaction, so a failing statement leaves the database as it was
+        conn.executescript(f"BEGIN;\n{script}\nCOMMIT;")
     except sqlite3.DatabaseError as e:
         conn.rollback()
         # Re-raise with a clearer message while preserving the original exception context
@@ -31,6 +289,77 @@ def initialize_database():
         conn.close()
 
 
+def _prepare_existing_data(conn):
+    """Fix data in an existing database that would stop schema.sql from adding its constraints."""
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+    if 'receipt_log' in names and 'ux_receipt_log_assignment_period_owner' not in names:
+        merge_duplicate_receipt_logs(conn)
+
+
+def merge_duplicate_receipt_logs(conn):
+    """Fold receipt_log rows repeating an (assignment_id, period, owner_id) into the oldest one.
+
+    Payments of the removed rows are moved to the kept row, and receipts left without any
+    receipt_log row are deleted. Raises sqlite3.DatabaseError, without changing anything, if
+    duplicates disagree on the amount. Returns the number of receipt_log rows removed.
+    """
+    groups = conn.execute(
+        """
+        SELECT assignment_id, period, owner_id, COUNT(DISTINCT amount)
+        FROM receipt_log
+        GROUP BY assignment_id, period, owner_id
+        HAVING COUNT(*) > 1
+        """
+    ).fetchall()
+    if not groups:
+        return 0
+    conflicting = [g for g in groups if g[3] > 1]
+    if conflicting:
+        assignment_id, period, owner_id, _ = conflicting[0]
+        raise sqlite3.DatabaseError(
+            f"receipt_log has {len(conflicting)} duplicated (assignment_id, period, owner_id) entries with "
+            f"different amounts (first: assignment {assignment_id}, period {period}, owner {owner_id}); "
+            "delete the wrong rows before upgrading the schema"
+        )
+
+    with transaction(immediate=True):
+        conn.execute(
+            """
+            CREATE TEMP TABLE duplicate_receipt_log AS
+            SELECT rl.uid, rl.receipt_id, k.keep
+            FROM receipt_log rl
+            JOIN (
+                SELECT assignment_id, period, owner_id, MIN(uid) AS keep
+                FROM receipt_log
+                GROUP BY assignment_id, period, owner_id
+                HAVING COUNT(*) > 1
+            ) k ON k.assignment_id = rl.assignment_id AND k.period = rl.period AND k.owner_id = rl.owner_id
+            WHERE rl.uid <> k.keep
+            """
+        )
+        try:
+            conn.execute(
+                """
+                UPDATE payments
+                SET receipt_log_uid = (SELECT keep FROM duplicate_receipt_log d WHERE d.uid = payments.receipt_log_uid)
+                WHERE receipt_log_uid IN (SELECT uid FROM duplicate_receipt_log)
+                """
+            )
+            removed = conn.execute(
+                "DELETE FROM receipt_log WHERE uid IN (SELECT uid FROM duplicate_receipt_log)"
+            ).rowcount
+            conn.execute(
+                """
+                DELETE FROM receipts
+                WHERE id IN (SELECT receipt_id FROM duplicate_receipt_log)
+                  AND NOT EXISTS (SELECT 1 FROM receipt_log rl WHERE rl.receipt_id = receipts.id)
+                """
+            )
+        finally:
+            conn.execute("DROP TABLE temp.duplicate_receipt_log")
+    return removed
+
+
 def list_tables():
     conn = get_connection()
     rows = conn.execute(
@@ -142,3 +142,17 @@ def create_loading_spinner():
         stroke_width=4,
         stroke_width_border=2,
     )
+
+
+# Rows fetched per page by the paginated list pages
+PAGE_SIZE = 50
+
+
+def create_load_more_button(on_click):
+    """Create the button that appends the next page to a list table"""
+    return ft.TextButton(
+        "Load more",
+        icon=icons.EXPAND_MORE,
+        on_click=on_click,
+        visible=False,
+    )
@@ -1,6 +1,6 @@
 import flet as ft
 from flet import icons
-from gui.components.common import create_header, create_text_field, create_form_field_row
+from gui.components.common import create_header, create_text_field, create_form_field_row, create_load_more_button, PAGE_SIZE
 from services import assignment_service, unit_service, client_service
 
 
@@ -58,64 +58,65 @@ def create(page: ft.Page):
         except Exception as e:
             show_error(f"Error loading data: {str(e)}")
     
-    def load_assignments():
-        """Load assignments into table"""
-        try:
-            assignments = assignment_service.list_all_assignments() or []
-            units = {u['id']: u for u in (unit_service.list_all_units() or [])}
-            clients = {c['id']: c for c in (client_service.list_all_clients() or [])}
-            
-            rows = []
-            for assign in assignments:
-                unit = units.get(assign.get('unit_id'), {})
-                client = clients.get(assign.get('client_id'), {})
-                
-                rows.append(
-                    ft.DataRow(
-                        cells=[
-                            ft.DataCell(ft.Text(str(assign.get('id', '')))),
-                            ft.DataCell(ft.Text(unit.get('reference', 'N/A'))),
-                            ft.DataCell(ft.Text(client.get('name', 'N/A'))),
-                            ft.DataCell(ft.Text(assign.get('start_date', ''))),
-                            ft.DataCell(ft.Text(assign.get('end_date', '') or "Ongoing")),
-                            ft.DataCell(ft.Text(f"${assign.get('rent_amount', 0)}")),
-                            ft.DataCell(
-                                ft.Row(
-                                    controls=[
-                                        ft.IconButton(
-                                            icon=icons.EDIT,
-                                            icon_size=18,
-                                            on_click=lambda e, a=assign: edit_assignment(a),
-                                        ),
-                                        ft.IconButton(
-                                            icon=icons.DELETE,
-                                            icon_size=18,
-                                            on_click=lambda e, a=assign: delete_assignment(a),
-                                        ),
-                                    ],
-                                    spacing=4,
-                                )
+    # Keyset cursor of the next page (None when everything is loaded)
+    state = {'after': None}
+    
+    def assignment_row(assign):
+        """Build the table row for one assignment (unit reference and client name come joined in)"""
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(str(assign.get('id', '')))),
+                ft.DataCell(ft.Text(assign.get('unit_reference') or 'N/A')),
+                ft.DataCell(ft.Text(assign.get('client_name') or 'N/A')),
+                ft.DataCell(ft.Text(assign.get('start_date', ''))),
+                ft.DataCell(ft.Text(assign.get('end_date', '') or "Ongoing")),
+                ft.DataCell(ft.Text(f"${assign.get('rent_amount', 0)}")),
+                ft.DataCell(
+                    ft.Row(
+                        controls=[
+                            ft.IconButton(
+                                icon=icons.EDIT,
+                                icon_size=18,
+                                on_click=lambda e, a=assign: edit_assignment(a),
+                            ),
+                            ft.IconButton(
+                                icon=icons.DELETE,
+                                icon_size=18,
+                                on_click=lambda e, a=assign: delete_assignment(a),
                             ),
-                        ]
+                        ],
+                        spacing=4,
                     )
-                )
-            
-            assignments_table.controls = [
-                ft.DataTable(
-                    columns=[
-                        ft.DataColumn(ft.Text("ID", weight="w500")),
-                        ft.DataColumn(ft.Text("Unit", weight="w500")),
-                        ft.DataColumn(ft.Text("Client", weight="w500")),
-                        ft.DataColumn(ft.Text("Start", weight="w500")),
-                        ft.DataColumn(ft.Text("End", weight="w500")),
-                        ft.DataColumn(ft.Text("Rent", weight="w500")),
-                        ft.DataColumn(ft.Text("Actions", weight="w500")),
-                    ],
-                    rows=rows,
-                    border=ft.border.all(1, "#E0E0E0"),
-                    border_radius=8,
-                )
+                ),
             ]
+        )
+    
+    assignments_data_table = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("ID", weight="w500")),
+            ft.DataColumn(ft.Text("Unit", weight="w500")),
+            ft.DataColumn(ft.Text("Client", weight="w500")),
+            ft.DataColumn(ft.Text("Start", weight="w500")),
+            ft.DataColumn(ft.Text("End", weight="w500")),
+            ft.DataColumn(ft.Text("Rent", weight="w500")),
+            ft.DataColumn(ft.Text("Actions", weight="w500")),
+        ],
+        rows=[],
+        border=ft.border.all(1, "#E0E0E0"),
+        border_radius=8,
+    )
+    load_more_button = create_load_more_button(lambda e: load_assignments(reset=False))
+    assignments_table.controls = [assignments_data_table, load_more_button]
+    
+    def load_assignments(reset=True):
+        """Load the first page of assignments into the table, or append the next one"""
+        try:
+            if reset:
+                state['after'] = None
+                assignments_data_table.rows = []
+            assignments, state['after'] = assignment_service.list_assignments_page(limit=PAGE_SIZE, after=state['after'])
+            assignments_data_table.rows.extend(assignment_row(a) for a in assignments)
+            load_more_button.visible = state['after'] is not None
             page.update()
         except Exception as e:
             show_error(f"Error loading assignments: {str(e)}")
@@ -1,9 +1,9 @@
+from datetime import date
+
 import flet as ft
 from flet import icons
 from gui.components.common import create_header, create_stat_card
-from services import owner_service, unit_service, client_service
-from services.assignment_service import list_assignments
-from services.receipt_service import list_receipt_logs_with_names
+from services import dashboard_service
 
 
 def create(page: ft.Page):
@@ -12,17 +12,21 @@ def create(page: ft.Page):
     def load_stats():
         """Load statistics"""
         try:
-            owners_count = len(owner_service.list_owners() or [])
-            units_count = len(unit_service.list_all_units() or [])
-            clients_count = len(client_service.list_all_clients() or [])
-            assignments_count = len(list_assignments() or [])
-            
-            return owners_count, units_count, clients_count, assignments_count
+            counts = dashboard_service.get_counts()
+            return counts['owners'], counts['units'], counts['clients'], counts['active_assignments']
         except:
             return 0, 0, 0, 0
     
+    def load_month_kpis():
+        """Load billed/received/outstanding for the current month"""
+        try:
+            return dashboard_service.get_monthly_kpis(date.today().strftime("%Y-%m-01"))
+        except:
+            return {'billed': 0.0, 'received': 0.0, 'outstanding': 0.0}
+    
     # Load initial stats
     owners_count, units_count, clients_count, assignments_count = load_stats()
+    month_kpis = load_month_kpis()
     
     # Create stat cards
     stat_cards = ft.Row(
@@ -36,11 +40,20 @@ def create(page: ft.Page):
         wrap=True,
     )
     
+    month_cards = ft.Row(
+        controls=[
+            create_stat_card("Billed This Month", f"${month_kpis['billed']:.2f}", icons.RECEIPT, "#2E86AB"),
+            create_stat_card("Received This Month", f"${month_kpis['received']:.2f}", icons.PAYMENTS, "#4CAF50"),
+            create_stat_card("Outstanding This Month", f"${month_kpis['outstanding']:.2f}", icons.PENDING, "#F44336"),
+        ],
+        spacing=16,
+        wrap=True,
+    )
+    
     # Recent receipts section
     def get_recent_receipts():
         try:
-            receipts = list_receipt_logs_with_names()
-            return receipts[-5:] if receipts else []
+            return dashboard_service.get_recent_receipts(5)
         except:
             return []
     
@@ -89,6 +102,7 @@ def create(page: ft.Page):
         controls=[
             create_header("Dashboard", "Welcome to Rent Manager"),
             stat_cards,
+            month_cards,
             ft.Divider(height=30),
             ft.Text("Recent Receipts", size=18, weight="bold", color="#333"),
             ft.Container(
@@ -1,6 +1,6 @@
 import flet as ft
 from flet import icons
-from gui.components.common import create_header, create_text_field, create_form_field_row
+from gui.components.common import create_header, create_text_field, create_form_field_row, create_load_more_button, PAGE_SIZE
 from services import receipt_service, assignment_service, owner_service
 
 
@@ -56,64 +56,67 @@ def create(page: ft.Page):
         except Exception as e:
             show_error(f"Error loading data: {str(e)}")
     
-    def load_receipts():
-        """Load receipts into table"""
-        try:
-            receipts = receipt_service.list_all_receipts() or []
-            assignments = {a['id']: a for a in (assignment_service.list_all_assignments() or [])}
-            owners = {o['id']: o for o in (owner_service.list_all_owners() or [])}
-            
-            rows = []
-            for receipt in receipts:
-                assignment = assignments.get(receipt.get('assignment_id'), {})
-                owner = owners.get(receipt.get('owner_id'), {})
-                
-                rows.append(
-                    ft.DataRow(
-                        cells=[
-                            ft.DataCell(ft.Text(str(receipt.get('id', '')))),
-                            ft.DataCell(ft.Text(str(assignment.get('id', 'N/A')))),
-                            ft.DataCell(ft.Text(owner.get('name', 'N/A'))),
-                            ft.DataCell(ft.Text(receipt.get('period', ''))),
-                            ft.DataCell(ft.Text(receipt.get('created_at', ''))),
-                            ft.DataCell(ft.Text(f"${receipt.get('amount', 0)}")),
-                            ft.DataCell(
-                                ft.Row(
-                                    controls=[
-                                        ft.IconButton(
-                                            icon=icons.EDIT,
-                                            icon_size=18,
-                                            on_click=lambda e, r=receipt: edit_receipt(r),
-                                        ),
-                                        ft.IconButton(
-                                            icon=icons.DELETE,
-                                            icon_size=18,
-                                            on_click=lambda e, r=receipt: delete_receipt(r),
-                                        ),
-                                    ],
-                                    spacing=4,
-                                )
+    # Keyset cursor of the next page (None when everything is loaded)
+    state = {'after': None}
+    
+    def receipt_row(receipt):
+        """Build the table row for one receipt log line (owner name comes joined in)"""
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(str(receipt.get('uid', '')))),
+                ft.DataCell(ft.Text(str(receipt.get('assignment_id', 'N/A')))),
+                ft.DataCell(ft.Text(receipt.get('owner_name') or 'N/A')),
+                ft.DataCell(ft.Text(receipt.get('period', ''))),
+                ft.DataCell(ft.Text(receipt.get('issue_date', ''))),
+                ft.DataCell(ft.Text(f"${receipt.get('amount', 0)}")),
+                ft.DataCell(
+                    ft.Row(
+                        controls=[
+                            ft.IconButton(
+                                icon=icons.EDIT,
+                                icon_size=18,
+                                on_click=lambda e, r=receipt: edit_receipt(r),
                             ),
-                        ]
+                            ft.IconButton(
+                                icon=icons.DELETE,
+                                icon_size=18,
+                                on_click=lambda e, r=receipt: delete_receipt(r),
+                            ),
+                        ],
+                        spacing=4,
                     )
-                )
-            
-            receipts_table.controls = [
-                ft.DataTable(
-                    columns=[
-                        ft.DataColumn(ft.Text("ID", weight="w500")),
-                        ft.DataColumn(ft.Text("Assignment", weight="w500")),
-                        ft.DataColumn(ft.Text("Owner", weight="w500")),
-                        ft.DataColumn(ft.Text("Period", weight="w500")),
-                        ft.DataColumn(ft.Text("Date", weight="w500")),
-                        ft.DataColumn(ft.Text("Amount", weight="w500")),
-                        ft.DataColumn(ft.Text("Actions", weight="w500")),
-                    ],
-                    rows=rows,
-                    border=ft.border.all(1, "#E0E0E0"),
-                    border_radius=8,
-                )
+                ),
             ]
+        )
+    
+    receipts_data_table = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("ID", weight="w500")),
+            ft.DataColumn(ft.Text("Assignment", weight="w500")),
+            ft.DataColumn(ft.Text("Owner", weight="w500")),
+            ft.DataColumn(ft.Text("Period", weight="w500")),
+            ft.DataColumn(ft.Text("Date", weight="w500")),
+            ft.DataColumn(ft.Text("Amount", weight="w500")),
+            ft.DataColumn(ft.Text("Actions", weight="w500")),
+        ],
+        rows=[],
+        border=ft.border.all(1, "#E0E0E0"),
+        border_radius=8,
+    )
+    load_more_button = create_load_more_button(lambda e: load_receipts(reset=False))
+    receipts_table.controls = [receipts_data_table, load_more_button]
+    
+    def load_receipts(reset=True):
+        """Load the newest page of receipts into the table, or append the next (older) one"""
+        try:
+            if reset:
+                state['after'] = None
+                receipts_data_table.rows = []
+            receipts, state['after'] = receipt_service.list_receipt_logs_page(
+                limit=PAGE_SIZE, after=state['after'], descending=True,
+            )
+            receipts_data_table.rows.extend(receipt_row(r) for r in receipts)
+            load_more_button.visible = state['after'] is not None
             page.update()
         except Exception as e:
             show_error(f"Error loading receipts: {str(e)}")
@@ -1,6 +1,6 @@
 import flet as ft
 from flet import icons
-from gui.components.common import create_header, create_text_field, create_form_field_row
+from gui.components.common import create_header, create_text_field, create_form_field_row, create_load_more_button, PAGE_SIZE
 from services import unit_service
 
 
@@ -24,59 +24,65 @@ def create(page: ft.Page):
     # Data table
     units_table = ft.Column(controls=[], spacing=8)
     
-    def load_units():
-        """Load units into table"""
-        try:
-            units = unit_service.list_all_units() or []
-            
-            rows = []
-            for unit in units:
-                rows.append(
-                    ft.DataRow(
-                        cells=[
-                            ft.DataCell(ft.Text(str(unit.get('id', '')))),
-                            ft.DataCell(ft.Text(unit.get('reference', ''))),
-                            ft.DataCell(ft.Text(unit.get('city', 'N/A'))),
-                            ft.DataCell(ft.Text(unit.get('neighborhood', 'N/A'))),
-                            ft.DataCell(ft.Text(str(unit.get('floor', 'N/A')))),
-                            ft.DataCell(ft.Text(unit.get('unit_type', 'N/A'))),
-                            ft.DataCell(
-                                ft.Row(
-                                    controls=[
-                                        ft.IconButton(
-                                            icon=icons.EDIT,
-                                            icon_size=18,
-                                            on_click=lambda e, u=unit: edit_unit(u),
-                                        ),
-                                        ft.IconButton(
-                                            icon=icons.DELETE,
-                                            icon_size=18,
-                                            on_click=lambda e, u=unit: delete_unit(u),
-                                        ),
-                                    ],
-                                    spacing=4,
-                                )
+    # Keyset cursor of the next page (None when everything is loaded)
+    state = {'after': None}
+    
+    def unit_row(unit):
+        """Build the table row for one unit"""
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(str(unit.get('id', '')))),
+                ft.DataCell(ft.Text(unit.get('reference', ''))),
+                ft.DataCell(ft.Text(unit.get('city', 'N/A'))),
+                ft.DataCell(ft.Text(unit.get('neighborhood', 'N/A'))),
+                ft.DataCell(ft.Text(str(unit.get('floor', 'N/A')))),
+                ft.DataCell(ft.Text(unit.get('unit_type', 'N/A'))),
+                ft.DataCell(
+                    ft.Row(
+                        controls=[
+                            ft.IconButton(
+                                icon=icons.EDIT,
+                                icon_size=18,
+                                on_click=lambda e, u=unit: edit_unit(u),
+                            ),
+                            ft.IconButton(
+                                icon=icons.DELETE,
+                                icon_size=18,
+                                on_click=lambda e, u=unit: delete_unit(u),
                             ),
-                        ]
+                        ],
+                        spacing=4,
                     )
-                )
-            
-            units_table.controls = [
-                ft.DataTable(
-                    columns=[
-                        ft.DataColumn(ft.Text("ID", weight="w500")),
-                        ft.DataColumn(ft.Text("Reference", weight="w500")),
-                        ft.DataColumn(ft.Text("City", weight="w500")),
-                        ft.DataColumn(ft.Text("Neighborhood", weight="w500")),
-                        ft.DataColumn(ft.Text("Floor", weight="w500")),
-                        ft.DataColumn(ft.Text("Type", weight="w500")),
-                        ft.DataColumn(ft.Text("Actions", weight="w500")),
-                    ],
-                    rows=rows,
-                    border=ft.border.all(1, "#E0E0E0"),
-                    border_radius=8,
-                )
+                ),
             ]
+        )
+    
+    units_data_table = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("ID", weight="w500")),
+            ft.DataColumn(ft.Text("Reference", weight="w500")),
+            ft.DataColumn(ft.Text("City", weight="w500")),
+            ft.DataColumn(ft.Text("Neighborhood", weight="w500")),
+            ft.DataColumn(ft.Text("Floor", weight="w500")),
+            ft.DataColumn(ft.Text("Type", weight="w500")),
+            ft.DataColumn(ft.Text("Actions", weight="w500")),
+        ],
+        rows=[],
+        border=ft.border.all(1, "#E0E0E0"),
+        border_radius=8,
+    )
+    load_more_button = create_load_more_button(lambda e: load_units(reset=False))
+    units_table.controls = [units_data_table, load_more_button]
+    
+    def load_units(reset=True):
+        """Load the first page of units into the table, or append the next one"""
+        try:
+            if reset:
+                state['after'] = None
+                units_data_table.rows = []
+            units, state['after'] = unit_service.list_units_page(limit=PAGE_SIZE, after=state['after'])
+            units_data_table.rows.extend(unit_row(u) for u in units)
+            load_more_button.visible = state['after'] is not None
             page.update()
         except Exception as e:
             show_error(f"Error loading units: {str(e)}")
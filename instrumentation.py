@@ -0,0 +1,229 @@
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from config import INSTRUMENTATION, SLOW_QUERY_MS
+
+# Opt-in timing of service calls and the SQL they run. Off unless config.INSTRUMENTATION
+# is True, the RENTAX_INSTRUMENT environment variable is set to 1/true/yes, or enable()
+# is called. While it is on, every @instrumented service call records its wall time, the
+# SQL statements run on the pooled connection (counted through set_trace_callback,
+# trigger statements included) and the rows fetched; statements slower than
+# SLOW_QUERY_MS are kept with their SQL text. When off, @instrumented costs one flag check.
+
+_enabled = INSTRUMENTATION or os.environ.get("RENTAX_INSTRUMENT", "").lower() in ("1", "true", "yes")
+_slow_query_ms = SLOW_QUERY_MS
+
+# Most recent records, bounded so a long-running process does not grow without limit
+_MAX_RECORDS = 10000
+_lock = threading.Lock()
+_calls = deque(maxlen=_MAX_RECORDS)
+_slow_queries = deque(maxlen=_MAX_RECORDS)
+_local = threading.local()
+
+
+def enable(slow_query_ms=None):
+    """Turn instrumentation on, optionally changing the slow-query threshold (milliseconds)."""
+    global _enabled, _slow_query_ms
+    if slow_query_ms is not None:
+        _slow_query_ms = slow_query_ms
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Forget every recorded call and slow query."""
+    with _lock:
+        _calls.clear()
+        _slow_queries.clear()
+
+
+def instrumented(func):
+    """Decorator for service entry points: records one call entry per invocation while enabled."""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        frames = _frames()
+        frame = {'name': name, 'statements': 0, 'rows': 0, 'slow_queries': 0}
+        frames.append(frame)
+        error = None
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            frame['seconds'] = time.perf_counter() - started
+            frame['error'] = error
+            frame['started_at'] = time.time() - frame['seconds']
+            frames.pop()
+            with _lock:
+                _calls.append(frame)
+
+    return wrapper
+
+
+def _frames():
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def trace_statement(sql):
+    """sqlite3 trace callback: count the statement for every active call on this thread."""
+    if getattr(_local, "pending", True) is None:
+        _local.pending = sql
+    for frame in getattr(_local, "frames", ()):
+        frame['statements'] += 1
+
+
+def _count_rows(n):
+    for frame in getattr(_local, "frames", ()):
+        frame['rows'] += n
+
+
+def _start():
+    # the first statement traced from now on is the expanded SQL of the call being timed
+    _local.pending = None
+    return time.perf_counter()
+
+
+def _timed(sql, started):
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    if elapsed_ms < _slow_query_ms:
+        return
+    frames = getattr(_local, "frames", ())
+    for frame in frames:
+        frame['slow_queries'] += 1
+    with _lock:
+        _slow_queries.append({
+            'sql': sql,
+            'ms': round(elapsed_ms, 3),
+            'call': frames[-1]['name'] if frames else None,
+            'at': time.time(),
+        })
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that counts fetched rows and reports slow execute/fetch steps."""
+
+    def execute(self, sql, parameters=()):
+        started = _start()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.traced_sql = _local.pending or sql
+            _timed(self.traced_sql, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = _start()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.traced_sql = sql
+            _timed(sql, started)
+
+    def _fetch_sql(self):
+        return f"(fetch) {getattr(self, 'traced_sql', '')}"
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        _timed(self._fetch_sql(), started)
+        if row is not None:
+            _count_rows(1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _timed(self._fetch_sql(), started)
+        _count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        _timed(self._fetch_sql(), started)
+        _count_rows(len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        _count_rows(1)
+        return row
+
+
+def get_calls():
+    """Recorded calls, oldest first: dicts with name, seconds, statements, rows, slow_queries, error, started_at."""
+    with _lock:
+        return [dict(c) for c in _calls]
+
+
+def get_slow_queries():
+    """Recorded slow statements, oldest first: dicts with sql, ms, call, at."""
+    with _lock:
+        return [dict(q) for q in _slow_queries]
+
+
+def summary():
+    """Per service function totals: name, calls, errors, total_s, mean_ms, max_ms, statements, rows, slow_queries."""
+    totals = {}
+    for c in get_calls():
+        t = totals.setdefault(c['name'], {
+            'name': c['name'], 'calls': 0, 'errors': 0, 'total_s': 0.0, 'max_ms': 0.0,
+            'statements': 0, 'rows': 0, 'slow_queries': 0,
+        })
+        t['calls'] += 1
+        t['errors'] += c['error'] is not None
+        t['total_s'] += c['seconds']
+        t['max_ms'] = max(t['max_ms'], c['seconds'] * 1000.0)
+        for key in ('statements', 'rows', 'slow_queries'):
+            t[key] += c[key]
+    result = []
+    for t in sorted(totals.values(), key=lambda t: t['total_s'], reverse=True):
+        t['mean_ms'] = round(t['total_s'] * 1000.0 / t['calls'], 3)
+        t['total_s'] = round(t['total_s'], 6)
+        t['max_ms'] = round(t['max_ms'], 3)
+        result.append(t)
+    return result
+
+
+def format_summary():
+    """summary() as a plain-text table, slowest function first."""
+    columns = ('name', 'calls', 'errors', 'total_s', 'mean_ms', 'max_ms', 'statements', 'rows', 'slow_queries')
+    rows = [[str(t[c]) for c in columns] for t in summary()]
+    widths = [max([len(c)] + [len(r[i]) for r in rows]) for i, c in enumerate(columns)]
+    lines = [" | ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines.append("-+-".join("-" * w for w in widths))
+    lines.extend(" | ".join(v.ljust(w) for v, w in zip(r, widths)) for r in rows)
+    return "\n".join(lines)
+
+
+def export_json(path=None):
+    """Return the recorded calls, summary and slow queries as a JSON string, also written to path if given."""
+    data = json.dumps(
+        {'calls': get_calls(), 'summary': summary(), 'slow_queries': get_slow_queries()},
+        indent=2,
+    )
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
+    return data
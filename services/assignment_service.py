@@ -1,4 +1,6 @@
-from database import get_connection
+import json
+from bisect import bisect_right
+from database import get_connection, keyset_page, transaction
 from datetime import datetime
 
 
@@ -34,23 +36,155 @@ def _check_overlap(conn, unit_id, start_date, end_date, exclude_assignment_id=No
             SELECT id FROM assignments
             WHERE unit_id = ?
               AND id != ?
-              AND NOT (COALESCE(end_date, ?) < ? OR start_date > ?)
+              AND start_date <= ? AND COALESCE(end_date, ?) >= ?
             """,
-            (unit_id, exclude_assignment_id, DATE_MAX, new_start, new_end),
+            (unit_id, exclude_assignment_id, new_end, DATE_MAX, new_start),
         )
     else:
         cur.execute(
             """
             SELECT id FROM assignments
             WHERE unit_id = ?
-              AND NOT (COALESCE(end_date, ?) < ? OR start_date > ?)
+              AND start_date <= ? AND COALESCE(end_date, ?) >= ?
             """,
-            (unit_id, DATE_MAX, new_start, new_end),
+            (unit_id, new_end, DATE_MAX, new_start),
         )
 
     return cur.fetchone() is not None
 
 
+class UnitIntervals:
+    """The assignment date ranges of one unit, sorted by start date.
+
+    Ranges are (start, end, assignment_id, item_index) with ISO dates and end DATE_MAX
+    when open; item_index marks ranges added by find_assignment_conflicts.
+    max_ends[i] is the latest end among ranges[:i + 1], so overlapping() is a bisect
+    plus a walk back that stops once no earlier range can reach the queried start,
+    even when stored ranges overlap each other (legacy rows).
+    """
+
+    __slots__ = ('starts', 'ranges', 'max_ends')
+
+    def __init__(self):
+        self.starts = []
+        self.ranges = []
+        self.max_ends = []
+
+    def add(self, start, end, assignment_id=None, item_index=None):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ranges.insert(i, (start, end or DATE_MAX, assignment_id, item_index))
+        self._update_max_ends(i)
+
+    def copy(self):
+        intervals = UnitIntervals()
+        intervals.starts = list(self.starts)
+        intervals.ranges = list(self.ranges)
+        intervals.max_ends = list(self.max_ends)
+        return intervals
+
+    def remove(self, assignment_id):
+        """Remove the range of assignment_id and return it (None if absent)."""
+        for i, r in enumerate(self.ranges):
+            if r[2] == assignment_id:
+                del self.starts[i]
+                del self.ranges[i]
+                self._update_max_ends(i)
+                return r
+        return None
+
+    def overlapping(self, start, end):
+        """Return the ranges that share at least one day with start..end (end None = open)."""
+        end = end or DATE_MAX
+        hits = []
+        i = bisect_right(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] >= start:
+            if self.ranges[i][1] >= start:
+                hits.append(self.ranges[i])
+            i -= 1
+        hits.reverse()
+        return hits
+
+    def _update_max_ends(self, i):
+        del self.max_ends[i:]
+        latest = self.max_ends[-1] if self.max_ends else ''
+        for r in self.ranges[i:]:
+            latest = max(latest, r[1])
+            self.max_ends.append(latest)
+
+
+def load_unit_intervals(conn, unit_ids):
+    """Return {unit_id: UnitIntervals} for the given units, read in one indexed query."""
+    intervals = {unit_id: UnitIntervals() for unit_id in unit_ids}
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT unit_id, start_date, COALESCE(end_date, ?), id FROM assignments
+        WHERE unit_id IN (SELECT value FROM json_each(?))
+        ORDER BY unit_id, start_date
+        """,
+        (DATE_MAX, json.dumps(sorted(intervals))),
+    )
+    for unit_id, start, end, assignment_id in cur.fetchall():
+        # rows arrive sorted by start, so add() appends
+        intervals[unit_id].add(start, end, assignment_id)
+    return intervals
+
+
+def find_assignment_conflicts(items):
+    """Check many new or changed assignment periods for overlaps in one pass.
+
+    items: iterable of dicts with unit_id, start_date and optional end_date
+    (dd/mm/yyyy, as for create_assignment) and an optional assignment_id when the
+    item replaces the dates of an existing assignment (update or renewal).
+    Each item is checked against the existing assignments of its unit and against
+    the earlier items that had no conflict.
+    Returns a list of {'index', 'unit_id', 'assignment_ids', 'item_indexes'}, one per
+    conflicting item, naming everything it overlaps; empty when all items fit.
+    Raises ValueError for an item with missing or malformed dates.
+    """
+    parsed = []
+    for index, item in enumerate(items):
+        try:
+            start = _parse_date(item['start_date']).isoformat()
+            end = _parse_date(item['end_date']).isoformat() if item.get('end_date') else None
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"item {index}: start_date and end_date must be in dd/mm/yyyy format")
+        if end is not None and end < start:
+            raise ValueError(f"item {index}: end_date cannot be before start_date")
+        parsed.append((index, item['unit_id'], start, end, item.get('assignment_id')))
+
+    conn = get_connection()
+    try:
+        intervals = load_unit_intervals(conn, {p[1] for p in parsed})
+    finally:
+        conn.close()
+    # ranges of the assignments being changed, put back if their change conflicts
+    replaced = {}
+    for _, unit_id, _, _, assignment_id in parsed:
+        if assignment_id is not None:
+            removed = intervals[unit_id].remove(assignment_id)
+            if removed is not None:
+                replaced[assignment_id] = removed
+
+    conflicts = []
+    for index, unit_id, start, end, assignment_id in parsed:
+        hits = intervals[unit_id].overlapping(start, end)
+        if hits:
+            conflicts.append({
+                'index': index,
+                'unit_id': unit_id,
+                'assignment_ids': [h[2] for h in hits if h[3] is None],
+                'item_indexes': [h[3] for h in hits if h[3] is not None],
+            })
+            if assignment_id in replaced:
+                # the assignment keeps its old dates, which later items must not overlap
+                old_start, old_end, _, _ = replaced.pop(assignment_id)
+                intervals[unit_id].add(old_start, old_end, assignment_id)
+        else:
+            intervals[unit_id].add(start, end, assignment_id, index)
+    return conflicts
+
 
 def create_assignment(unit_id, owner_id, client_id, share_percent, alternation_type='none', cycle_length=None, cycle_position=None, start_date=None, end_date=None, rent_amount=None, ras_ir=0):
     if rent_amount is None:
@@ -79,8 +213,7 @@ def create_assignment(unit_id, owner_id, client_id, share_percent, alternation_t
     if ras_ir not in (0, 1):
         raise ValueError("ras_ir must be 0 or 1")
 
-    conn = get_connection()
-    try:
+    with transaction(immediate=True) as conn:
         # Check FKs
         cur = conn.cursor()
         cur.execute("SELECT id FROM units WHERE id = ?", (unit_id,))
@@ -104,45 +237,68 @@ def create_assignment(unit_id, owner_id, client_id, share_percent, alternation_t
             """,
             (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_iso, end_iso, rent_amount, ras_ir),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def list_assignments():
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM assignments ORDER BY id")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM assignments ORDER BY id")
+        return cur.fetchall()
+    finally:
+        conn.close()
 
 
 def list_assignments_with_names():
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT a.id, a.unit_id, u.reference AS unit_reference, a.client_id, c.name AS client_name,
-               a.start_date, a.end_date, a.rent_amount, a.ras_ir
-        FROM assignments a
-        JOIN units u ON a.unit_id = u.id
-        JOIN clients c ON a.client_id = c.id
-        ORDER BY a.id
-        """
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT a.id, a.unit_id, u.reference AS unit_reference, a.client_id, c.name AS client_name,
+                   a.start_date, a.end_date, a.rent_amount, a.ras_ir
+            FROM assignments a
+            JOIN units u ON a.unit_id = u.id
+            JOIN clients c ON a.client_id = c.id
+            ORDER BY a.id
+            """
+        )
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+_ASSIGNMENT_SORTS = {'id': 'a.id', 'unit_id': 'a.unit_id'}
+
+
+def list_assignments_page(limit=50, after=None, sort='id', descending=False, unit_id=None, client_id=None, owner_id=None):
+    """Return (assignments, next_after) for one page, with unit reference and client name joined in.
+
+    Pass next_after back as after to get the following page; it is None on the last page.
+    """
+    if sort not in _ASSIGNMENT_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(_ASSIGNMENT_SORTS)}")
+    where, params = [], []
+    for column, value in (('a.unit_id', unit_id), ('a.client_id', client_id), ('a.owner_id', owner_id)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    return keyset_page(
+        """a.id, a.unit_id, u.reference AS unit_reference, a.owner_id, a.client_id, c.name AS client_name,
+           a.start_date, a.end_date, a.rent_amount, a.ras_ir""",
+        "assignments a JOIN units u ON a.unit_id = u.id JOIN clients c ON a.client_id = c.id",
+        where, params, _ASSIGNMENT_SORTS[sort], "a.id", limit, after, descending,
     )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
 
 
 def get_assignment(assignment_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM assignments WHERE id = ?", (assignment_id,))
-    r = cur.fetchone()
-    conn.close()
-    return r
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM assignments WHERE id = ?", (assignment_id,))
+        return cur.fetchone()
+    finally:
+        conn.close()
 
 
 def update_assignment(assignment_id, start_date=None, end_date=None, rent_amount=None, ras_ir=None):
@@ -154,8 +310,7 @@ def update_assignment(assignment_id, start_date=None, end_date=None, rent_amount
     if ras_ir is not None and ras_ir not in (0, 1):
         raise ValueError("ras_ir must be 0 or 1")
 
-    conn = get_connection()
-    try:
+    with transaction(immediate=True) as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM assignments WHERE id = ?", (assignment_id,))
         row = cur.fetchone()
@@ -195,19 +350,12 @@ def update_assignment(assignment_id, start_date=None, end_date=None, rent_amount
 
         params.append(assignment_id)
         cur.execute(f"UPDATE assignments SET {', '.join(fields)} WHERE id = ?", tuple(params))
-        conn.commit()
-        if cur.rowcount == 0:
-            raise ValueError(f"Assignment {assignment_id} not found")
-    finally:
-        conn.close()
+    if cur.rowcount == 0:
+        raise ValueError(f"Assignment {assignment_id} not found")
 
 
 def delete_assignment(assignment_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM assignments WHERE id = ?", (assignment_id,))
-    conn.commit()
+    with transaction() as conn:
+        cur = conn.execute("DELETE FROM assignments WHERE id = ?", (assignment_id,))
     if cur.rowcount == 0:
-        conn.close()
         raise ValueError(f"Assignment {assignment_id} not found")
-    conn.close()
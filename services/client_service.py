@@ -1,39 +1,38 @@
-from database import get_connection
+from database import get_connection, transaction
 
 
 def create_client(name, client_type, phone=None, legal_id=None):
     if client_type not in ("PP", "PM"):
         raise ValueError('client_type must be "PP" or "PM"')
 
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO clients (name, phone, legal_id, client_type)
-        VALUES (?, ?, ?, ?)
-        """,
-        (name, phone, legal_id, client_type),
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO clients (name, phone, legal_id, client_type)
+            VALUES (?, ?, ?, ?)
+            """,
+            (name, phone, legal_id, client_type),
+        )
 
 
 def list_clients():
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM clients ORDER BY id")
-    clients = cur.fetchall()
-    conn.close()
-    return clients
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM clients ORDER BY id")
+        return cur.fetchall()
+    finally:
+        conn.close()
 
 
 def get_client(client_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
-    client = cur.fetchone()
-    conn.close()
-    return client
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
+        return cur.fetchone()
+    finally:
+        conn.close()
 
 
 def update_client(client_id, name=None, client_type=None, phone=None, legal_id=None):
@@ -59,22 +58,14 @@ def update_client(client_id, name=None, client_type=None, phone=None, legal_id=N
         return
 
     params.append(client_id)
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(f"UPDATE clients SET {', '.join(fields)} WHERE id = ?", tuple(params))
-    conn.commit()
+    with transaction() as conn:
+        cur = conn.execute(f"UPDATE clients SET {', '.join(fields)} WHERE id = ?", tuple(params))
     if cur.rowcount == 0:
-        conn.close()
         raise ValueError(f"Client {client_id} not found")
-    conn.close()
 
 
 def delete_client(client_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM clients WHERE id = ?", (client_id,))
-    conn.commit()
+    with transaction() as conn:
+        cur = conn.execute("DELETE FROM clients WHERE id = ?", (client_id,))
     if cur.rowcount == 0:
-        conn.close()
         raise ValueError(f"Client {client_id} not found")
-    conn.close()
@@ -0,0 +1,119 @@
+import threading
+import weakref
+from datetime import date
+
+from database import get_connection
+from services.assignment_service import DATE_MAX
+
+# Results are cached per pooled connection and reused until the data changes. A change
+# is detected with PRAGMA data_version (commits made by other connections) plus the
+# connection's total_changes (its own writes). Both are only comparable on the
+# connection they were read from, so each connection has its own entries.
+_lock = threading.Lock()
+_cache = weakref.WeakKeyDictionary()
+_CACHE_MAX_ENTRIES = 64
+
+
+def _data_token(conn):
+    return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+
+def _cached(key, compute):
+    conn = get_connection()
+    try:
+        token = _data_token(conn)
+        with _lock:
+            entries = _cache.setdefault(conn, {})
+            hit = entries.get(key)
+        if hit is not None and hit[0] == token:
+            return hit[1]
+        value = compute(conn)
+        with _lock:
+            if len(entries) >= _CACHE_MAX_ENTRIES:
+                entries.clear()
+            entries[key] = (token, value)
+        return value
+    finally:
+        conn.close()
+
+
+def clear_dashboard_cache():
+    """Drop every cached dashboard figure (e.g. after replacing the database file)."""
+    with _lock:
+        _cache.clear()
+
+
+def get_counts(today=None):
+    """Return {'owners', 'units', 'clients', 'assignments', 'active_assignments'} counts.
+
+    active_assignments are those running on today (an ISO date, default: the current date).
+    """
+    today = today or date.today().isoformat()
+
+    def compute(conn):
+        row = conn.execute(
+            """
+            SELECT (SELECT COUNT(*) FROM owners),
+                   (SELECT COUNT(*) FROM units),
+                   (SELECT COUNT(*) FROM clients),
+                   (SELECT COUNT(*) FROM assignments),
+                   (SELECT COUNT(*) FROM assignments WHERE start_date <= ? AND COALESCE(end_date, ?) >= ?)
+            """,
+            (today, DATE_MAX, today),
+        ).fetchone()
+        return dict(zip(('owners', 'units', 'clients', 'assignments', 'active_assignments'), row))
+
+    return dict(_cached(('counts', today), compute))
+
+
+def get_recent_receipts(limit=5):
+    """Return the last `limit` receipt_log rows (newest first) with unit and owner names."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT rl.uid, rl.receipt_id, rl.assignment_id, u.reference AS unit_reference,
+                   rl.owner_id, ow.name AS owner_name, rl.period, rl.issue_date, rl.amount
+            FROM receipt_log rl
+            JOIN assignments a ON rl.assignment_id = a.id
+            JOIN units u ON a.unit_id = u.id
+            JOIN owners ow ON rl.owner_id = ow.id
+            ORDER BY rl.uid DESC
+            LIMIT ?
+            """,
+            (int(limit),),
+        )
+        return [dict(r) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def get_monthly_kpis(period):
+    """Return billed / received / outstanding totals and receipt count for one month.
+
+    period is the month's 'YYYY-MM-01' key as stored in receipt_log.period.
+    """
+    def compute(conn):
+        billed, count = conn.execute(
+            "SELECT COALESCE(SUM(amount), 0.0), COUNT(*) FROM receipt_log WHERE period = ?",
+            (period,),
+        ).fetchone()
+        received = conn.execute(
+            """
+            SELECT COALESCE(SUM(p.amount_received), 0.0)
+            FROM receipt_log rl
+            JOIN payments p ON p.receipt_log_uid = rl.uid
+            WHERE rl.period = ?
+            """,
+            (period,),
+        ).fetchone()[0]
+        return {
+            'period': period,
+            'receipts': count,
+            'billed': round(billed, 2),
+            'received': round(received, 2),
+            'outstanding': round(billed - received, 2),
+        }
+
+    return dict(_cached(('monthly_kpis', period), compute))
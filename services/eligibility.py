@@ -0,0 +1,141 @@
+try:
+    import numpy as np
+except ImportError:  # the pure-Python path gives the same results
+    np = None
+
+# Which months an assignment is billed in. An assignment is eligible in a month when
+#  - it is active: start_date <= the 1st of the month and (end_date is NULL or >= the 1st)
+#  - odd_even: cycle_position 1 only bills odd months, 2 only even months
+#  - cycle: billed for cycle_length months from its start month, then skipped for
+#    cycle_length months, and so on
+# Months are (year, month) pairs; assignments are rows or dicts with the assignments
+# table's start_date, end_date, alternation_type, cycle_length and cycle_position.
+
+# Rows evaluated per NumPy block, to bound the size of the temporaries
+_BLOCK_ROWS = 8192
+
+
+def month_index(year, month):
+    """Months since year 0, so consecutive months have consecutive indexes."""
+    return int(year) * 12 + int(month) - 1
+
+
+def month_parity(year, month):
+    """'odd' or 'even', the month parity ownerships alternate on."""
+    return "odd" if int(month) % 2 == 1 else "even"
+
+
+def _iso(date_str):
+    # rows written before dates were normalised may hold dd/mm/yyyy
+    if date_str and date_str[2:3] == '/':
+        return f"{date_str[6:10]}-{date_str[3:5]}-{date_str[:2]}"
+    return date_str
+
+
+def _rules(assignment):
+    """(first active month, last active month, start month, cycle_length or 0, odd_even position or 0)."""
+    start = _iso(assignment['start_date'])
+    start_month = month_index(start[:4], start[5:7])
+    # active from the month whose 1st is on/after start_date
+    first = start_month if start[8:10] == '01' else start_month + 1
+    end = _iso(assignment['end_date'])
+    last = month_index(end[:4], end[5:7]) if end else None
+    cycle_length = 0
+    position = 0
+    if assignment['alternation_type'] == 'cycle' and assignment['cycle_length']:
+        cycle_length = max(int(assignment['cycle_length']), 0)
+    elif assignment['alternation_type'] == 'odd_even' and assignment['cycle_position'] in (1, 2):
+        position = int(assignment['cycle_position'])
+    return first, last, start_month, cycle_length, position
+
+
+def is_eligible(assignment, year, month):
+    """True if the assignment is billed in the given month."""
+    first, last, start_month, cycle_length, position = _rules(assignment)
+    m = month_index(year, month)
+    return _eligible(first, last, start_month, cycle_length, position, m, month)
+
+
+def _eligible(first, last, start_month, cycle_length, position, m, month):
+    if m < first or (last is not None and m > last):
+        return False
+    if position and (month % 2 == 1) != (position == 1):
+        return False
+    if cycle_length and ((m - start_month) // cycle_length) % 2 != 0:
+        return False
+    return True
+
+
+def eligibility_matrix(assignments, months):
+    """Return a len(assignments) x len(months) boolean matrix: [i][j] is True when
+    assignment i is billed in months[j].
+
+    With NumPy installed this is a numpy.ndarray of bool computed in blocks of rows;
+    otherwise a list of lists of bool. Both index as matrix[i][j].
+    """
+    rules = [_rules(a) for a in assignments]
+    if np is not None:
+        return _numpy_matrix(rules, months)
+    indexes = [(month_index(y, m), int(m)) for y, m in months]
+    return [
+        [_eligible(first, last, start_month, cycle_length, position, m, month) for m, month in indexes]
+        for first, last, start_month, cycle_length, position in rules
+    ]
+
+
+def _numpy_matrix(rules, months):
+    m = np.array([month_index(y, mo) for y, mo in months], dtype=np.int64)
+    odd_month = np.array([int(mo) % 2 == 1 for _, mo in months], dtype=bool)
+    result = np.zeros((len(rules), len(months)), dtype=bool)
+    if not len(rules) or not len(months):
+        return result
+    no_end = np.iinfo(np.int64).max
+    for lo in range(0, len(rules), _BLOCK_ROWS):
+        block = rules[lo:lo + _BLOCK_ROWS]
+        first = np.array([r[0] for r in block], dtype=np.int64)[:, None]
+        last = np.array([no_end if r[1] is None else r[1] for r in block], dtype=np.int64)[:, None]
+        start = np.array([r[2] for r in block], dtype=np.int64)[:, None]
+        cycle_length = np.array([r[3] for r in block], dtype=np.int64)[:, None]
+        position = np.array([r[4] for r in block], dtype=np.int64)[:, None]
+
+        ok = (m >= first) & (m <= last)
+        ok &= (position == 0) | ((position == 1) == odd_month)
+        cycled = cycle_length > 0
+        phase = ((m - start) // np.where(cycled, cycle_length, 1)) % 2
+        ok &= ~cycled | (phase == 0)
+        result[lo:lo + len(block)] = ok
+    return result
+
+
+def eligible_by_month(assignments, months):
+    """Return, for each month in months, the list of indexes (into assignments) billed that month."""
+    matrix = eligibility_matrix(assignments, months)
+    if np is not None:
+        return [np.flatnonzero(matrix[:, j]).tolist() for j in range(len(months))]
+    return [[i for i, row in enumerate(matrix) if row[j]] for j in range(len(months))]
+
+
+def billed_by_month(assignments, months, amounts):
+    """Return (number billed, total amount) for each month in months, amounts[i] being assignment i's amount."""
+    if np is not None:
+        matrix = eligibility_matrix(assignments, months)
+        counts = matrix.sum(axis=0)
+        totals = np.asarray(amounts, dtype=np.float64) @ matrix
+        return list(zip(counts.tolist(), totals.tolist()))
+    return [(len(billed), sum(amounts[i] for i in billed)) for billed in eligible_by_month(assignments, months)]
+
+
+def billed_groups(assignments, months, groups):
+    """Return {group: [bool per month]}: whether any assignment of the group (groups[i] for assignment i) is billed."""
+    if np is not None:
+        if not len(assignments):
+            return {}
+        keys, inverse = np.unique(np.asarray(groups), return_inverse=True)
+        billed = np.zeros((len(keys), len(months)), dtype=bool)
+        np.logical_or.at(billed, inverse, eligibility_matrix(assignments, months))
+        return dict(zip(keys.tolist(), billed.tolist()))
+    billed = {group: [False] * len(months) for group in groups}
+    for j, indexes in enumerate(eligible_by_month(assignments, months)):
+        for i in indexes:
+            billed[groups[i]][j] = True
+    return billed
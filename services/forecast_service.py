@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from database import get_connection
+from instrumentation import instrumented
+from services.eligibility import billed_by_month, billed_groups
+from services.receipt_service import owner_amount
+
+
+def _months(start_month_str, end_month_str):
+    try:
+        start_dt = datetime.strptime(start_month_str, "%m/%Y")
+        end_dt = datetime.strptime(end_month_str, "%m/%Y")
+    except Exception:
+        raise ValueError("Months must be in mm/yyyy format")
+    if end_dt < start_dt:
+        raise ValueError("End month cannot be before start month")
+    months = []
+    year, month = start_dt.year, start_dt.month
+    while (year, month) <= (end_dt.year, end_dt.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _assignments_overlapping(cur, months):
+    first = f"{months[0][0]:04d}-{months[0][1]:02d}-01"
+    last = f"{months[-1][0]:04d}-{months[-1][1]:02d}-01"
+    cur.execute(
+        """
+        SELECT id, unit_id, share_percent, rent_amount, alternation_type, cycle_length, cycle_position, start_date, end_date
+        FROM assignments
+        WHERE start_date <= ? AND (end_date IS NULL OR end_date >= ?)
+        ORDER BY id
+        """,
+        (last, first),
+    )
+    return cur.fetchall()
+
+
+@instrumented
+def forecast_billing(start_month_str, end_month_str):
+    """Expected billing for each month from start to end (mm/yyyy, inclusive).
+
+    Uses the same eligibility rules and amounts as batch receipt generation.
+    Returns a list of {'period', 'assignments', 'amount'}, one per month.
+    """
+    months = _months(start_month_str, end_month_str)
+    conn = get_connection()
+    try:
+        assignments = _assignments_overlapping(conn.cursor(), months)
+    finally:
+        conn.close()
+
+    amounts = [owner_amount(a['rent_amount'], a['share_percent']) for a in assignments]
+    return [
+        {'period': f"{year:04d}-{month:02d}-01", 'assignments': count, 'amount': round(total, 2)}
+        for (year, month), (count, total) in zip(months, billed_by_month(assignments, months, amounts))
+    ]
+
+
+def vacancy_report(start_month_str, end_month_str):
+    """Units with months (from start to end, mm/yyyy) in which no assignment is billed.
+
+    A month counts as vacant when the unit has no active assignment or only ones
+    skipped that month by their odd_even/cycle alternation.
+    Returns a list of {'unit_id', 'reference', 'vacant_months': [period, ...]} ordered by unit id.
+    """
+    months = _months(start_month_str, end_month_str)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        assignments = _assignments_overlapping(cur, months)
+        cur.execute("SELECT id, reference FROM units ORDER BY id")
+        units = cur.fetchall()
+    finally:
+        conn.close()
+
+    occupied = billed_groups(assignments, months, [a['unit_id'] for a in assignments])
+
+    report = []
+    for unit in units:
+        billed = occupied.get(unit['id'], [False] * len(months))
+        vacant = [f"{y:04d}-{m:02d}-01" for (y, m), b in zip(months, billed) if not b]
+        if vacant:
+            report.append({'unit_id': unit['id'], 'reference': unit['reference'], 'vacant_months': vacant})
+    return report
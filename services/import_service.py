@@ -0,0 +1,432 @@
+import csv
+import json
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+from database import transaction
+from instrumentation import instrumented
+from services.assignment_service import load_unit_intervals
+from services.ownership_service import VALID_ODD_EVEN, load_unit_totals, validate_ownership_totals
+from services.split_plan import invalidate_split_plans
+
+try:
+    import openpyxl
+except ImportError:  # XLSX import is optional
+    openpyxl = None
+
+# Bulk import of owners, clients, units, ownerships and assignments from CSV or XLSX.
+# Rows are validated like the create_* service functions, IMPORT_CHUNK_SIZE at a time:
+# the ids a chunk references are checked with one query per table, ownership totals
+# and assignment date ranges are kept in memory per unit, and the valid rows of a
+# chunk are inserted with executemany in one transaction. Invalid rows are reported
+# (and optionally written to a rejects CSV) instead of stopping the import; when the
+# database refuses a chunk's insert, the whole chunk is rejected and the in-memory
+# state it changed is restored, so later chunks are checked only against rows written.
+IMPORT_CHUNK_SIZE = 1000
+
+# Columns read for each kind, in rejects-file order. owners, clients and units accept
+# an optional id so that later files (ownerships, assignments) can refer to them.
+IMPORT_COLUMNS = {
+    'owners': ('id', 'name', 'phone', 'legal_id', 'family_count'),
+    'clients': ('id', 'name', 'client_type', 'phone', 'legal_id'),
+    'units': ('id', 'reference', 'city', 'neighborhood', 'floor', 'unit_type'),
+    'ownerships': ('unit_id', 'owner_id', 'share_percent', 'alternate', 'odd_even'),
+    'assignments': (
+        'unit_id', 'owner_id', 'client_id', 'share_percent', 'alternation_type', 'cycle_length',
+        'cycle_position', 'start_date', 'end_date', 'rent_amount', 'ras_ir',
+    ),
+}
+IMPORT_KINDS = tuple(IMPORT_COLUMNS)
+
+_INSERT_SQL = {
+    'owners': "INSERT INTO owners (id, name, phone, legal_id, family_count) VALUES (?, ?, ?, ?, ?)",
+    'clients': "INSERT INTO clients (id, name, client_type, phone, legal_id) VALUES (?, ?, ?, ?, ?)",
+    'units': "INSERT INTO units (id, reference, city, neighborhood, floor, unit_type) VALUES (?, ?, ?, ?, ?, ?)",
+    'ownerships': "INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate, odd_even) VALUES (?, ?, ?, ?, ?)",
+    'assignments': """
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+
+@instrumented
+def import_file(kind, path, rejects_path=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import one kind of record from a .csv or .xlsx file with a header row.
+
+    Rejected rows are numbered by their line (CSV) or row (XLSX) in the file.
+    See import_rows for the return value.
+    """
+    return _import(kind, iter_file_rows(path), rejects_path, chunk_size)
+
+
+def import_rows(kind, rows, rejects_path=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import an iterable of dicts (column -> value) as records of kind.
+
+    Values may be strings as read from a file; empty strings count as missing.
+    If rejects_path is given, rejected rows are written there as CSV with their
+    line number and error. Returns {'imported': int, 'rejected': [(line, message)]},
+    where rows are numbered from 1.
+    """
+    return _import(kind, enumerate(rows, start=1), rejects_path, chunk_size)
+
+
+def iter_file_rows(path):
+    """Yield (line number, dict) for each data row of a .csv or .xlsx file."""
+    path = Path(path)
+    if path.suffix.lower() == '.xlsx':
+        yield from _iter_xlsx_rows(path)
+        return
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        headers = [h.strip().lower() for h in next(reader, [])]
+        for values in reader:
+            if any(v.strip() for v in values):
+                yield reader.line_num, dict(zip(headers, values))
+
+
+def _iter_xlsx_rows(path):
+    if openpyxl is None:
+        raise ValueError("XLSX import needs the openpyxl package (pip install openpyxl); save the sheet as CSV instead")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [str(h).strip().lower() if h is not None else '' for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(v is not None and str(v).strip() for v in values):
+                yield line, dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def _import(kind, numbered_rows, rejects_path, chunk_size):
+    if kind not in IMPORT_COLUMNS:
+        raise ValueError(f"kind must be one of: {', '.join(IMPORT_KINDS)}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    state = _ImportState()
+    imported = 0
+    rejected = []
+    rejects_file = writer = None
+    try:
+        if rejects_path is not None:
+            rejects_file = open(rejects_path, 'w', newline='', encoding='utf-8')
+            writer = csv.writer(rejects_file)
+            writer.writerow(('line', 'error') + IMPORT_COLUMNS[kind])
+
+        chunk = []
+        for numbered in numbered_rows:
+            chunk.append(numbered)
+            if len(chunk) >= chunk_size:
+                imported += _import_chunk(kind, chunk, state, rejected, writer)
+                chunk = []
+        if chunk:
+            imported += _import_chunk(kind, chunk, state, rejected, writer)
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+
+    if kind == 'ownerships' and imported:
+        invalidate_split_plans()
+    return {'imported': imported, 'rejected': rejected}
+
+
+class _ImportState:
+    """What is known about the database while an import runs.
+
+    ids: table -> ids known to exist; totals: unit_id -> [non_alt, odd, even] ownership
+    percentages; intervals: unit_id -> UnitIntervals of its assignments.
+    """
+
+    def __init__(self):
+        self.ids = {'owners': set(), 'clients': set(), 'units': set()}
+        self.totals = {}
+        self.intervals = {}
+
+    def snapshot(self, kind, parsed):
+        """Save what checking the chunk's parsed rows can change, for restore()."""
+        if kind in self.ids:
+            return kind, {values[0] for values in parsed if values[0] is not None} - self.ids[kind]
+        units = {values[0] for values in parsed}
+        if kind == 'ownerships':
+            return kind, {u: list(self.totals[u]) for u in units if u in self.totals}
+        return kind, {u: self.intervals[u].copy() for u in units if u in self.intervals}
+
+    def restore(self, snapshot):
+        kind, saved = snapshot
+        if kind in self.ids:
+            self.ids[kind] -= saved
+        elif kind == 'ownerships':
+            self.totals.update(saved)
+        else:
+            self.intervals.update(saved)
+
+
+def _import_chunk(kind, chunk, state, rejected, writer):
+    parsed = []
+    chunk_rejects = []
+    for line, row in chunk:
+        row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+        try:
+            parsed.append((line, row, _PARSERS[kind](row)))
+        except ValueError as e:
+            chunk_rejects.append((line, row, str(e)))
+
+    saved = None
+    accepted = []
+    try:
+        with transaction(immediate=True) as conn:
+            cur = conn.cursor()
+            _preload(cur, kind, [values for _, _, values in parsed], state)
+            saved = state.snapshot(kind, [values for _, _, values in parsed])
+            insert = []
+            for line, row, values in parsed:
+                try:
+                    _CHECKS[kind](values, state)
+                except ValueError as e:
+                    chunk_rejects.append((line, row, str(e)))
+                    continue
+                insert.append(values)
+                accepted.append((line, row))
+            if kind in ('owners', 'clients', 'units'):
+                # explicit ids first, so AUTOINCREMENT cannot hand one of them to an earlier row
+                insert.sort(key=lambda values: values[0] is None)
+            cur.executemany(_INSERT_SQL[kind], insert)
+    except sqlite3.IntegrityError as e:
+        # the transaction rolled back: none of the accepted rows were written
+        if saved is not None:
+            state.restore(saved)
+        chunk_rejects.extend((line, row, f"Insert failed: {e}") for line, row in accepted)
+        insert = []
+    except BaseException:
+        if saved is not None:
+            state.restore(saved)
+        raise
+
+    keys = IMPORT_COLUMNS[kind]
+    for line, row, message in sorted(chunk_rejects, key=lambda r: r[0]):
+        rejected.append((line, message))
+        if writer is not None:
+            writer.writerow([line, message] + ['' if row.get(k) is None else row.get(k) for k in keys])
+    return len(insert)
+
+
+def _preload(cur, kind, parsed, state):
+    """Load what the chunk's rows refer to and is not known yet: ids, ownership totals, assignment dates."""
+    refs = {'units': set(), 'owners': set(), 'clients': set()}
+    if kind in ('owners', 'clients', 'units'):
+        refs[kind].update(values[0] for values in parsed if values[0] is not None)
+    else:
+        refs['units'].update(values[0] for values in parsed)
+        refs['owners'].update(values[1] for values in parsed)
+        if kind == 'assignments':
+            refs['clients'].update(values[2] for values in parsed)
+    for table, wanted in refs.items():
+        wanted -= state.ids[table]
+        if wanted:
+            cur.execute(f"SELECT id FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(sorted(wanted)),))
+            state.ids[table].update(r[0] for r in cur.fetchall())
+
+    if kind not in ('ownerships', 'assignments'):
+        return
+    per_unit = state.totals if kind == 'ownerships' else state.intervals
+    new_units = {values[0] for values in parsed} & state.ids['units'] - set(per_unit)
+    if not new_units:
+        return
+    load = load_unit_totals if kind == 'ownerships' else load_unit_intervals
+    per_unit.update(load(cur.connection, new_units))
+
+
+# Row parsing: turn raw values into the tuple inserted, raising ValueError like create_*
+
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _number(row, key, convert, required=False, default=None):
+    value = row.get(key)
+    if value is None or str(value).strip() == '':
+        if required:
+            raise ValueError(f"{key} is required")
+        return default
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{key} must be a number")
+    if convert is int:
+        if not number.is_integer():
+            raise ValueError(f"{key} must be a whole number")
+        return int(number)
+    return number
+
+
+def _date(row, key, required=False):
+    value = row.get(key)
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    value = _text(row, key)
+    if value is None:
+        if required:
+            raise ValueError(f"{key} is required")
+        return None
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date().isoformat()
+    except ValueError:
+        raise ValueError(f"{key} must be in dd/mm/yyyy format")
+
+
+def _parse_owner(row):
+    name = _text(row, 'name')
+    if name is None:
+        raise ValueError("name is required")
+    family_count = _number(row, 'family_count', int, default=0)
+    if family_count < 0:
+        raise ValueError("family_count cannot be negative")
+    return (_number(row, 'id', int), name, _text(row, 'phone'), _text(row, 'legal_id'), family_count)
+
+
+def _parse_client(row):
+    name = _text(row, 'name')
+    if name is None:
+        raise ValueError("name is required")
+    client_type = _text(row, 'client_type')
+    if client_type not in ("PP", "PM"):
+        raise ValueError('client_type must be "PP" or "PM"')
+    return (_number(row, 'id', int), name, client_type, _text(row, 'phone'), _text(row, 'legal_id'))
+
+
+def _parse_unit(row):
+    reference = _text(row, 'reference')
+    if reference is None:
+        raise ValueError("reference is required")
+    unit_type = _text(row, 'unit_type')
+    if unit_type is not None and unit_type not in ("apt", "store", "building"):
+        raise ValueError("unit_type must be one of: apt, store, building")
+    return (
+        _number(row, 'id', int), reference, _text(row, 'city'), _text(row, 'neighborhood'),
+        _number(row, 'floor', int), unit_type,
+    )
+
+
+def _parse_ownership(row):
+    unit_id = _number(row, 'unit_id', int, required=True)
+    owner_id = _number(row, 'owner_id', int, required=True)
+    share_percent = _number(row, 'share_percent', float, required=True)
+    alternate = _number(row, 'alternate', int, default=0)
+    odd_even = _text(row, 'odd_even')
+    if share_percent <= 0 or share_percent > 100:
+        raise ValueError("share_percent must be > 0 and <= 100")
+    if alternate not in (0, 1):
+        raise ValueError("alternate must be 0 or 1")
+    if alternate == 1 and odd_even not in VALID_ODD_EVEN:
+        raise ValueError("When alternate=1, odd_even must be 'odd' or 'even'")
+    if alternate == 0 and odd_even is not None:
+        raise ValueError("When alternate=0, odd_even must be None")
+    return (unit_id, owner_id, share_percent, alternate, odd_even)
+
+
+def _parse_assignment(row):
+    unit_id = _number(row, 'unit_id', int, required=True)
+    owner_id = _number(row, 'owner_id', int, required=True)
+    client_id = _number(row, 'client_id', int, required=True)
+    share_percent = _number(row, 'share_percent', float, required=True)
+    rent_amount = _number(row, 'rent_amount', float, required=True)
+    alternation_type = _text(row, 'alternation_type') or 'none'
+    if alternation_type not in ('none', 'odd_even', 'cycle'):
+        raise ValueError("alternation_type must be one of 'none', 'odd_even', 'cycle'")
+    start_iso = _date(row, 'start_date', required=True)
+    end_iso = _date(row, 'end_date')
+    if end_iso is not None and end_iso < start_iso:
+        raise ValueError("end_date cannot be before start_date")
+    ras_ir = _number(row, 'ras_ir', int, default=0)
+    if ras_ir not in (0, 1):
+        raise ValueError("ras_ir must be 0 or 1")
+    return (
+        unit_id, owner_id, client_id, share_percent, alternation_type,
+        _number(row, 'cycle_length', int), _number(row, 'cycle_position', int),
+        start_iso, end_iso, rent_amount, ras_ir,
+    )
+
+
+_PARSERS = {
+    'owners': _parse_owner,
+    'clients': _parse_client,
+    'units': _parse_unit,
+    'ownerships': _parse_ownership,
+    'assignments': _parse_assignment,
+}
+
+
+# Checks against the database (via the preloaded state); accepted rows update the state
+
+def _check_new_id(table, label):
+    def check(values, state):
+        record_id = values[0]
+        if record_id is None:
+            return
+        if record_id in state.ids[table]:
+            raise ValueError(f"{label} {record_id} already exists")
+        state.ids[table].add(record_id)
+    return check
+
+
+def _check_ownership(values, state):
+    unit_id, owner_id, share_percent, alternate, odd_even = values
+    if unit_id not in state.ids['units']:
+        raise ValueError(f"Unit {unit_id} not found")
+    if owner_id not in state.ids['owners']:
+        raise ValueError(f"Owner {owner_id} not found")
+    non_alt, odd, even = state.totals[unit_id]
+    if alternate == 0:
+        non_alt += share_percent
+    elif odd_even == 'odd':
+        odd += share_percent
+    else:
+        even += share_percent
+    validate_ownership_totals(non_alt, odd, even, non_alt + odd, non_alt + even)
+    state.totals[unit_id] = [non_alt, odd, even]
+
+
+def _check_assignment(values, state):
+    unit_id, owner_id, client_id = values[:3]
+    start, end = values[7], values[8]
+    if unit_id not in state.ids['units']:
+        raise ValueError(f"Unit {unit_id} not found")
+    if owner_id not in state.ids['owners']:
+        raise ValueError(f"Owner {owner_id} not found")
+    if client_id not in state.ids['clients']:
+        raise ValueError(f"Client {client_id} not found")
+    intervals = state.intervals[unit_id]
+    if intervals.overlapping(start, end):
+        raise ValueError("Assignment overlaps with an existing assignment for this unit")
+    intervals.add(start, end)
+
+
+_CHECKS = {
+    'owners': _check_new_id('owners', 'Owner'),
+    'clients': _check_new_id('clients', 'Client'),
+    'units': _check_new_id('units', 'Unit'),
+    'ownerships': _check_ownership,
+    'assignments': _check_assignment,
+}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) not in (3, 4) or sys.argv[1] not in IMPORT_KINDS:
+        print(f"Usage: python -m services.import_service [{'|'.join(IMPORT_KINDS)}] FILE.csv|FILE.xlsx [REJECTS.csv]")
+        sys.exit(2)
+    result = import_file(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else None)
+    print(f"Imported {result['imported']} {sys.argv[1]}, rejected {len(result['rejected'])}.")
+    for line, message in result['rejected'][:20]:
+        print(f"  line {line}: {message}")
+    sys.exit(1 if result['rejected'] else 0)
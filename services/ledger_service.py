@@ -0,0 +1,94 @@
+from database import get_connection, transaction
+
+# Totals recomputed from the raw receipt_log / payments rows, in the ledger's shape
+_LEDGER_FROM_RAW_SQL = """
+    SELECT owner_id, year, SUM(billed) AS billed, SUM(received) AS received, SUM(receipts) AS receipts
+    FROM (
+        SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER) AS year, amount AS billed, 0.0 AS received, 1 AS receipts
+        FROM receipt_log
+        UNION ALL
+        SELECT rl.owner_id, CAST(substr(rl.period, 1, 4) AS INTEGER), 0.0, p.amount_received, 0
+        FROM payments p JOIN receipt_log rl ON rl.uid = p.receipt_log_uid
+    )
+    GROUP BY owner_id, year
+"""
+
+# Incremental sums of REAL amounts may drift from a fresh SUM by float noise
+_TOLERANCE = 0.005
+
+
+def get_owner_year_totals(owner_id, year):
+    """Return {'billed', 'received', 'receipts'} for an owner and year from owner_year_ledger."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT billed, received, receipts FROM owner_year_ledger WHERE owner_id = ? AND year = ?",
+            (owner_id, int(year)),
+        )
+        row = cur.fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return {'billed': 0.0, 'received': 0.0, 'receipts': 0}
+    return {'billed': round(row[0], 2), 'received': round(row[1], 2), 'receipts': row[2]}
+
+
+def verify_owner_year_ledger():
+    """Compare owner_year_ledger with totals recomputed from receipt_log and payments.
+
+    Returns a list of {'owner_id', 'year', 'ledger': (billed, received, receipts) or None,
+    'actual': (...) or None} for every row that differs; empty when the ledger is correct.
+    Ledger rows with all-zero totals count as absent.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_LEDGER_FROM_RAW_SQL)
+        actual = {(r[0], r[1]): (r[2], r[3], r[4]) for r in cur.fetchall()}
+        cur.execute("SELECT owner_id, year, billed, received, receipts FROM owner_year_ledger")
+        ledger = {(r[0], r[1]): (r[2], r[3], r[4]) for r in cur.fetchall()}
+    finally:
+        conn.close()
+
+    mismatches = []
+    for key in sorted(set(actual) | set(ledger)):
+        have, want = ledger.get(key), actual.get(key)
+        if _same_totals(have, want):
+            continue
+        mismatches.append({'owner_id': key[0], 'year': key[1], 'ledger': have, 'actual': want})
+    return mismatches
+
+
+def _same_totals(a, b):
+    a = a or (0.0, 0.0, 0)
+    b = b or (0.0, 0.0, 0)
+    return abs(a[0] - b[0]) < _TOLERANCE and abs(a[1] - b[1]) < _TOLERANCE and a[2] == b[2]
+
+
+def rebuild_owner_year_ledger():
+    """Recompute owner_year_ledger from receipt_log and payments. Returns the number of rows written."""
+    with transaction(immediate=True) as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM owner_year_ledger")
+        cur.execute(
+            f"INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts) {_LEDGER_FROM_RAW_SQL}"
+        )
+        return cur.rowcount
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command == "rebuild":
+        print(f"Rebuilt owner_year_ledger: {rebuild_owner_year_ledger()} rows.")
+    elif command == "verify":
+        problems = verify_owner_year_ledger()
+        for p in problems:
+            print(f"Owner {p['owner_id']} year {p['year']}: ledger {p['ledger']} != actual {p['actual']}")
+        print("owner_year_ledger is consistent." if not problems else f"{len(problems)} mismatched rows; run with 'rebuild'.")
+        sys.exit(1 if problems else 0)
+    else:
+        print("Usage: python -m services.ledger_service [verify|rebuild]")
+        sys.exit(2)
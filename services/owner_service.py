@@ -1,25 +1,20 @@
-from database import get_connection
+from database import get_connection, transaction
 
 
 def create_owner(name, phone=None, legal_id=None, family_count=0):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT INTO owners (name, phone, legal_id, family_count)
-        VALUES (?, ?, ?, ?)
-    """, (name, phone, legal_id, family_count))
-
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("""
+            INSERT INTO owners (name, phone, legal_id, family_count)
+            VALUES (?, ?, ?, ?)
+        """, (name, phone, legal_id, family_count))
 
 
 def list_owners():
     conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT * FROM owners ORDER BY id")
-    owners = cur.fetchall()
+    try:
+        cur = conn.cursor()
 
-    conn.close()
-    return owners
\ No newline at end of file
+        cur.execute("SELECT * FROM owners ORDER BY id")
+        return cur.fetchall()
+    finally:
+        conn.close()
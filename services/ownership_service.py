@@ -1,4 +1,7 @@
-from database import get_connection
+import json
+
+from database import get_connection, transaction
+from services.split_plan import invalidate_split_plans
 
 
 VALID_ODD_EVEN = ("odd", "even")
@@ -37,8 +40,27 @@ def _get_totals_for_unit(conn, unit_id, exclude_id=None):
     return non_alt, odd, even, odd_total, even_total
 
 
-def _validate_totals(non_alt, odd, even, odd_total, even_total):
-    # Each period must have >0 and <=100
+def load_unit_totals(conn, unit_ids):
+    """Return {unit_id: [non_alt, odd, even]} ownership percentages for the given units, in one query."""
+    totals = {unit_id: [0.0, 0.0, 0.0] for unit_id in unit_ids}
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT unit_id, share_percent, alternate, odd_even FROM ownerships WHERE unit_id IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted(totals)),),
+    )
+    for unit_id, share, alternate, odd_even in cur.fetchall():
+        unit_totals = totals[unit_id]
+        if alternate == 0:
+            unit_totals[0] += float(share)
+        elif odd_even == 'odd':
+            unit_totals[1] += float(share)
+        elif odd_even == 'even':
+            unit_totals[2] += float(share)
+    return totals
+
+
+def validate_ownership_totals(non_alt, odd, even, odd_total, even_total):
+    """Raise ValueError unless the odd- and even-month ownership totals are both > 0 and <= 100."""
     if odd_total <= 0:
         raise ValueError("Odd-month ownership total must be greater than 0%")
     if even_total <= 0:
@@ -59,8 +81,7 @@ def create_ownership(unit_id, owner_id, share_percent, alternate=0, odd_even=Non
     if alternate == 0 and odd_even is not None:
         raise ValueError("When alternate=0, odd_even must be None")
 
-    conn = get_connection()
-    try:
+    with transaction(immediate=True) as conn:
         _ensure_unit_and_owner_exist(conn, unit_id, owner_id)
         non_alt, odd, even, odd_total, even_total = _get_totals_for_unit(conn, unit_id)
 
@@ -75,69 +96,70 @@ def create_ownership(unit_id, owner_id, share_percent, alternate=0, odd_even=Non
         odd_total = non_alt + odd
         even_total = non_alt + even
 
-        _validate_totals(non_alt, odd, even, odd_total, even_total)
+        validate_ownership_totals(non_alt, odd, even, odd_total, even_total)
 
         cur = conn.cursor()
         cur.execute(
             "INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate, odd_even) VALUES (?, ?, ?, ?, ?)",
             (unit_id, owner_id, share_percent, alternate, odd_even),
         )
-        conn.commit()
-    finally:
-        conn.close()
+    invalidate_split_plans(unit_id)
 
 
 def list_ownerships(unit_id=None):
     conn = get_connection()
-    cur = conn.cursor()
-    if unit_id:
-        cur.execute("SELECT * FROM ownerships WHERE unit_id = ? ORDER BY id", (unit_id,))
-    else:
-        cur.execute("SELECT * FROM ownerships ORDER BY id")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    try:
+        cur = conn.cursor()
+        if unit_id:
+            cur.execute("SELECT * FROM ownerships WHERE unit_id = ? ORDER BY id", (unit_id,))
+        else:
+            cur.execute("SELECT * FROM ownerships ORDER BY id")
+        return cur.fetchall()
+    finally:
+        conn.close()
 
 
 def list_ownerships_with_names(unit_id=None):
     conn = get_connection()
-    cur = conn.cursor()
-    if unit_id:
-        cur.execute(
-            """
-            SELECT o.id, o.unit_id, u.reference AS unit_reference, o.owner_id, ow.name AS owner_name,
-                   o.share_percent, o.alternate, o.odd_even
-            FROM ownerships o
-            JOIN units u ON o.unit_id = u.id
-            JOIN owners ow ON o.owner_id = ow.id
-            WHERE o.unit_id = ?
-            ORDER BY o.id
-            """,
-            (unit_id,),
-        )
-    else:
-        cur.execute(
-            """
-            SELECT o.id, o.unit_id, u.reference AS unit_reference, o.owner_id, ow.name AS owner_name,
-                   o.share_percent, o.alternate, o.odd_even
-            FROM ownerships o
-            JOIN units u ON o.unit_id = u.id
-            JOIN owners ow ON o.owner_id = ow.id
-            ORDER BY o.id
-            """
-        )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    try:
+        cur = conn.cursor()
+        if unit_id:
+            cur.execute(
+                """
+                SELECT o.id, o.unit_id, u.reference AS unit_reference, o.owner_id, ow.name AS owner_name,
+                       o.share_percent, o.alternate, o.odd_even
+                FROM ownerships o
+                JOIN units u ON o.unit_id = u.id
+                JOIN owners ow ON o.owner_id = ow.id
+                WHERE o.unit_id = ?
+                ORDER BY o.id
+                """,
+                (unit_id,),
+            )
+        else:
+            cur.execute(
+                """
+                SELECT o.id, o.unit_id, u.reference AS unit_reference, o.owner_id, ow.name AS owner_name,
+                       o.share_percent, o.alternate, o.odd_even
+                FROM ownerships o
+                JOIN units u ON o.unit_id = u.id
+                JOIN owners ow ON o.owner_id = ow.id
+                ORDER BY o.id
+                """
+            )
+        return cur.fetchall()
+    finally:
+        conn.close()
 
 
 def get_ownership(ownership_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM ownerships WHERE id = ?", (ownership_id,))
-    r = cur.fetchone()
-    conn.close()
-    return r
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM ownerships WHERE id = ?", (ownership_id,))
+        return cur.fetchone()
+    finally:
+        conn.close()
 
 
 def update_ownership(ownership_id, share_percent=None, alternate=None, odd_even=None):
@@ -150,8 +172,7 @@ def update_ownership(ownership_id, share_percent=None, alternate=None, odd_even=
     if alternate == 0 and odd_even is not None:
         raise ValueError("When alternate=0, odd_even must be None")
 
-    conn = get_connection()
-    try:
+    with transaction(immediate=True) as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM ownerships WHERE id = ?", (ownership_id,))
         row = cur.fetchone()
@@ -176,7 +197,7 @@ def update_ownership(ownership_id, share_percent=None, alternate=None, odd_even=
         odd_total = non_alt + odd
         even_total = non_alt + even
 
-        _validate_totals(non_alt, odd, even, odd_total, even_total)
+        validate_ownership_totals(non_alt, odd, even, odd_total, even_total)
 
         fields = []
         params = []
@@ -196,16 +217,13 @@ def update_ownership(ownership_id, share_percent=None, alternate=None, odd_even=
 
         params.append(ownership_id)
         cur.execute(f"UPDATE ownerships SET {', '.join(fields)} WHERE id = ?", tuple(params))
-        conn.commit()
-        if cur.rowcount == 0:
-            raise ValueError(f"Ownership {ownership_id} not found")
-    finally:
-        conn.close()
+    invalidate_split_plans(unit_id)
+    if cur.rowcount == 0:
+        raise ValueError(f"Ownership {ownership_id} not found")
 
 
 def delete_ownership(ownership_id):
-    conn = get_connection()
-    try:
+    with transaction(immediate=True) as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM ownerships WHERE id = ?", (ownership_id,))
         row = cur.fetchone()
@@ -224,9 +242,7 @@ def delete_ownership(ownership_id):
             # deleting the last or only ownership is allowed
             pass
         else:
-            _validate_totals(non_alt, odd, even, odd_total, even_total)
+            validate_ownership_totals(non_alt, odd, even, odd_total, even_total)
 
         cur.execute("DELETE FROM ownerships WHERE id = ?", (ownership_id,))
-        conn.commit()
-    finally:
-        conn.close()
\ No newline at end of file
+    invalidate_split_plans(unit_id)
\ No newline at end of file
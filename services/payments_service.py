@@ -1,48 +1,80 @@
-from database import get_connection
+import json
+
+from database import get_connection, transaction
 from datetime import datetime
+from utils.dates import year_bounds
 
 
 def create_payment(receipt_log_uid, amount_received, received_at=None, note=None):
     if received_at is None:
         received_at = datetime.utcnow().strftime("%Y-%m-%d")
 
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO payments (receipt_log_uid, amount_received, received_at, note) VALUES (?, ?, ?, ?)",
-        (receipt_log_uid, amount_received, received_at, note),
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO payments (receipt_log_uid, amount_received, received_at, note) VALUES (?, ?, ?, ?)",
+            (receipt_log_uid, amount_received, received_at, note),
+        )
+
+
+def create_payments_bulk(payments):
+    """Record many payments in one transaction.
+
+    payments: iterable of (receipt_log_uid, amount_received, received_at, note) tuples;
+    received_at None means today. Raises ValueError (and writes nothing) if any uid is
+    unknown or any amount is not positive. Returns the number of payments recorded.
+    """
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    rows = [(uid, amount, received_at or today, note) for uid, amount, received_at, note in payments]
+    if not rows:
+        return 0
+    bad_amounts = [uid for uid, amount, _, _ in rows if amount is None or float(amount) <= 0]
+    if bad_amounts:
+        raise ValueError(f"amount_received must be positive (receipt log uid {bad_amounts[0]})")
+
+    with transaction(immediate=True) as conn:
+        cur = conn.cursor()
+        uids = sorted({row[0] for row in rows})
+        cur.execute("SELECT uid FROM receipt_log WHERE uid IN (SELECT value FROM json_each(?))", (json.dumps(uids),))
+        missing = set(uids) - {r[0] for r in cur.fetchall()}
+        if missing:
+            raise ValueError(f"Receipt log uid(s) not found: {', '.join(str(u) for u in sorted(missing))}")
+        cur.executemany(
+            "INSERT INTO payments (receipt_log_uid, amount_received, received_at, note) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
 
 
 def get_payments_for_owner_year(owner_id, year):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT p.* FROM payments p
-        JOIN receipt_log rl ON p.receipt_log_uid = rl.uid
-        WHERE rl.owner_id = ? AND substr(rl.period,1,4) = ?
-        """,
-        (owner_id, str(year)),
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT p.* FROM payments p
+            JOIN receipt_log rl ON p.receipt_log_uid = rl.uid
+            WHERE rl.owner_id = ? AND rl.period >= ? AND rl.period < ?
+            """,
+            (owner_id, *year_bounds(year)),
+        )
+        return cur.fetchall()
+    finally:
+        conn.close()
 
 
 def sum_received_for_owner_year(owner_id, year):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT COALESCE(SUM(p.amount_received), 0.0) FROM payments p
-        JOIN receipt_log rl ON p.receipt_log_uid = rl.uid
-        WHERE rl.owner_id = ? AND substr(rl.period,1,4) = ?
-        """,
-        (owner_id, str(year)),
-    )
-    s = cur.fetchone()[0] or 0.0
-    conn.close()
-    return float(s)
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT COALESCE(SUM(p.amount_received), 0.0) FROM payments p
+            JOIN receipt_log rl ON p.receipt_log_uid = rl.uid
+            WHERE rl.owner_id = ? AND rl.period >= ? AND rl.period < ?
+            """,
+            (owner_id, *year_bounds(year)),
+        )
+        s = cur.fetchone()[0] or 0.0
+        return float(s)
+    finally:
+        conn.close()
@@ -0,0 +1,119 @@
+import json
+
+import config
+
+# Receipt numbers come from counters in receipt_sequences, one row per scope:
+#  - 'per_assignment': 'assignment:<id>', one number per receipt of an assignment
+#  - 'per_owner_year': 'owner:<id>:<year>', one number per receipt_log row of an owner
+#  - 'global': 'global', one number per receipt
+# A scope's counter is seeded from MAX(receipt_no) of its existing rows the first
+# time it is used. The scheme the counters were kept for is recorded as a
+# 'scheme:<name>' row; when a reservation uses another scheme every counter is
+# dropped, so after switching schemes (even back to an earlier one) each scope is
+# reseeded from the numbers actually issued and numbers keep increasing.
+SCHEMES = ('per_assignment', 'per_owner_year', 'global')
+
+
+def numbering_scheme():
+    """Return the configured scheme (config.RECEIPT_NUMBERING), validated."""
+    scheme = getattr(config, 'RECEIPT_NUMBERING', 'per_assignment')
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown receipt numbering scheme {scheme!r}; expected one of {', '.join(SCHEMES)}")
+    return scheme
+
+
+def scope_key(scheme, assignment_id, owner_id, period):
+    """Return the receipt_sequences scope a receipt_log row is numbered in."""
+    if scheme == 'per_assignment':
+        return f"assignment:{assignment_id}"
+    if scheme == 'per_owner_year':
+        return f"owner:{owner_id}:{str(period)[:4]}"
+    return "global"
+
+
+def reserve_receipt_numbers(cur, counts, scheme=None):
+    """Reserve counts[scope] consecutive numbers in each scope; returns {scope: first number}.
+
+    Must run inside a write transaction (BEGIN IMMEDIATE, or after a write on the
+    connection): each counter is bumped with a single UPDATE ... RETURNING, so
+    concurrent generators never hand out the same number. scheme is the one the
+    scopes were built with (default: the configured scheme).
+    """
+    _use_scheme(cur, scheme or numbering_scheme())
+    first = {}
+    missing = {}
+    for scope, n in counts.items():
+        if n <= 0:
+            continue
+        row = cur.execute(
+            "UPDATE receipt_sequences SET last_no = last_no + ? WHERE scope = ? RETURNING last_no",
+            (n, scope),
+        ).fetchone()
+        if row is None:
+            missing[scope] = n
+        else:
+            first[scope] = row[0] - n + 1
+    if missing:
+        seeds = _seed_values(cur, list(missing))
+        cur.executemany(
+            "INSERT INTO receipt_sequences (scope, last_no) VALUES (?, ?)",
+            [(scope, seeds.get(scope, 0) + n) for scope, n in missing.items()],
+        )
+        for scope in missing:
+            first[scope] = seeds.get(scope, 0) + 1
+    return first
+
+
+def _use_scheme(cur, scheme):
+    """Drop every counter if they were kept for another scheme (or none is recorded)."""
+    marker = f"scheme:{scheme}"
+    row = cur.execute(
+        "SELECT scope FROM receipt_sequences WHERE scope >= 'scheme:' AND scope < 'scheme;'"
+    ).fetchone()
+    if row is not None and row[0] == marker:
+        return
+    cur.execute("DELETE FROM receipt_sequences")
+    cur.execute("INSERT INTO receipt_sequences (scope, last_no) VALUES (?, 0)", (marker,))
+
+
+def number_rows(cur, log_rows, scheme=None):
+    """Fill in receipt_no (index 3) of generated rows, one receipt per row; returns new tuples.
+
+    Rows are (assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount)
+    and are numbered in list order within their scope.
+    """
+    scheme = scheme or numbering_scheme()
+    scopes = [scope_key(scheme, row[0], row[1], row[4]) for row in log_rows]
+    counts = {}
+    for scope in scopes:
+        counts[scope] = counts.get(scope, 0) + 1
+    next_no = reserve_receipt_numbers(cur, counts, scheme)
+    numbered = []
+    for scope, row in zip(scopes, log_rows):
+        numbered.append(tuple(row[:3]) + (next_no[scope],) + tuple(row[4:]))
+        next_no[scope] += 1
+    return numbered
+
+
+def _seed_values(cur, scopes):
+    """Current MAX(receipt_no) per scope, read from receipt_log (scopes absent when empty)."""
+    seeds = {}
+    assignment_ids = [int(s.split(':')[1]) for s in scopes if s.startswith('assignment:')]
+    if assignment_ids:
+        cur.execute(
+            "SELECT assignment_id, MAX(receipt_no) FROM receipt_log"
+            " WHERE assignment_id IN (SELECT value FROM json_each(?)) GROUP BY assignment_id",
+            (json.dumps(assignment_ids),),
+        )
+        seeds.update((f"assignment:{aid}", mx) for aid, mx in cur.fetchall())
+    owner_ids = sorted({int(s.split(':')[1]) for s in scopes if s.startswith('owner:')})
+    if owner_ids:
+        cur.execute(
+            "SELECT owner_id, substr(period, 1, 4), MAX(receipt_no) FROM receipt_log"
+            " WHERE owner_id IN (SELECT value FROM json_each(?)) GROUP BY owner_id, substr(period, 1, 4)",
+            (json.dumps(owner_ids),),
+        )
+        seeds.update((f"owner:{oid}:{year}", mx) for oid, year, mx in cur.fetchall())
+    if "global" in scopes:
+        seeds["global"] = cur.execute("SELECT COALESCE(MAX(receipt_no), 0) FROM receipt_log").fetchone()[0]
+    return seeds
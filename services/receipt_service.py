@@ -1,90 +1,382 @@
 # Batch receipt generation for a month from assignments
+import json
+import numbers
+import time
 from datetime import datetime
 
-def batch_generate_receipts_for_month(month_str, issue_date_str):
-    """
-    Generate receipts for all assignments active in the given month (mm/yyyy), using assignment alternation/share logic.
-    Returns the number of receipts generated.
-    """
-    # Parse month and issue date
+from instrumentation import instrumented
+
+# Assignments active in a month; the alternation rules are applied by services.eligibility
+_ACTIVE_ASSIGNMENTS_SQL = """
+    SELECT id, owner_id, client_id, share_percent, rent_amount, alternation_type, cycle_length, cycle_position, start_date, end_date
+    FROM assignments
+    WHERE start_date <= :period AND (end_date IS NULL OR end_date >= :period)
+    ORDER BY id
+"""
+
+
+def _parse_month_and_issue_date(month_str, issue_date_str):
     try:
         month_dt = datetime.strptime(month_str, "%m/%Y")
-        period = month_dt.strftime("%Y-%m-01")
     except Exception:
         raise ValueError("Month must be in mm/yyyy format")
     try:
         issue_dt = datetime.strptime(issue_date_str, "%d/%m/%Y")
-        issue_date = issue_dt.strftime("%Y-%m-%d")
     except Exception:
         raise ValueError("Issue date must be in dd/mm/yyyy format")
+    return month_dt, issue_dt.strftime("%Y-%m-%d")
 
-    conn = get_connection()
-    cur = conn.cursor()
-    # Find all assignments active in this month
-    cur.execute("""
-        SELECT id, unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount
-        FROM assignments
-        WHERE start_date <= ? AND (end_date IS NULL OR end_date >= ?)
-    """, (period, period))
+
+def _month_rows(cur, month_dt, issue_date):
+    period = month_dt.strftime("%Y-%m-01")
+    cur.execute(_ACTIVE_ASSIGNMENTS_SQL, {'period': period})
     assignments = cur.fetchall()
-    count = 0
-    for a in assignments:
-        # Alternation logic
-        eligible = True
-        if a[5] == 'odd_even':
-            parity = 'odd' if month_dt.month % 2 == 1 else 'even'
-            # Only generate if cycle_position matches parity
-            if (a[7] == 1 and parity != 'odd') or (a[7] == 2 and parity != 'even'):
-                eligible = False
-        elif a[5] == 'cycle' and a[6]:
-            # General cycle: e.g. 3 months on, 3 off
-            cycle_len = int(a[6])
-            pos = int(a[7]) if a[7] else 1
-            # Determine if this assignment is active this month in the cycle
-            months_since_start = (month_dt.year - int(a[8][:4])) * 12 + (month_dt.month - int(a[8][5:7]))
-            if months_since_start < 0 or (months_since_start // cycle_len) % 2 != 0:
-                eligible = False
-        if not eligible:
-            continue
-        # Amount/share
-        amount = float(a[10])
-        share = float(a[4]) if a[4] is not None else 100.0
-        owner_amount = round(amount * share / 100.0, 2)
-        # Insert receipt
-        cur.execute("INSERT INTO receipts (assignment_id, base_label) VALUES (?, ?)", (a[0], None))
-        receipt_id = cur.lastrowid
-        # Insert receipt_log
-        cur.execute(
+    billed = eligible_by_month(assignments, [(month_dt.year, month_dt.month)])[0]
+    return [
+        (a['id'], a['owner_id'], a['client_id'], None, period, issue_date, owner_amount(a['rent_amount'], a['share_percent']))
+        for a in (assignments[i] for i in billed)
+    ]
+
+
+@instrumented
+def batch_generate_receipts_for_month(month_str, issue_date_str, timings=None):
+    """
+    Generate receipts for all assignments active in the given month (mm/yyyy), using assignment alternation/share logic.
+    Active assignments are selected in SQL, their alternation eligibility is computed by services.eligibility,
+    and all rows are written with executemany in a single transaction.
+    Generation is idempotent: receipts that already exist for (assignment_id, period, owner_id) are skipped,
+    so a failed or repeated run can simply be retried.
+    If a dict is passed as timings it is filled with per-phase durations in seconds (select, prepare, insert, commit, total).
+    Returns the number of receipts generated.
+    """
+    month_dt, issue_date = _parse_month_and_issue_date(month_str, issue_date_str)
+
+    phases = {}
+    started = t0 = time.perf_counter()
+    with transaction(immediate=True) as conn:
+        cur = conn.cursor()
+        log_rows = _month_rows(cur, month_dt, issue_date)
+        t1 = time.perf_counter()
+        phases['select'] = t1 - t0
+
+        log_rows, _ = _split_new_rows(cur, log_rows)
+        log_rows = number_rows(cur, log_rows)
+        t2 = time.perf_counter()
+        phases['prepare'] = t2 - t1
+
+        _insert_generated_rows(cur, log_rows)
+        t3 = time.perf_counter()
+        phases['insert'] = t3 - t2
+    t4 = time.perf_counter()
+    phases['commit'] = t4 - t3
+    phases['total'] = t4 - started
+    if timings is not None:
+        timings.update(phases)
+    return len(log_rows)
+
+
+def diff_receipts_for_month(month_str, issue_date_str):
+    """Dry run of batch_generate_receipts_for_month: report what would be added without writing.
+
+    Returns {'period', 'to_add': [dict per receipt_log row], 'already_present': int}.
+    receipt_no is None in to_add: numbers are only reserved when receipts are written.
+    """
+    month_dt, issue_date = _parse_month_and_issue_date(month_str, issue_date_str)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        new_rows, existing = _split_new_rows(cur, _month_rows(cur, month_dt, issue_date))
+    finally:
+        conn.close()
+    keys = ('assignment_id', 'owner_id', 'client_id', 'receipt_no', 'period', 'issue_date', 'amount')
+    return {
+        'period': month_dt.strftime("%Y-%m-01"),
+        'to_add': [dict(zip(keys, row)) for row in new_rows],
+        'already_present': existing,
+    }
+
+
+def owner_amount(rent_amount, share_percent):
+    """Receipt amount of an assignment: its owner's share of the rent, rounded to cents (no share = 100%)."""
+    share = float(share_percent) if share_percent is not None else 100.0
+    return round(float(rent_amount) * share / 100.0, 2)
+
+
+def _split_new_rows(cur, log_rows):
+    """Drop rows whose (assignment_id, period, owner_id) is already in receipt_log (or repeated in log_rows).
+
+    Rows are staged in a temp table and anti-joined against the unique receipt_log index,
+    unless receipt_log has nothing yet for their periods (the usual first run of a month).
+    Returns (new_rows, number_of_rows_dropped).
+    """
+    periods = sorted({row[4] for row in log_rows})
+    cur.execute(
+        "SELECT EXISTS (SELECT 1 FROM receipt_log WHERE period IN (SELECT value FROM json_each(?)))",
+        (json.dumps(periods),),
+    )
+    if not cur.fetchone()[0]:
+        seen = set()
+        new_rows = []
+        for row in log_rows:
+            key = (row[0], row[4], row[1])
+            if key not in seen:
+                seen.add(key)
+                new_rows.append(tuple(row))
+        return new_rows, len(log_rows) - len(new_rows)
+    cur.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS staged_receipt_log ("
+        "assignment_id INTEGER, owner_id INTEGER, client_id INTEGER, receipt_no INTEGER,"
+        " period TEXT, issue_date TEXT, amount REAL)"
+    )
+    cur.execute("DELETE FROM staged_receipt_log")
+    cur.executemany("INSERT INTO staged_receipt_log VALUES (?, ?, ?, ?, ?, ?, ?)", log_rows)
+    cur.execute(
+        """
+        SELECT assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount
+        FROM staged_receipt_log s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM staged_receipt_log GROUP BY assignment_id, period, owner_id)
+          AND NOT EXISTS (
+              SELECT 1 FROM receipt_log rl
+              WHERE rl.assignment_id = s.assignment_id AND rl.period = s.period AND rl.owner_id = s.owner_id
+          )
+        ORDER BY s.rowid
+        """
+    )
+    new_rows = [tuple(r) for r in cur.fetchall()]
+    cur.execute("DELETE FROM staged_receipt_log")
+    return new_rows, len(log_rows) - len(new_rows)
+
+
+def _insert_generated_rows(cur, log_rows):
+    """Insert one receipts row plus one receipt_log row per entry of log_rows.
+
+    Each entry is (assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount).
+    Must run inside a write transaction: receipt ids are allocated up front so
+    both tables can be filled with executemany instead of per-row lastrowid round-trips.
+    The per-row summary triggers are deferred (see deferred_summaries in the schema) and
+    owner_year_ledger and open_receivables are updated once for all the new rows.
+    """
+    if not log_rows:
+        return
+    cur.execute(
+        "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'receipts'), 0),"
+        " COALESCE((SELECT MAX(id) FROM receipts), 0))"
+    )
+    next_id = cur.fetchone()[0] + 1
+    ids = range(next_id, next_id + len(log_rows))
+    cur.execute("SELECT COALESCE(MAX(uid), 0) FROM receipt_log")
+    last_uid = cur.fetchone()[0]
+    cur.executemany(
+        "INSERT INTO receipts (id, assignment_id, base_label) VALUES (?, ?, NULL)",
+        [(rid, row[0]) for rid, row in zip(ids, log_rows)],
+    )
+    cur.execute("INSERT INTO deferred_summaries (name) VALUES ('receipt_log')")
+    try:
+        cur.executemany(
             "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (receipt_id, a[0], a[2], a[3], 1, period, issue_date, owner_amount)
+            [(rid,) + tuple(row) for rid, row in zip(ids, log_rows)],
         )
-        count += 1
-    conn.commit()
-    conn.close()
-    return count
-from database import get_connection
-from datetime import datetime
+    finally:
+        cur.execute("DELETE FROM deferred_summaries WHERE name = 'receipt_log'")
+    _add_generated_summaries(cur, last_uid)
 
 
-def list_receipt_logs_with_names():
-    conn = get_connection()
-    cur = conn.cursor()
+def _add_generated_summaries(cur, last_uid):
+    """What the receipt_log insert triggers do, for every row with uid > last_uid at once (no payments yet)."""
     cur.execute(
         """
-        SELECT rl.uid, rl.receipt_id, rl.assignment_id, u.reference AS unit_reference,
-               rl.owner_id, ow.name AS owner_name, rl.client_id, c.name AS client_name,
-               rl.receipt_no, rl.period, rl.issue_date, rl.amount
-        FROM receipt_log rl
-        JOIN assignments a ON rl.assignment_id = a.id
-        JOIN units u ON a.unit_id = u.id
-        JOIN owners ow ON rl.owner_id = ow.id
-        JOIN clients c ON rl.client_id = c.id
-        ORDER BY rl.uid
+        INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts)
+        SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER), SUM(amount), 0, COUNT(*)
+        FROM receipt_log NOT INDEXED  -- read the new rows by uid range, not a whole index for the grouping
+        WHERE uid > ?
+        GROUP BY 1, 2
+        ON CONFLICT (owner_id, year) DO UPDATE SET
+            billed = billed + excluded.billed,
+            receipts = receipts + excluded.receipts
+        """,
+        (last_uid,),
+    )
+    cur.execute(
         """
+        INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+        SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date, rl.amount
+        FROM receipt_log rl JOIN assignments a ON a.id = rl.assignment_id
+        WHERE rl.uid > ? AND rl.amount > 0.005
+        """,
+        (last_uid,),
+    )
+
+
+def _month_range(start_dt, end_dt):
+    year, month = start_dt.year, start_dt.month
+    while (year, month) <= (end_dt.year, end_dt.month):
+        yield year, month
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+@instrumented
+def batch_generate_receipts_for_range(start_month_str, end_month_str, issue_day=1, run_id=None, chunk_months=12, timings=None):
+    """
+    Generate receipts for every month from start_month_str to end_month_str (mm/yyyy, inclusive).
+
+    Assignments overlapping the range are loaded once and eligibility is computed for a
+    whole chunk of months at a time by services.eligibility. Receipts are committed chunk_months months at a time together with a
+    checkpoint row in receipt_generation_checkpoints, so calling again with the same run_id
+    (by default derived from the range) resumes after the last committed month without
+    creating duplicates. Each month's receipts are issued on issue_day of that month.
+    If a dict is passed as timings it is filled with per-phase durations in seconds.
+    Returns the number of receipts generated by this call.
+    """
+    try:
+        start_dt = datetime.strptime(start_month_str, "%m/%Y")
+        end_dt = datetime.strptime(end_month_str, "%m/%Y")
+    except Exception:
+        raise ValueError("Months must be in mm/yyyy format")
+    if end_dt < start_dt:
+        raise ValueError("End month cannot be before start month")
+    if not 1 <= int(issue_day) <= 28:
+        raise ValueError("issue_day must be between 1 and 28")
+    if chunk_months < 1:
+        raise ValueError("chunk_months must be at least 1")
+
+    start_period = start_dt.strftime("%Y-%m-01")
+    end_period = end_dt.strftime("%Y-%m-01")
+    if run_id is None:
+        run_id = f"{start_period}:{end_period}"
+
+    phases = {'select': 0.0, 'prepare': 0.0, 'insert': 0.0}
+    started = time.perf_counter()
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT start_period, end_period, last_period FROM receipt_generation_checkpoints WHERE run_id = ?", (run_id,))
+        checkpoint = cur.fetchone()
+        if checkpoint is None:
+            with transaction():
+                cur.execute(
+                    "INSERT INTO receipt_generation_checkpoints (run_id, start_period, end_period, last_period, receipts_generated) VALUES (?, ?, ?, NULL, 0)",
+                    (run_id, start_period, end_period),
+                )
+            last_period = None
+        else:
+            if (checkpoint['start_period'], checkpoint['end_period']) != (start_period, end_period):
+                raise ValueError(f"Checkpoint {run_id} was created for a different range")
+            last_period = checkpoint['last_period']
+
+        months = [(y, m) for y, m in _month_range(start_dt, end_dt) if last_period is None or f"{y:04d}-{m:02d}-01" > last_period]
+        if not months:
+            return 0
+        first_period = f"{months[0][0]:04d}-{months[0][1]:02d}-01"
+
+        t0 = time.perf_counter()
+        cur.execute(
+            """
+            SELECT id, owner_id, client_id, share_percent, rent_amount, alternation_type, cycle_length, cycle_position, start_date, end_date
+            FROM assignments
+            WHERE start_date <= ? AND (end_date IS NULL OR end_date >= ?)
+            ORDER BY id
+            """,
+            (end_period, first_period),
+        )
+        assignments = cur.fetchall()
+        phases['select'] = time.perf_counter() - t0
+
+        total = 0
+        for lo in range(0, len(months), chunk_months):
+            chunk = months[lo:lo + chunk_months]
+            t1 = time.perf_counter()
+            log_rows = []
+            for (year, month), billed in zip(chunk, eligible_by_month(assignments, chunk)):
+                period = f"{year:04d}-{month:02d}-01"
+                issue_date = f"{year:04d}-{month:02d}-{int(issue_day):02d}"
+                for index in billed:
+                    aid, owner_id, client_id, share_percent, rent_amount = assignments[index][:5]
+                    log_rows.append((aid, owner_id, client_id, None, period, issue_date, owner_amount(rent_amount, share_percent)))
+            t2 = time.perf_counter()
+            phases['prepare'] += t2 - t1
+
+            last = chunk[-1]
+            with transaction(immediate=True):
+                log_rows, _ = _split_new_rows(cur, log_rows)
+                log_rows = number_rows(cur, log_rows)
+                _insert_generated_rows(cur, log_rows)
+                cur.execute(
+                    """
+                    UPDATE receipt_generation_checkpoints
+                    SET last_period = ?, receipts_generated = receipts_generated + ?, updated_at = datetime('now')
+                    WHERE run_id = ?
+                    """,
+                    (f"{last[0]:04d}-{last[1]:02d}-01", len(log_rows), run_id),
+                )
+            phases['insert'] += time.perf_counter() - t2
+            total += len(log_rows)
+    finally:
+        conn.close()
+
+    phases['total'] = time.perf_counter() - started
+    if timings is not None:
+        timings.update(phases)
+    return total
+from database import get_connection, keyset_page, stream_batches, stream_rows, transaction
+from services.eligibility import eligible_by_month, month_parity
+from services.receipt_numbering import number_rows, numbering_scheme, reserve_receipt_numbers, scope_key
+from services.split_plan import get_split_plan
+from utils.dates import year_bounds
+
+
+def list_receipt_logs_with_names():
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT rl.uid, rl.receipt_id, rl.assignment_id, u.reference AS unit_reference,
+                   rl.owner_id, ow.name AS owner_name, rl.client_id, c.name AS client_name,
+                   rl.receipt_no, rl.period, rl.issue_date, rl.amount
+            FROM receipt_log rl
+            JOIN assignments a ON rl.assignment_id = a.id
+            JOIN units u ON a.unit_id = u.id
+            JOIN owners ow ON rl.owner_id = ow.id
+            JOIN clients c ON rl.client_id = c.id
+            ORDER BY rl.uid
+            """
+        )
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+_RECEIPT_LOG_SORTS = {'uid': 'rl.uid', 'period': 'rl.period'}
+
+
+def list_receipt_logs_page(limit=50, after=None, sort='uid', descending=False, year=None, owner_id=None, assignment_id=None):
+    """Return (receipt log rows, next_after) for one page, with names joined in.
+
+    Pass next_after back as after to get the following page; it is None on the last page.
+    """
+    if sort not in _RECEIPT_LOG_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(_RECEIPT_LOG_SORTS)}")
+    where, params = [], []
+    if year is not None:
+        where.append("rl.period >= ? AND rl.period < ?")
+        params.extend(year_bounds(year))
+    for column, value in (('rl.owner_id', owner_id), ('rl.assignment_id', assignment_id)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    return keyset_page(
+        """rl.uid, rl.receipt_id, rl.assignment_id, u.reference AS unit_reference,
+           rl.owner_id, ow.name AS owner_name, rl.client_id, c.name AS client_name,
+           rl.receipt_no, rl.period, rl.issue_date, rl.amount""",
+        """receipt_log rl
+           JOIN assignments a ON rl.assignment_id = a.id
+           JOIN units u ON a.unit_id = u.id
+           JOIN owners ow ON rl.owner_id = ow.id
+           JOIN clients c ON rl.client_id = c.id""",
+        where, params, _RECEIPT_LOG_SORTS[sort], "rl.uid", limit, after, descending,
     )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
 
 
 def _month_parity(period):
@@ -95,7 +387,35 @@ def _month_parity(period):
             dt = datetime.strptime(period, "%d/%m/%Y")
         except Exception:
             raise ValueError("period must be dd/mm/yyyy or YYYY-MM-DD date string")
-    return "odd" if dt.month % 2 == 1 else "even"
+    return month_parity(dt.year, dt.month)
+
+
+def _iso_date(value, name):
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(str(value).strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"{name} must be dd/mm/yyyy or YYYY-MM-DD date string")
+
+
+def _receipt_input(assignment_id, period, issue_date, total_amount):
+    """Validate create_receipt arguments; returns (assignment_id, period, issue_date, total_amount).
+
+    assignment_id may be an integer or a string of digits; period and issue_date are
+    dd/mm/yyyy or YYYY-MM-DD and come back as YYYY-MM-DD. Raises ValueError.
+    """
+    if total_amount is None:
+        raise ValueError("total_amount is required")
+    try:
+        total_amount = float(total_amount)
+    except (TypeError, ValueError):
+        raise ValueError(f"total_amount must be a number, not {total_amount!r}")
+    if isinstance(assignment_id, str) and assignment_id.strip().isdigit():
+        assignment_id = int(assignment_id)
+    if isinstance(assignment_id, bool) or not isinstance(assignment_id, numbers.Integral):
+        raise ValueError(f"assignment_id must be an integer, not {assignment_id!r}")
+    return int(assignment_id), _iso_date(period, "period"), _iso_date(issue_date, "issue_date"), total_amount
 
 
 def compute_receipt_split(assignment_id, period, total_amount):
@@ -115,59 +435,24 @@ def compute_receipt_split(assignment_id, period, total_amount):
             raise ValueError(f"Assignment {assignment_id} not found")
         unit_id = row["unit_id"]
 
-        cur.execute("SELECT * FROM ownerships WHERE unit_id = ?", (unit_id,))
-        ownerships = cur.fetchall()
-        if not ownerships:
-            raise ValueError("No ownerships defined for unit; cannot split receipt")
-
-        parity = _month_parity(period)
-        applicable = []
-        for o in ownerships:
-            if o["alternate"] == 0:
-                applicable.append(o)
-            else:
-                if o["odd_even"] == parity:
-                    applicable.append(o)
-
-        if not applicable:
-            raise ValueError("No ownership applies for the given period")
-
-        entries = []
-        total_assigned = 0.0
-        for o in applicable:
-            amount = float(total_amount) * float(o["share_percent"]) / 100.0
-            amount = round(amount, 2)
-            total_assigned += amount
-            entries.append({
-                'owner_id': o['owner_id'],
-                'share_percent': float(o['share_percent']),
+        plan = get_split_plan(conn, unit_id, _month_parity(period))
+        return [
+            {
+                'owner_id': owner_id,
+                'share_percent': share,
                 'amount': amount,
-            })
-
-        remainder = round(float(total_amount) - total_assigned, 2)
-        if remainder != 0 and entries:
-            entries[0]['amount'] = round(entries[0]['amount'] + remainder, 2)
-
-        # fetch owner names
-        owner_ids = tuple({e['owner_id'] for e in entries})
-        if owner_ids:
-            placeholders = ','.join('?' for _ in owner_ids)
-            cur.execute(f"SELECT id, name FROM owners WHERE id IN ({placeholders})", owner_ids)
-            names = {r[0]: r[1] for r in cur.fetchall()}
-            for e in entries:
-                e['owner_name'] = names.get(e['owner_id'], '')
-
-        return entries
+                'owner_name': plan.names.get(owner_id, ''),
+            }
+            for owner_id, share, amount in zip(plan.owner_ids, plan.shares, plan.amounts(total_amount))
+        ]
     finally:
         conn.close()
 
 
 def create_receipt(assignment_id, period, issue_date, total_amount, base_label=None):
-    if total_amount is None:
-        raise ValueError("total_amount is required")
+    assignment_id, period, issue_date, total_amount = _receipt_input(assignment_id, period, issue_date, total_amount)
 
-    conn = get_connection()
-    try:
+    with transaction(immediate=True) as conn:
         cur = conn.cursor()
         # Validate assignment and fetch unit_id, client_id
         cur.execute("SELECT id, unit_id, client_id FROM assignments WHERE id = ?", (assignment_id,))
@@ -177,48 +462,30 @@ def create_receipt(assignment_id, period, issue_date, total_amount, base_label=N
         unit_id = row["unit_id"]
         client_id = row["client_id"]
 
-        # Determine receipt_no (per assignment)
-        cur.execute("SELECT MAX(receipt_no) as mx FROM receipt_log WHERE assignment_id = ?", (assignment_id,))
-        mx = cur.fetchone()[0]
-        next_no = (mx or 0) + 1
+        # receipt_log is unique per (assignment_id, period, owner_id)
+        cur.execute("SELECT 1 FROM receipt_log WHERE assignment_id = ? AND period = ? LIMIT 1", (assignment_id, period))
+        if cur.fetchone():
+            raise ValueError(f"A receipt for assignment {assignment_id} and period {period} already exists")
 
         # Create receipts entry
         cur.execute("INSERT INTO receipts (assignment_id, base_label) VALUES (?, ?)", (assignment_id, base_label))
         receipt_id = cur.lastrowid
 
-        # Fetch ownerships for the unit
-        cur.execute("SELECT * FROM ownerships WHERE unit_id = ?", (unit_id,))
-        ownerships = cur.fetchall()
-        if not ownerships:
-            raise ValueError("No ownerships defined for unit; cannot split receipt")
-
-        parity = _month_parity(period)
-        applicable = []
-        for o in ownerships:
-            if o["alternate"] == 0:
-                applicable.append(o)
-            else:
-                if o["odd_even"] == parity:
-                    applicable.append(o)
-
-        if not applicable:
-            raise ValueError("No ownership applies for the given period")
-
-        # Create receipt_log entries per owner
-        total_assigned = 0.0
-        entries = []
-        for o in applicable:
-            amount = float(total_amount) * float(o["share_percent"]) / 100.0
-            amount = round(amount, 2)
-            total_assigned += amount
-            entries.append((receipt_id, assignment_id, o["owner_id"], client_id, next_no, period, issue_date, amount))
-
-        # Adjust for rounding difference by adding remainder to the first owner
-        remainder = round(float(total_amount) - total_assigned, 2)
-        if remainder != 0 and entries:
-            e = list(entries[0])
-            e[-1] = round(e[-1] + remainder, 2)
-            entries[0] = tuple(e)
+        # Split across the unit's ownerships for the month's parity (cached per unit and parity);
+        # several ownership rows of one owner share a single receipt_log entry
+        plan = get_split_plan(conn, unit_id, _month_parity(period))
+        amounts = {}
+        for owner_id, amount in zip(plan.owner_ids, plan.amounts(total_amount)):
+            amounts[owner_id] = round(amounts.get(owner_id, 0.0) + amount, 2)
+
+        # One receipt_no per numbering scope the receipt falls in (config.RECEIPT_NUMBERING)
+        scheme = numbering_scheme()
+        scopes = {owner_id: scope_key(scheme, assignment_id, owner_id, period) for owner_id in amounts}
+        numbers = reserve_receipt_numbers(cur, {scope: 1 for scope in scopes.values()}, scheme)
+        entries = [
+            (receipt_id, assignment_id, owner_id, client_id, numbers[scopes[owner_id]], period, issue_date, amount)
+            for owner_id, amount in amounts.items()
+        ]
 
         # Insert all entries
         for ent in entries:
@@ -226,35 +493,188 @@ def create_receipt(assignment_id, period, issue_date, total_amount, base_label=N
                 "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
                 ent,
             )
+    return receipt_id
 
-        conn.commit()
-        return receipt_id
-    finally:
-        conn.close()
 
+@instrumented
+def create_receipts_bulk(items, partial=False):
+    """Create many receipts in one transaction, the bulk form of create_receipt.
 
-# CSV/Report generation for receipts/payments
-from services.taxes_service import write_csv_file
+    items: iterable of (assignment_id, period, issue_date, total_amount[, base_label]) tuples
+    or dicts with those keys. Assignments, existing receipts and receipt numbers are looked
+    up once for the whole batch and rows are inserted with executemany.
 
+    By default the batch is all-or-nothing: if any item is invalid (unknown assignment,
+    bad period, duplicate receipt, no applicable ownership...) a ValueError listing the
+    problems is raised and nothing is written. With partial=True invalid items are skipped.
+    Every item is first checked like create_receipt's arguments (numeric-string assignment
+    ids are accepted, periods and issue dates may be dd/mm/yyyy or YYYY-MM-DD).
+    Returns {'created': [receipt ids, in item order], 'errors': [(item index, message)]}.
+    """
+    items = [_bulk_item(item) for item in items]
+    if not items:
+        return {'created': [], 'errors': []}
 
-def generate_receipts_report(year, csv_format='detailed', owner_id=None):
-    """Generate receipts/payments report for a year.
+    # validated item or the ValueError message for it, by index
+    parsed = []
+    for aid, period, issue_date, total_amount, base_label in items:
+        try:
+            parsed.append(_receipt_input(aid, period, issue_date, total_amount) + (base_label,))
+        except ValueError as e:
+            parsed.append(str(e))
+    valid = [it for it in parsed if not isinstance(it, str)]
+    assignment_ids = json.dumps(sorted({it[0] for it in valid}))
+    with transaction(immediate=True) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id, unit_id, client_id FROM assignments WHERE id IN (SELECT value FROM json_each(?))",
+            (assignment_ids,),
+        )
+        assignments = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+        cur.execute(
+            "SELECT DISTINCT assignment_id, period FROM receipt_log"
+            " WHERE assignment_id IN (SELECT value FROM json_each(?)) AND period IN (SELECT value FROM json_each(?))",
+            (assignment_ids, json.dumps(sorted({it[1] for it in valid}))),
+        )
+        existing = {(aid, period) for aid, period in cur.fetchall()}
+
+        errors = []
+        receipts = []
+        log_rows = []
+        for index, item in enumerate(parsed):
+            if isinstance(item, str):
+                errors.append((index, item))
+                continue
+            aid, period, issue_date, total_amount, base_label = item
+            try:
+                if aid not in assignments:
+                    raise ValueError(f"Assignment {aid} not found")
+                if (aid, period) in existing:
+                    raise ValueError(f"A receipt for assignment {aid} and period {period} already exists")
+                unit_id, client_id = assignments[aid]
+                plan = get_split_plan(conn, unit_id, _month_parity(period))
+                amounts = {}
+                for owner_id, amount in zip(plan.owner_ids, plan.amounts(total_amount)):
+                    amounts[owner_id] = round(amounts.get(owner_id, 0.0) + amount, 2)
+            except ValueError as e:
+                errors.append((index, str(e)))
+                continue
+            existing.add((aid, period))
+            receipts.append((aid, base_label))
+            log_rows.append([(aid, owner_id, client_id, None, period, issue_date, amount) for owner_id, amount in amounts.items()])
+
+        if errors and not partial:
+            details = "; ".join(f"item {i}: {msg}" for i, msg in errors[:10])
+            more = f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""
+            raise ValueError(f"{len(errors)} invalid receipt(s), nothing created: {details}{more}")
+
+        # Each receipt takes one number in every numbering scope it falls in, in item order
+        scheme = numbering_scheme()
+        receipt_scopes = [{row[1]: scope_key(scheme, row[0], row[1], row[4]) for row in rows} for rows in log_rows]
+        counts = {}
+        for scopes in receipt_scopes:
+            for scope in set(scopes.values()):
+                counts[scope] = counts.get(scope, 0) + 1
+        next_no = reserve_receipt_numbers(cur, counts, scheme)
+        for i, (rows, scopes) in enumerate(zip(log_rows, receipt_scopes)):
+            numbers = {}
+            for scope in set(scopes.values()):
+                numbers[scope] = next_no[scope]
+                next_no[scope] += 1
+            log_rows[i] = [row[:3] + (numbers[scopes[row[1]]],) + row[4:] for row in rows]
 
-    csv_format: 'detailed' (one line per receipt_log with payments),
-                'by-owner' (aggregation per owner),
-                'minimal' (owner,total_received)
-    owner_id: optional owner filter
+        cur.execute(
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'receipts'), 0),"
+            " COALESCE((SELECT MAX(id) FROM receipts), 0))"
+        )
+        first_id = cur.fetchone()[0] + 1
+        ids = list(range(first_id, first_id + len(receipts)))
+        cur.executemany(
+            "INSERT INTO receipts (id, assignment_id, base_label) VALUES (?, ?, ?)",
+            [(rid, aid, label) for rid, (aid, label) in zip(ids, receipts)],
+        )
+        cur.executemany(
+            "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(rid,) + row for rid, rows in zip(ids, log_rows) for row in rows],
+        )
+    return {'created': ids, 'errors': errors}
 
-    Returns: (headers, rows)
+
+def _bulk_item(item):
+    if isinstance(item, dict):
+        return (
+            item.get('assignment_id'), item.get('period'), item.get('issue_date'),
+            item.get('total_amount'), item.get('base_label'),
+        )
+    item = tuple(item)
+    if len(item) not in (4, 5):
+        raise ValueError("each item must be (assignment_id, period, issue_date, total_amount[, base_label])")
+    return item + (None,) * (5 - len(item))
+
+
+# CSV/Report generation for receipts/payments
+from services.taxes_service import write_csv_file, REPORT_BATCH_SIZE
+
+RECEIPTS_REPORT_HEADERS = {
+    'detailed': [
+        'uid', 'receipt_id', 'assignment_id', 'unit_reference', 'owner_id', 'owner_name',
+        'client_id', 'client_name', 'receipt_no', 'period', 'issue_date', 'amount', 'amount_received', 'balance'
+    ],
+    'by-owner': ['owner_id', 'owner_name', 'total_nominal', 'total_received', 'outstanding'],
+    'minimal': ['owner_id', 'owner_name', 'total_received'],
+}
+
+# Column types of the typed report rows, used for the Arrow/Parquet schema
+RECEIPTS_REPORT_COLUMN_TYPES = {
+    'uid': 'int',
+    'receipt_id': 'int',
+    'assignment_id': 'int',
+    'unit_reference': 'str',
+    'owner_id': 'int',
+    'owner_name': 'str',
+    'client_id': 'int',
+    'client_name': 'str',
+    'receipt_no': 'int',
+    'period': 'str',
+    'issue_date': 'str',
+    'amount': 'float',
+    'amount_received': 'float',
+    'balance': 'float',
+    'total_nominal': 'float',
+    'total_received': 'float',
+    'outstanding': 'float',
+}
+
+
+def iter_receipts_report(year, csv_format='detailed', owner_id=None, batch_size=REPORT_BATCH_SIZE, typed=False):
+    """Like generate_receipts_report, but returns (headers, rows) where rows is a generator.
+
+    Rows are pulled from the cursor batch_size at a time and formatted as they are
+    consumed, so memory use does not grow with the size of the report.
+    With typed=True amounts are floats rounded to 2 decimals instead of CSV strings.
     """
-    conn = get_connection()
-    cur = conn.cursor()
+    headers, q, params = _receipts_report_query(year, csv_format, owner_id)
+    if csv_format == 'detailed':
+        return headers, _detailed_receipt_rows(stream_rows(q, params, batch_size), typed)
+    return headers, _owner_receipt_rows(stream_rows(q, params, batch_size), csv_format, typed)
+
+
+def iter_receipts_report_columns(year, csv_format='detailed', owner_id=None, batch_size=REPORT_BATCH_SIZE):
+    """Column batches of the typed receipts report, for the Arrow/Parquet exports.
+
+    Returns (headers, batches) where each batch is {header: list of values} built from one
+    fetchmany of the query (no per-row dicts); amounts are floats rounded to 2 decimals.
+    """
+    headers, q, params = _receipts_report_query(year, csv_format, owner_id)
+    return headers, _receipt_column_batches(headers, csv_format, stream_batches(q, params, batch_size))
+
+
+def _receipts_report_query(year, csv_format, owner_id):
+    if csv_format not in RECEIPTS_REPORT_HEADERS:
+        raise ValueError("Unknown csv_format")
+    headers = list(RECEIPTS_REPORT_HEADERS[csv_format])
 
     if csv_format == 'detailed':
-        headers = [
-            'uid', 'receipt_id', 'assignment_id', 'unit_reference', 'owner_id', 'owner_name',
-            'client_id', 'client_name', 'receipt_no', 'period', 'issue_date', 'amount', 'amount_received', 'balance'
-        ]
         q = """
         SELECT rl.uid, rl.receipt_id, rl.assignment_id, u.reference AS unit_reference,
                rl.owner_id, ow.name AS owner_name, rl.client_id, c.name AS client_name,
@@ -265,71 +685,106 @@ def generate_receipts_report(year, csv_format='detailed', owner_id=None):
         JOIN owners ow ON rl.owner_id = ow.id
         JOIN clients c ON rl.client_id = c.id
         LEFT JOIN payments p ON p.receipt_log_uid = rl.uid
-        WHERE substr(rl.period,1,4) = ?
+        WHERE rl.period >= ? AND rl.period < ?
         """
-        params = [str(year)]
+        params = list(year_bounds(year))
         if owner_id is not None:
             q += " AND rl.owner_id = ?"
             params.append(owner_id)
         q += " GROUP BY rl.uid ORDER BY rl.uid"
-        cur.execute(q, tuple(params))
-        rows = []
-        for uid, receipt_id, aid, ref, oid, oname, cid, cname, rno, period, issue_date, amount, amt_recv in cur.fetchall():
-            balance = round(amount - amt_recv, 2)
-            rows.append({
-                'uid': uid,
-                'receipt_id': receipt_id,
-                'assignment_id': aid,
-                'unit_reference': ref,
+        return headers, q, tuple(params)
+
+    # per-owner totals come pre-aggregated from owner_year_ledger
+    q = """
+    SELECT l.owner_id, ow.name as owner_name, l.billed as total_nominal, l.received as total_received
+    FROM owner_year_ledger l
+    JOIN owners ow ON l.owner_id = ow.id
+    WHERE l.year = ? AND l.receipts > 0
+    """
+    params = [int(year)]
+    if owner_id is not None:
+        q += " AND l.owner_id = ?"
+        params.append(owner_id)
+    q += " ORDER BY l.owner_id"
+    return headers, q, tuple(params)
+
+
+def _receipt_column_batches(headers, csv_format, batches):
+    for batch in batches:
+        columns = list(zip(*batch))
+        if csv_format == 'detailed':
+            amounts, received = columns[11], columns[12]
+            columns[11] = [round(float(x), 2) for x in amounts]
+            columns[12] = [round(float(x), 2) for x in received]
+            columns.append([round(a - r, 2) for a, r in zip(amounts, received)])
+        else:
+            nominal, received = columns[2], columns[3]
+            if csv_format == 'by-owner':
+                columns[2] = [round(float(x), 2) for x in nominal]
+                columns[3] = [round(float(x), 2) for x in received]
+                columns.append([round(n - r, 2) for n, r in zip(nominal, received)])
+            else:
+                columns[2:] = [[round(float(x), 2) for x in received]]
+        yield {h: list(values) for h, values in zip(headers, columns)}
+
+
+def _money(typed):
+    return (lambda x: round(float(x), 2)) if typed else (lambda x: f"{x:.2f}")
+
+
+def _detailed_receipt_rows(records, typed=False):
+    money = _money(typed)
+    for uid, receipt_id, aid, ref, oid, oname, cid, cname, rno, period, issue_date, amount, amt_recv in records:
+        balance = round(amount - amt_recv, 2)
+        yield {
+            'uid': uid,
+            'receipt_id': receipt_id,
+            'assignment_id': aid,
+            'unit_reference': ref,
+            'owner_id': oid,
+            'owner_name': oname,
+            'client_id': cid,
+            'client_name': cname,
+            'receipt_no': rno,
+            'period': period,
+            'issue_date': issue_date,
+            'amount': money(amount),
+            'amount_received': money(amt_recv),
+            'balance': money(balance),
+        }
+
+
+def _owner_receipt_rows(records, csv_format, typed=False):
+    money = _money(typed)
+    for oid, oname, total_nom, total_recv in records:
+        if csv_format == 'by-owner':
+            outst = round(total_nom - total_recv, 2)
+            yield {
                 'owner_id': oid,
                 'owner_name': oname,
-                'client_id': cid,
-                'client_name': cname,
-                'receipt_no': rno,
-                'period': period,
-                'issue_date': issue_date,
-                'amount': f"{amount:.2f}",
-                'amount_received': f"{amt_recv:.2f}",
-                'balance': f"{balance:.2f}",
-            })
-        conn.close()
-        return headers, rows
+                'total_nominal': money(total_nom),
+                'total_received': money(total_recv),
+                'outstanding': money(outst),
+            }
+        else:
+            yield {
+                'owner_id': oid,
+                'owner_name': oname,
+                'total_received': money(total_recv),
+            }
 
-    if csv_format == 'by-owner' or csv_format == 'minimal':
-        # aggregate per owner
-        headers = ['owner_id', 'owner_name', 'total_nominal', 'total_received', 'outstanding'] if csv_format == 'by-owner' else ['owner_id', 'owner_name', 'total_received']
-        q = """
-        SELECT rl.owner_id, ow.name as owner_name, COALESCE(SUM(rl.amount),0.0) as total_nominal, COALESCE(SUM(p.amount_received),0.0) as total_received
-        FROM receipt_log rl
-        JOIN owners ow ON rl.owner_id = ow.id
-        LEFT JOIN payments p ON p.receipt_log_uid = rl.uid
-        WHERE substr(rl.period,1,4) = ?
-        GROUP BY rl.owner_id
-        """
-        params = [str(year)]
-        if owner_id is not None:
-            q = q.replace("GROUP BY rl.owner_id", "AND rl.owner_id = ? GROUP BY rl.owner_id")
-            params.append(owner_id)
-        cur.execute(q, tuple(params))
-        rows = []
-        for oid, oname, total_nom, total_recv in cur.fetchall():
-            if csv_format == 'by-owner':
-                outst = round(total_nom - total_recv, 2)
-                rows.append({
-                    'owner_id': oid,
-                    'owner_name': oname,
-                    'total_nominal': f"{total_nom:.2f}",
-                    'total_received': f"{total_recv:.2f}",
-                    'outstanding': f"{outst:.2f}",
-                })
-            else:
-                rows.append({
-                    'owner_id': oid,
-                    'owner_name': oname,
-                    'total_received': f"{total_recv:.2f}",
-                })
-        conn.close()
-        return headers, rows
 
-    conn.close()
-    raise ValueError("Unknown csv_format")
\ No newline at end of file
+@instrumented
+def generate_receipts_report(year, csv_format='detailed', owner_id=None):
+    """Generate receipts/payments report for a year.
+
+    csv_format: 'detailed' (one line per receipt_log with payments),
+                'by-owner' (aggregation per owner),
+                'minimal' (owner,total_received)
+    owner_id: optional owner filter
+
+    Returns: (headers, rows)
+    Use iter_receipts_report to stream large reports instead.
+    """
+    headers, rows = iter_receipts_report(year, csv_format, owner_id)
+    return headers, list(rows)
@@ -0,0 +1,137 @@
+from datetime import date
+
+from database import get_connection, transaction
+from instrumentation import instrumented
+
+# Aging buckets by days since issue_date: (key, minimum age in days)
+AGING_BUCKETS = (('current', 0), ('days_30', 30), ('days_60', 60), ('days_90_plus', 90))
+
+# Grouping for aging_report: key column of open_receivables -> (name table, name column)
+_AGING_GROUPS = {
+    'owner': ('owner_id', 'owners', 'name'),
+    'client': ('client_id', 'clients', 'name'),
+    'unit': ('unit_id', 'units', 'reference'),
+}
+
+_OPEN_FROM_RAW_SQL = """
+    SELECT uid, owner_id, client_id, unit_id, issue_date, balance
+    FROM (
+        SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+               rl.amount - COALESCE(SUM(p.amount_received), 0) AS balance
+        FROM receipt_log rl
+        JOIN assignments a ON a.id = rl.assignment_id
+        LEFT JOIN payments p ON p.receipt_log_uid = rl.uid
+        GROUP BY rl.uid
+    )
+    WHERE balance > 0.005
+"""
+
+
+@instrumented
+def aging_report(by='owner', as_of=None):
+    """Outstanding balances per owner, client or unit, split into aging buckets.
+
+    Age is the number of days from issue_date to as_of (ISO date, default today);
+    receipts issued after as_of count as current. Read from open_receivables only.
+    Returns a list of {'id', 'name', 'current', 'days_30', 'days_60', 'days_90_plus',
+    'total', 'receipts'} ordered by id.
+    """
+    if by not in _AGING_GROUPS:
+        raise ValueError(f"by must be one of: {', '.join(_AGING_GROUPS)}")
+    key, table, name_column = _AGING_GROUPS[by]
+    as_of = as_of or date.today().isoformat()
+
+    buckets = []
+    for i, (bucket, low) in enumerate(AGING_BUCKETS):
+        conditions = [] if i == 0 else [f"age >= {low}"]
+        if i + 1 < len(AGING_BUCKETS):
+            conditions.append(f"age < {AGING_BUCKETS[i + 1][1]}")
+        buckets.append(f"COALESCE(SUM(CASE WHEN {' AND '.join(conditions)} THEN balance END), 0.0) AS {bucket}")
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT g.{key} AS id, t.{name_column} AS name, {', '.join(buckets)},
+                   SUM(balance) AS total, COUNT(*) AS receipts
+            FROM (
+                SELECT {key}, balance, COALESCE(julianday(?) - julianday(issue_date), 0) AS age
+                FROM open_receivables
+            ) g
+            LEFT JOIN {table} t ON t.id = g.{key}
+            GROUP BY g.{key}
+            ORDER BY g.{key}
+            """,
+            (as_of,),
+        )
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    report = []
+    for r in rows:
+        entry = {'id': r['id'], 'name': r['name']}
+        for bucket, _ in AGING_BUCKETS:
+            entry[bucket] = round(r[bucket], 2)
+        entry['total'] = round(r['total'], 2)
+        entry['receipts'] = r['receipts']
+        report.append(entry)
+    return report
+
+
+def list_outstanding(owner_id=None, client_id=None, unit_id=None):
+    """Unpaid receipt_log entries (oldest first) with their remaining balance, optionally filtered."""
+    where, params = [], []
+    for column, value in (('o.owner_id', owner_id), ('o.client_id', client_id), ('o.unit_id', unit_id)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT o.uid, rl.receipt_id, rl.assignment_id, o.unit_id, o.owner_id, o.client_id,
+                   rl.period, o.issue_date, rl.amount, ROUND(o.balance, 2) AS balance
+            FROM open_receivables o
+            JOIN receipt_log rl ON rl.uid = o.uid
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY o.issue_date, o.uid
+            """,
+            tuple(params),
+        )
+        return [dict(r) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def verify_open_receivables():
+    """Compare open_receivables with balances recomputed from receipt_log and payments.
+
+    Returns the uids whose row is missing, extra or has a different balance; empty when consistent.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_OPEN_FROM_RAW_SQL)
+        actual = {r['uid']: r['balance'] for r in cur.fetchall()}
+        cur.execute("SELECT uid, balance FROM open_receivables")
+        stored = {r[0]: r[1] for r in cur.fetchall()}
+    finally:
+        conn.close()
+    return sorted(
+        uid for uid in set(actual) | set(stored)
+        if uid not in actual or uid not in stored or abs(actual[uid] - stored[uid]) >= 0.005
+    )
+
+
+def rebuild_open_receivables():
+    """Recompute open_receivables from receipt_log and payments. Returns the number of rows written."""
+    with transaction(immediate=True) as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM open_receivables")
+        cur.execute(
+            f"INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance) {_OPEN_FROM_RAW_SQL}"
+        )
+        return cur.rowcount
@@ -0,0 +1,249 @@
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from database import get_connection, transaction
+from instrumentation import instrumented
+from services.import_service import iter_file_rows
+from services.payments_service import create_payments_bulk
+
+# Bank statement reconciliation: each statement line is a tenant transfer that pays one
+# open receipt in full (the receipt's outstanding amount across its owners' receipt_log
+# rows). Lines are matched by client and amount, and by period when the line has one;
+# without a period the oldest open receipt with that amount is paid. Matched receipts get
+# one payment per receipt_log row, all recorded in a single transaction.
+
+# Columns read from the statement (header names, case-insensitive); client_id or client
+# (the client's name) identifies the tenant, period (mm/yyyy or yyyy-mm) and reference are optional
+STATEMENT_COLUMNS = ('date', 'amount', 'client_id', 'client', 'period', 'reference')
+
+
+@instrumented
+def reconcile_bank_statement(path, review_path=None, dry_run=False):
+    """Match the lines of a .csv/.xlsx bank statement to open receipts and record the payments.
+
+    Unmatched lines are returned and, if review_path is given, written there as CSV with
+    their line number and the reason. With dry_run=True nothing is written to the database.
+    Returns {'matched': [{'line', 'receipt_id', 'client_id', 'period', 'amount'}],
+    'unmatched': [(line, reason)], 'payments': number of payment rows recorded}.
+    """
+    return reconcile_statement_lines(iter_file_rows(path), review_path, dry_run)
+
+
+def reconcile_statement_lines(lines, review_path=None, dry_run=False):
+    """reconcile_bank_statement for an iterable of (line number, dict) statement lines."""
+    parsed = []
+    unmatched = []
+    for line, row in lines:
+        row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+        try:
+            parsed.append((line, row, _parse_line(row)))
+        except ValueError as e:
+            unmatched.append((line, row, str(e)))
+
+    if dry_run:
+        # read-only: no write lock, concurrent writers are not held up by a preview
+        conn = get_connection()
+        try:
+            matched, payments = _match_lines(conn.cursor(), parsed, unmatched)
+        finally:
+            conn.close()
+    else:
+        with transaction(immediate=True) as conn:
+            matched, payments = _match_lines(conn.cursor(), parsed, unmatched)
+            create_payments_bulk(payments)
+
+    unmatched.sort(key=lambda u: u[0])
+    if review_path is not None:
+        with open(review_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(('line', 'reason') + STATEMENT_COLUMNS)
+            for line, row, reason in unmatched:
+                writer.writerow([line, reason] + ['' if row.get(k) is None else row.get(k) for k in STATEMENT_COLUMNS])
+    return {
+        'matched': matched,
+        'unmatched': [(line, reason) for line, _, reason in unmatched],
+        'payments': 0 if dry_run else len(payments),
+    }
+
+
+def _match_lines(cur, parsed, unmatched):
+    """Match parsed statement lines to open receipts; unmatched lines are appended to unmatched.
+
+    Returns (matched, payments) with payments as create_payments_bulk rows.
+    """
+    matched = []
+    payments = []
+    names = _client_names(cur, [p for _, _, p in parsed])
+    client_ids = set()
+    for line, row, p in parsed:
+        if p['client_id'] is None:
+            ids = names.get(p['client'].lower(), [])
+            if len(ids) != 1:
+                reason = "unknown client" if not ids else "client name matches several clients"
+                unmatched.append((line, row, f"{reason}: {p['client']}"))
+                continue
+            p['client_id'] = ids[0]
+        client_ids.add(p['client_id'])
+
+    receipts, by_amount, by_period = _open_receipts(cur, client_ids)
+    paid = set()
+    for line, row, p in parsed:
+        if p['client_id'] is None:
+            continue
+        if p['period'] is not None:
+            candidates = by_period.get((p['client_id'], p['period'], p['cents']), ())
+        else:
+            candidates = by_amount.get((p['client_id'], p['cents']), ())
+        receipt_id = next((r for r in candidates if r not in paid), None)
+        if receipt_id is None:
+            unmatched.append((line, row, "no open receipt for this client and amount"))
+            continue
+        paid.add(receipt_id)
+        client_id, period, rows = receipts[receipt_id]
+        note = p['reference'] or f"bank statement line {line}"
+        payments.extend((uid, outstanding, p['date'], note) for uid, outstanding in rows)
+        matched.append({
+            'line': line, 'receipt_id': receipt_id, 'client_id': client_id,
+            'period': period, 'amount': p['cents'] / 100.0,
+        })
+    return matched, payments
+
+
+def _open_receipts(cur, client_ids):
+    """Load the open receipts of the given clients into hash indexes.
+
+    Only unpaid rows are read, from the trigger-maintained open_receivables balances.
+    Returns (receipts, by_amount, by_period): receipts maps receipt_id -> (client_id, period,
+    [(uid, outstanding)]); by_amount maps (client_id, cents) and by_period maps
+    (client_id, period, cents) to receipt ids, oldest period first.
+    """
+    cur.execute(
+        """
+        SELECT rl.receipt_id, o.client_id, rl.period, o.uid, o.balance
+        FROM open_receivables o
+        JOIN receipt_log rl ON rl.uid = o.uid
+        WHERE o.client_id IN (SELECT value FROM json_each(?))
+        ORDER BY rl.period, rl.receipt_id, o.uid
+        """,
+        (json.dumps(sorted(client_ids)),),
+    )
+    receipts = {}
+    for receipt_id, client_id, period, uid, outstanding in cur.fetchall():
+        entry = receipts.setdefault(receipt_id, (client_id, period, []))
+        if round(outstanding, 2) > 0:
+            entry[2].append((uid, round(outstanding, 2)))
+
+    by_amount = defaultdict(list)
+    by_period = defaultdict(list)
+    for receipt_id, (client_id, period, rows) in receipts.items():
+        if not rows:
+            continue
+        cents = round(sum(outstanding for _, outstanding in rows) * 100)
+        by_amount[(client_id, cents)].append(receipt_id)
+        by_period[(client_id, period, cents)].append(receipt_id)
+    return receipts, by_amount, by_period
+
+
+def _client_names(cur, parsed):
+    """lowercased name -> [client ids] for the client names used by the statement."""
+    wanted = sorted({p['client'].lower() for p in parsed if p['client_id'] is None})
+    if not wanted:
+        return {}
+    cur.execute(
+        "SELECT id, lower(name) FROM clients WHERE lower(name) IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (json.dumps(wanted),),
+    )
+    names = defaultdict(list)
+    for client_id, name in cur.fetchall():
+        names[name].append(client_id)
+    return names
+
+
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _parse_line(row):
+    date_str = _text(row, 'date')
+    if date_str is None:
+        raise ValueError("date is required")
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            date_iso = datetime.strptime(date_str[:10], fmt).strftime("%Y-%m-%d")
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError("date must be dd/mm/yyyy or yyyy-mm-dd")
+
+    amount = _text(row, 'amount')
+    if isinstance(row.get('amount'), float):
+        amount = f"{row['amount']:.2f}"  # numeric .xlsx cell, e.g. 0.30000000000000004
+    cents = _parse_cents(amount)
+
+    client_id = _text(row, 'client_id')
+    client = _text(row, 'client')
+    if client_id is not None:
+        if not client_id.isdigit():
+            raise ValueError("client_id must be numeric")
+        client_id = int(client_id)
+    elif client is None:
+        raise ValueError("client_id or client is required")
+
+    period = _text(row, 'period')
+    if period is not None:
+        for fmt in ("%m/%Y", "%Y-%m", "%Y-%m-%d"):
+            try:
+                period = datetime.strptime(period, fmt).strftime("%Y-%m-01")
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("period must be mm/yyyy or yyyy-mm")
+
+    return {
+        'date': date_iso, 'cents': cents, 'client_id': client_id, 'client': client,
+        'period': period, 'reference': _text(row, 'reference'),
+    }
+
+
+def _parse_cents(amount):
+    """Amount in cents; accepts 1234.5, 1234,50, 1,234.50, 1.234,50, 1 234,50 and 1,234.
+
+    The last separator is the decimal separator when one or two digits follow it and a
+    thousands separator when three do; the other separator (and spaces) group thousands.
+    Anything else (0,125, 1.234.5, 1,234,50) is rejected as ambiguous.
+    """
+    if amount is None:
+        raise ValueError("amount is required")
+    amount = ''.join(amount.split())
+    last = max(amount.rfind(','), amount.rfind('.'))
+    whole, decimals = amount, ''
+    if last >= 0 and len(amount) - last - 1 in (1, 2):
+        whole, decimals = amount[:last], amount[last + 1:]
+    elif last >= 0 and len(amount) - last - 1 != 3:
+        raise ValueError(f"amount is ambiguous: {amount}")
+    separators = {c for c in whole if c in ',.'}
+    groups = whole.replace(',', '.').split('.')
+    if len(separators) > 1 or (decimals and amount[last] in separators) or (
+        len(groups) > 1 and not (
+            1 <= len(groups[0]) <= 3 and not groups[0].startswith('0')
+            and all(len(g) == 3 for g in groups[1:])
+        )
+    ):
+        raise ValueError(f"amount is ambiguous: {amount}")
+    digits = ''.join(groups)
+    if not digits.isdecimal() or not (decimals == '' or decimals.isdecimal()):
+        if amount.startswith('-'):
+            raise ValueError("amount must be positive")
+        raise ValueError("amount must be a number")
+    cents = int(digits) * 100 + int(decimals.ljust(2, '0'))
+    if cents <= 0:
+        raise ValueError("amount must be positive")
+    return cents
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for the Arrow and Parquet exports
+    pa = None
+
+# Export formats for the receipt and tax reports. CSV is handled by
+# taxes_service.write_csv_file; the others keep native types and are written
+# a batch of rows at a time as the report generator produces them. Arrow and
+# Parquet are written from column batches, which a report can build straight
+# from its cursor (receipt_service.iter_receipts_report_columns).
+EXPORT_FORMATS = ('csv', 'ndjson', 'arrow', 'parquet')
+# Output file extension -> export format
+EXPORT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.parquet': 'parquet',
+}
+
+# Report column types: 'int', 'float' (money, rounded to 2 decimals) or 'str'
+_ARROW_TYPES = {'int': 'int64', 'float': 'float64', 'str': 'string'}
+
+
+def export_format_for_path(path):
+    """Pick the export format from an output path's extension; CSV by default (and for '-')."""
+    return EXPORT_EXTENSIONS.get(os.path.splitext(str(path))[1].lower(), 'csv')
+
+
+def write_report(path, headers, rows, export_format, column_types, batch_size=1000):
+    """Write typed report rows (from iter_*_report(..., typed=True)) to path.
+
+    export_format is one of 'ndjson', 'arrow' (Arrow IPC / Feather v2) or 'parquet'.
+    Columns missing from a row are written as nulls. NDJSON may go to stdout with '-'.
+    """
+    if export_format == 'ndjson':
+        if path == '-':
+            _write_ndjson(sys.stdout, headers, rows)
+        else:
+            with open(path, 'w', encoding='utf-8') as fh:
+                _write_ndjson(fh, headers, rows)
+        return None
+
+    if export_format not in ('arrow', 'parquet'):
+        raise ValueError(f"Unknown export format: {export_format}")
+    return write_column_batches(path, headers, _column_batches(headers, rows, batch_size), export_format, column_types)
+
+
+def write_column_batches(path, headers, batches, export_format, column_types):
+    """Write column batches ({header: list of values}, e.g. from iter_receipts_report_columns) as Arrow or Parquet.
+
+    Skips building a dict per row when the report can produce its columns directly.
+    """
+    if export_format not in ('arrow', 'parquet'):
+        raise ValueError(f"Unknown export format: {export_format}")
+    if pa is None:
+        raise ValueError(f"{export_format} export requires pyarrow (pip install pyarrow)")
+    if path == '-':
+        raise ValueError(f"{export_format} export needs an output file")
+
+    schema = pa.schema([(h, getattr(pa, _ARROW_TYPES[column_types.get(h, 'str')])()) for h in headers])
+    if export_format == 'parquet':
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for batch in batches:
+            writer.write_batch(pa.RecordBatch.from_pydict(batch, schema=schema))
+    finally:
+        writer.close()
+    return None
+
+
+def _write_ndjson(fh, headers, rows):
+    for row in rows:
+        fh.write(json.dumps({h: row.get(h) for h in headers}, ensure_ascii=False))
+        fh.write('\n')
+
+
+def _column_batches(headers, rows, batch_size):
+    columns = {h: [] for h in headers}
+    n = 0
+    for row in rows:
+        for h in headers:
+            columns[h].append(row.get(h))
+        n += 1
+        if n >= batch_size:
+            yield columns
+            columns = {h: [] for h in headers}
+            n = 0
+    if n:
+        yield columns
@@ -0,0 +1,101 @@
+import threading
+
+import database
+
+# In-process cache of ownership split plans, keyed by (database, unit_id, parity).
+# Entries are dropped by ownership_service on create/update/delete, and all of a
+# database's entries are dropped when its cache_versions 'split_plans' counter
+# (bumped by triggers on ownerships and owner renames) no longer matches, which
+# covers changes made by other processes.
+_lock = threading.Lock()
+_plans = {}
+_versions = {}
+
+
+class SplitPlan:
+    """The ownerships of a unit that apply in odd or even months, in ownership id order.
+
+    owner_ids and shares are parallel tuples (one item per ownership row); names maps
+    owner_id -> owner name.
+    """
+
+    __slots__ = ('unit_id', 'parity', 'owner_ids', 'shares', 'names')
+
+    def __init__(self, unit_id, parity, owner_ids, shares, names):
+        self.unit_id = unit_id
+        self.parity = parity
+        self.owner_ids = owner_ids
+        self.shares = shares
+        self.names = names
+
+    def amounts(self, total_amount):
+        """Split total_amount by share, rounded to cents; the rounding remainder goes to the first row."""
+        total = float(total_amount)
+        amounts = [round(total * share / 100.0, 2) for share in self.shares]
+        remainder = round(total - sum(amounts), 2)
+        if remainder != 0 and amounts:
+            amounts[0] = round(amounts[0] + remainder, 2)
+        return amounts
+
+
+def get_split_plan(conn, unit_id, parity):
+    """Return the SplitPlan for a unit and month parity ('odd' or 'even'), building it on a miss.
+
+    conn is the caller's connection, so the lookup joins any transaction in progress.
+    Raises ValueError when the unit has no ownerships or none applies to the parity.
+    """
+    path = str(database.DB_PATH)
+    row = conn.execute("SELECT version FROM cache_versions WHERE name = 'split_plans'").fetchone()
+    version = row[0] if row else None
+    with _lock:
+        if _versions.get(path) != version:
+            _drop(path)
+            _versions[path] = version
+        plan = _plans.get((path, unit_id, parity))
+    if plan is not None:
+        return plan
+
+    plan = _build_plan(conn, unit_id, parity)
+    with _lock:
+        if _versions.get(path) == version:
+            _plans[(path, unit_id, parity)] = plan
+    return plan
+
+
+def _build_plan(conn, unit_id, parity):
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT owner_id, share_percent, alternate, odd_even FROM ownerships WHERE unit_id = ? ORDER BY id",
+        (unit_id,),
+    )
+    ownerships = cur.fetchall()
+    if not ownerships:
+        raise ValueError("No ownerships defined for unit; cannot split receipt")
+
+    applicable = [o for o in ownerships if o["alternate"] == 0 or o["odd_even"] == parity]
+    if not applicable:
+        raise ValueError("No ownership applies for the given period")
+
+    owner_ids = tuple(o["owner_id"] for o in applicable)
+    distinct = tuple(set(owner_ids))
+    cur.execute(f"SELECT id, name FROM owners WHERE id IN ({','.join('?' for _ in distinct)})", distinct)
+    names = {r[0]: r[1] for r in cur.fetchall()}
+    return SplitPlan(unit_id, parity, owner_ids, tuple(float(o["share_percent"]) for o in applicable), names)
+
+
+def _drop(path, unit_id=None):
+    for key in [k for k in _plans if k[0] == path and (unit_id is None or k[1] == unit_id)]:
+        del _plans[key]
+
+
+def invalidate_split_plans(unit_id=None):
+    """Drop cached plans for one unit (or every unit) of the current database."""
+    with _lock:
+        _drop(str(database.DB_PATH), unit_id)
+
+
+def clear_split_plan_cache():
+    """Drop every cached plan for every database."""
+    with _lock:
+        _plans.clear()
+        _versions.clear()
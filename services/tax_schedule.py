@@ -0,0 +1,170 @@
+import json
+from bisect import bisect_left
+from functools import lru_cache
+
+from config import TAX_CONFIG
+from database import get_connection, transaction
+
+try:
+    import numpy as np
+except ImportError:  # the pure-Python path gives the same results
+    np = None
+
+
+class TaxSchedule:
+    """IR brackets and RAS thresholds compiled once from a TAX_CONFIG-style dict.
+
+    Brackets are validated when the schedule is built: they must not overlap and
+    consecutive brackets may only be separated by the usual integer step
+    (40000 -> 40001). A bracket covers everything above the previous bracket's
+    max up to and including its own max, so fractional amounts such as 40000.5
+    fall into the next bracket instead of matching nothing.
+    Lookups use bisect on the precomputed upper bounds; the many-amount variants use
+    numpy.searchsorted when NumPy is installed, or else one sorted merge walk.
+    """
+
+    def __init__(self, config):
+        self.abattement = config.get('abattement', 0.40)
+        self.family_deduction_per_person = config.get('family_deduction_per_person', 500)
+        self.family_deduction_max = config.get('family_deduction_max', 3000)
+        self._ir = _compile_brackets('ir_brackets', [(b[0], b[1], (b[2], b[3])) for b in config['ir_brackets']])
+        self._ras = _compile_brackets('ras_thresholds', [(t[0], t[1], (t[2],)) for t in config['ras_thresholds']])
+
+    def ir_bracket(self, taxable):
+        """Return (rate, deduction, (min, max)) for a taxable amount."""
+        (rate, deduction), bracket = _lookup(self._ir, taxable, (0.0, 0))
+        return rate, deduction, bracket
+
+    def ras_rate(self, gross):
+        """Return (rate, (min, max)) for an annual gross revenue."""
+        (rate,), bracket = _lookup(self._ras, gross, (0.0,))
+        return rate, bracket
+
+    def ir_brackets(self, taxables):
+        """ir_bracket for many amounts at once."""
+        results = [(rate, deduction, bracket) for (rate, deduction), bracket in zip(self._ir['values'], self._ir['brackets'])]
+        return _lookup_many(self._ir, taxables, results, (0.0, 0, (0, 0)))
+
+    def ras_rates(self, grosses):
+        """ras_rate for many amounts at once."""
+        results = [(rate, bracket) for (rate,), bracket in zip(self._ras['values'], self._ras['brackets'])]
+        return _lookup_many(self._ras, grosses, results, (0.0, (0, 0)))
+
+    def family_deduction(self, family_count):
+        return min(self.family_deduction_per_person * family_count, self.family_deduction_max)
+
+
+def _compile_brackets(name, rows):
+    if not rows:
+        raise ValueError(f"{name} must contain at least one bracket")
+    rows = sorted(rows, key=lambda r: r[0])
+    for i, (mn, mx, _) in enumerate(rows):
+        if mx is None and i != len(rows) - 1:
+            raise ValueError(f"{name}: only the last bracket may be open-ended (min {mn})")
+        if mx is not None and mx < mn:
+            raise ValueError(f"{name}: bracket max {mx} is below its min {mn}")
+        if i:
+            prev_max = rows[i - 1][1]
+            if mn <= prev_max:
+                raise ValueError(f"{name}: brackets overlap at {mn} (previous max {prev_max})")
+            if mn - prev_max > 1:
+                raise ValueError(f"{name}: gap between {prev_max} and {mn}")
+    uppers = [mx for mn, mx, _ in rows if mx is not None]
+    return {
+        'floor': rows[0][0],
+        'ceiling': rows[-1][1],
+        'uppers': uppers,
+        'values': [values for _, _, values in rows],
+        'brackets': [(mn, mx) for mn, mx, _ in rows],
+    }
+
+
+def _lookup(compiled, amount, fallback):
+    if amount < compiled['floor'] or (compiled['ceiling'] is not None and amount > compiled['ceiling']):
+        return fallback, (0, 0)
+    i = bisect_left(compiled['uppers'], amount)
+    return compiled['values'][i], compiled['brackets'][i]
+
+
+def _lookup_many(compiled, amounts, results, fallback):
+    """results[i] for the bracket i of each amount (as _lookup), fallback outside all brackets."""
+    amounts = list(amounts)
+    uppers = compiled['uppers']
+    floor, ceiling = compiled['floor'], compiled['ceiling']
+    table = results + [fallback]
+    if np is not None:
+        values = np.asarray(amounts, dtype=np.float64)
+        indexes = np.searchsorted(np.asarray(uppers, dtype=np.float64), values, side='left')
+        outside = values < floor
+        if ceiling is not None:
+            outside |= values > ceiling
+        indexes[outside] = len(results)
+        return [table[i] for i in indexes.tolist()]
+
+    # sort once, then walk the upper bounds alongside the amounts; past the last upper
+    # bound j is the open-ended bracket, or the fallback when the schedule has a ceiling
+    found = [fallback] * len(amounts)
+    bounds = uppers + [float('inf')]
+    j = 0
+    bound = bounds[0]
+    for k in sorted(range(len(amounts)), key=amounts.__getitem__):
+        amount = amounts[k]
+        if amount < floor:
+            continue
+        while amount > bound:
+            j += 1
+            bound = bounds[j]
+        found[k] = table[j]
+    return found
+
+
+# Per-year schedules stored in the tax_schedules table. A year without its own
+# row uses the closest earlier year, and config.TAX_CONFIG when there is none.
+
+def get_tax_schedule(year):
+    """Return the compiled TaxSchedule that applies to the given year."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT config FROM tax_schedules WHERE year <= ? ORDER BY year DESC LIMIT 1", (int(year),))
+        row = cur.fetchone()
+    finally:
+        conn.close()
+    config_json = row[0] if row else json.dumps(TAX_CONFIG, sort_keys=True)
+    return _compile_schedule(config_json)
+
+
+@lru_cache(maxsize=32)
+def _compile_schedule(config_json):
+    # keyed on the stored JSON, so editing a year's row takes effect without a restart
+    return TaxSchedule(json.loads(config_json))
+
+
+def set_tax_schedule(year, config):
+    """Store the tax rules for a year (same shape as config.TAX_CONFIG), replacing any existing ones."""
+    TaxSchedule(config)  # raises ValueError on overlapping or gapped brackets
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO tax_schedules (year, config, updated_at) VALUES (?, ?, datetime('now'))
+            ON CONFLICT(year) DO UPDATE SET config = excluded.config, updated_at = excluded.updated_at
+            """,
+            (int(year), json.dumps(config, sort_keys=True)),
+        )
+
+
+def list_tax_schedules():
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT year, config, updated_at FROM tax_schedules ORDER BY year")
+        return [{'year': y, 'config': json.loads(c), 'updated_at': u} for y, c, u in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def delete_tax_schedule(year):
+    with transaction() as conn:
+        cur = conn.execute("DELETE FROM tax_schedules WHERE year = ?", (int(year),))
+    if cur.rowcount == 0:
+        raise ValueError(f"No tax schedule stored for {year}")
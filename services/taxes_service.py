@@ -1,74 +1,107 @@
-from database import get_connection
-from config import TAX_CONFIG
-from services.payments_service import sum_received_for_owner_year
-
-
-def _find_ir_bracket(taxable):
-    for mn, mx, rate, deduction in TAX_CONFIG['ir_brackets']:
-        if mx is None:
-            if taxable >= mn:
-                return rate, deduction, (mn, mx)
-        else:
-            if mn <= taxable <= mx:
-                return rate, deduction, (mn, mx)
-    # fallback
-    return 0.0, 0, (0, 0)
-
-
-def _find_ras_rate(gross):
-    for mn, mx, rate in TAX_CONFIG['ras_thresholds']:
-        if mx is None:
-            if gross >= mn:
-                return rate, (mn, mx)
-        else:
-            if mn <= gross <= mx:
-                return rate, (mn, mx)
-    return 0.0, (0, 0)
+import math
 
+from database import get_connection, stream_rows
+from instrumentation import instrumented
+from services.tax_schedule import get_tax_schedule
+from utils.dates import year_bounds
 
+
+@instrumented
 def compute_owner_taxes_for_year(owner_id, year):
     conn = get_connection()
-    cur = conn.cursor()
+    try:
+        cur = conn.cursor()
+
+        # 1) gross revenue and amounts received come pre-aggregated from owner_year_ledger
+        cur.execute(
+            """
+            SELECT ow.family_count, l.billed, l.received
+            FROM owners ow
+            LEFT JOIN owner_year_ledger l ON l.owner_id = ow.id AND l.year = ?
+            WHERE ow.id = ?
+            """,
+            (int(year), owner_id),
+        )
+        row = cur.fetchone()
+    finally:
+        conn.close()
+
+    family_count = int(row[0]) if row and row[0] is not None else 0
+    gross = _ledger_amount(row[1]) if row else 0.0
+    received = _ledger_amount(row[2]) if row else 0.0
+    return _tax_result(owner_id, year, gross, family_count, received, get_tax_schedule(year))
 
-    # 1) gross revenue: sum of receipt_log.amount for that owner where period matches year
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0.0) FROM receipt_log WHERE owner_id = ? AND substr(period,1,4) = ?",
-        (owner_id, str(year)),
-    )
-    gross = float(cur.fetchone()[0] or 0.0)
 
+@instrumented
+def compute_taxes_for_year(year, owner_ids=None):
+    """Compute taxes for many owners at once.
+
+    Gross revenue, amounts received and family counts for all owners (or only owner_ids)
+    come from a single query on owners and owner_year_ledger instead of three queries per owner.
+    Returns a list of the same dicts as compute_owner_taxes_for_year, ordered by owner id.
+    """
+    q = """
+        SELECT ow.id, ow.family_count, l.billed, l.received
+        FROM owners ow
+        LEFT JOIN owner_year_ledger l ON l.owner_id = ow.id AND l.year = ?
+    """
+    params = [int(year)]
+    if owner_ids is not None:
+        owner_ids = list(owner_ids)
+        if not owner_ids:
+            return []
+        q += f" WHERE ow.id IN ({','.join('?' for _ in owner_ids)})"
+        params.extend(owner_ids)
+    q += " ORDER BY ow.id"
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(q, tuple(params))
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    schedule = get_tax_schedule(year)
+    grosses = [_ledger_amount(r[2]) for r in rows]
+    irs = schedule.ir_brackets([g * (1.0 - schedule.abattement) for g in grosses])
+    rases = schedule.ras_rates(grosses)
+    return [
+        _tax_result(oid, year, gross, int(family_count) if family_count is not None else 0, _ledger_amount(received), schedule, ir, ras)
+        for (oid, family_count, _, received), gross, ir, ras in zip(rows, grosses, irs, rases)
+    ]
+
+
+def _ledger_amount(value):
+    # ledger totals are running sums of cent amounts; drop the float noise they pick up
+    return round(float(value or 0.0), 2)
+
+
+def _tax_result(owner_id, year, gross, family_count, received, schedule, ir=None, ras=None):
+    """Build the tax dict for one owner using the year's schedule. ir/ras may be passed in when looked up in bulk."""
     # 2) taxable = gross * (1 - abattement)
-    abattement = TAX_CONFIG.get('abattement', 0.40)
-    taxable = gross * (1.0 - abattement)
+    taxable = gross * (1.0 - schedule.abattement)
 
     # 3) apply IR bracket
-    rate, deduction, bracket = _find_ir_bracket(taxable)
+    rate, deduction, bracket = ir if ir is not None else schedule.ir_bracket(taxable)
     # initial tax is computed without final rounding (rounding only at the very end)
     initial_tax = taxable * rate - deduction
 
     # 4) family deduction
-    cur.execute("SELECT family_count FROM owners WHERE id = ?", (owner_id,))
-    row = cur.fetchone()
-    family_count = int(row[0]) if row else 0
-    per_person = TAX_CONFIG.get('family_deduction_per_person', 500)
-    fam_max = TAX_CONFIG.get('family_deduction_max', 3000)
-    fam_deduction = min(per_person * family_count, fam_max)
+    fam_deduction = schedule.family_deduction(family_count)
 
     tax_after_family = initial_tax - fam_deduction
 
     # 5) deduct RAS that client took: compute actual withheld = gross - sum(received)
-    received = sum_received_for_owner_year(owner_id, year)
     ras_withheld = gross - received
 
     # Also compute theoretical ras rate for reference
-    ras_rate, ras_bracket = _find_ras_rate(gross)
+    ras_rate, ras_bracket = ras if ras is not None else schedule.ras_rate(gross)
     theoretical_ras = round(gross * ras_rate, 2)
 
     tax_after_ras = tax_after_family - ras_withheld
 
     # Final tax: round up to the nearest whole number and ensure non-negative
-    import math
-
     final_tax = max(0, math.ceil(tax_after_ras))
 
     res = {
@@ -95,30 +128,92 @@ def compute_owner_taxes_for_year(owner_id, year):
 
 # Report generation utilities
 import csv
-import io
-
-
-def _assignment_summaries_for_owner(owner_id, year):
-    """Return list of per-assignment rows for owner-year.
-    Each item: dict with assignment_id, unit_ref, unit_city, client_name, client_legal_id, gross
+import sys
+
+# Owners are read, taxed and written this many at a time by the report producers
+REPORT_BATCH_SIZE = 1000
+
+TAXES_REPORT_HEADERS = {
+    'detailed': [
+        'owner_id',
+        'owner_name',
+        'owner_legal_id',
+        'gross_revenue',
+        'abattement_amount',
+        'tax_after_rate_minus_deduction',
+        'family_deduction',
+        'final_tax_unrounded',
+        'rounded_tax',
+        'ras_withheld',
+        'due_tax',
+    ],
+    # assignment columns first, then summary columns
+    'by-assignment': [
+        'owner_id',
+        'owner_name',
+        'owner_legal_id',
+        'unit_reference',
+        'unit_city',
+        'client_name',
+        'client_legal_id',
+        'assignment_id',
+        'gross',
+        'gross_revenue',
+        'abattement_amount',
+        'tax_after_rate_minus_deduction',
+        'family_deduction',
+        'final_tax_unrounded',
+        'rounded_tax',
+        'ras_withheld',
+        'due_tax',
+    ],
+    'minimal': ['owner_id', 'owner_name', 'year', 'gross_revenue', 'rounded_tax'],
+}
+
+# Column types of the typed report rows, used for the Arrow/Parquet schema
+TAXES_REPORT_COLUMN_TYPES = {
+    'owner_id': 'int',
+    'owner_name': 'str',
+    'owner_legal_id': 'str',
+    'year': 'int',
+    'unit_reference': 'str',
+    'unit_city': 'str',
+    'client_name': 'str',
+    'client_legal_id': 'str',
+    'assignment_id': 'int',
+    'gross': 'float',
+    'gross_revenue': 'float',
+    'abattement_amount': 'float',
+    'tax_after_rate_minus_deduction': 'float',
+    'family_deduction': 'float',
+    'final_tax_unrounded': 'float',
+    'rounded_tax': 'int',
+    'ras_withheld': 'float',
+    'due_tax': 'float',
+}
+
+
+def _assignment_summaries_for_year(year, owner_ids=None):
+    """Return per-assignment rows for a year, grouped by owner in one query.
+    Result: {owner_id: [dict with receipt_uid, assignment_id, unit_reference, unit_city, client_name, client_legal_id, gross]}
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT rl.uid, rl.assignment_id, u.reference, u.city, c.name, c.legal_id, rl.amount
+    q = """
+        SELECT rl.owner_id, rl.uid, rl.assignment_id, u.reference, u.city, c.name, c.legal_id, rl.amount
         FROM receipt_log rl
         JOIN assignments a ON a.id = rl.assignment_id
         JOIN units u ON u.id = a.unit_id
         JOIN clients c ON c.id = rl.client_id
-        WHERE rl.owner_id = ? AND substr(rl.period,1,4) = ?
-        ORDER BY rl.uid
-        """,
-        (owner_id, str(year)),
-    )
-    rows = []
-    for uid, assignment_id, ref, city, client_name, client_legal_id, amount in cur.fetchall():
-        rows.append(
+        WHERE rl.period >= ? AND rl.period < ?
+    """
+    params = list(year_bounds(year))
+    if owner_ids is not None:
+        q += f" AND rl.owner_id IN ({','.join('?' for _ in owner_ids)})"
+        params.extend(owner_ids)
+    q += " ORDER BY rl.owner_id, rl.uid"
+
+    by_owner = {}
+    for oid, uid, assignment_id, ref, city, client_name, client_legal_id, amount in stream_rows(q, tuple(params)):
+        by_owner.setdefault(oid, []).append(
             {
                 'receipt_uid': uid,
                 'assignment_id': assignment_id,
@@ -129,78 +224,63 @@ def _assignment_summaries_for_owner(owner_id, year):
                 'gross': float(amount or 0.0),
             }
         )
-    conn.close()
-    return rows
+    return by_owner
 
 
-def generate_taxes_report(year, csv_format='detailed', owner_id=None):
-    """Generate taxes report data for the given year.
+def iter_taxes_report(year, csv_format='detailed', owner_id=None, batch_size=REPORT_BATCH_SIZE, typed=False):
+    """Like generate_taxes_report, but returns (headers, rows) where rows is a generator.
 
-    csv_format: 'detailed' (one line per owner with fields),
-                'by-assignment' (lines per assignment then owner summary),
-                'minimal' (owner, year, gross, rounded_tax)
-    If owner_id is provided, limit report to that owner.
-
-    Returns: (headers, rows) where rows is list of dicts.
+    Owners are streamed from the database and taxed batch_size at a time, so memory
+    use does not grow with the number of owners.
+    With typed=True amounts are floats rounded to 2 decimals instead of CSV strings
+    and by-assignment reports have no blank separator rows (see report_export).
     """
-    # collect owners list
-    conn = get_connection()
-    cur = conn.cursor()
+    if csv_format not in TAXES_REPORT_HEADERS:
+        raise ValueError("Unknown csv_format")
+    headers = list(TAXES_REPORT_HEADERS[csv_format])
     if owner_id is not None:
-        cur.execute("SELECT id, name, legal_id FROM owners WHERE id = ?", (owner_id,))
+        q, params = "SELECT id, name, legal_id FROM owners WHERE id = ?", (owner_id,)
     else:
-        cur.execute("SELECT id, name, legal_id FROM owners ORDER BY id")
-    owners = cur.fetchall()
-
-    report_rows = []
-
-    for oid, name, legal_id in owners:
-        # compute aggregate
-        agg = compute_owner_taxes_for_year(oid, year)
-
-        if csv_format == 'minimal':
-            headers = ['owner_id', 'owner_name', 'year', 'gross_revenue', 'rounded_tax']
-            report_rows.append(
-                {
+        q, params = "SELECT id, name, legal_id FROM owners ORDER BY id", ()
+    return headers, _taxes_report_rows(year, csv_format, stream_rows(q, params, batch_size), batch_size, typed)
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _taxes_report_rows(year, csv_format, owners, batch_size, typed=False):
+    money = (lambda x: round(float(x), 2)) if typed else (lambda x: f"{x:.2f}")
+    for batch in _batches(owners, batch_size):
+        ids = [o[0] for o in batch]
+        # aggregates for the whole batch in one pass instead of per-owner queries
+        aggs = {r['owner_id']: r for r in compute_taxes_for_year(year, ids)}
+        summaries = _assignment_summaries_for_year(year, ids) if csv_format == 'by-assignment' else {}
+
+        for oid, name, legal_id in batch:
+            agg = aggs[oid]
+
+            if csv_format == 'minimal':
+                yield {
                     'owner_id': oid,
                     'owner_name': name,
                     'year': year,
-                    'gross_revenue': f"{agg['gross_revenue']:.2f}",
-                    'rounded_tax': f"{agg['final_tax']}",
+                    'gross_revenue': money(agg['gross_revenue']),
+                    'rounded_tax': agg['final_tax'] if typed else f"{agg['final_tax']}",
                 }
-            )
-            continue
-
-        if csv_format == 'by-assignment':
-            # produce assignment lines first
-            assignment_headers = [
-                'owner_id',
-                'owner_name',
-                'owner_legal_id',
-                'unit_reference',
-                'unit_city',
-                'client_name',
-                'client_legal_id',
-                'assignment_id',
-                'gross',
-            ]
-            summary_headers = [
-                'gross_revenue',
-                'abattement_amount',
-                'tax_after_rate_minus_deduction',
-                'family_deduction',
-                'final_tax_unrounded',
-                'rounded_tax',
-                'ras_withheld',
-                'due_tax',
-            ]
-            # combined headers (assignment columns first, then summary columns)
-            headers = assignment_headers + summary_headers
-
-            ass_rows = _assignment_summaries_for_owner(oid, year)
-            for a in ass_rows:
-                report_rows.append(
-                    {
+                continue
+
+            if csv_format == 'by-assignment':
+                # produce assignment lines first
+                for a in summaries.get(oid, []):
+                    yield {
                         'owner_id': oid,
                         'owner_name': name,
                         'owner_legal_id': legal_id,
@@ -209,78 +289,68 @@ def generate_taxes_report(year, csv_format='detailed', owner_id=None):
                         'client_name': a['client_name'] or '',
                         'client_legal_id': a['client_legal_id'] or '',
                         'assignment_id': a['assignment_id'],
-                        'gross': f"{a['gross']:.2f}",
+                        'gross': money(a['gross']),
                     }
-                )
-            # add an empty separator row, then owner summary below
-            report_rows.append({})
-            # fallthrough to add owner summary
-
-        # detailed (owner summary)
-        if csv_format == 'detailed':
-            headers = [
-                'owner_id',
-                'owner_name',
-                'owner_legal_id',
-                'gross_revenue',
-                'abattement_amount',
-                'tax_after_rate_minus_deduction',
-                'family_deduction',
-                'final_tax_unrounded',
-                'rounded_tax',
-                'ras_withheld',
-                'due_tax',
-            ]
-        else:
-            # for by-assignment we already set headers above (combined headers)
-            pass
-
-        # compute abattement amount from taxable (we show amount = gross * abattement)
-        abattement_pct = 1.0 - (agg['taxable_amount'] / (agg['gross_revenue'] or 1)) if agg['gross_revenue'] else 0.0
-        abattement_amount = round(agg['gross_revenue'] * abattement_pct, 2)
-
-        tax_after_rate_minus_deduction = agg['initial_tax']
-        final_unrounded = agg['tax_after_family'] - (agg['ras_withheld'] or 0.0)
-        rounded_tax = agg['final_tax']
-        due_tax = rounded_tax - agg['ras_withheld']
-
-        report_rows.append(
-            {
+                # add an empty separator row, then owner summary below
+                if not typed:
+                    yield {}
+
+            # compute abattement amount from taxable (we show amount = gross * abattement)
+            abattement_pct = 1.0 - (agg['taxable_amount'] / (agg['gross_revenue'] or 1)) if agg['gross_revenue'] else 0.0
+            abattement_amount = round(agg['gross_revenue'] * abattement_pct, 2)
+
+            tax_after_rate_minus_deduction = agg['initial_tax']
+            final_unrounded = agg['tax_after_family'] - (agg['ras_withheld'] or 0.0)
+            rounded_tax = agg['final_tax']
+            due_tax = rounded_tax - agg['ras_withheld']
+
+            yield {
                 'owner_id': oid,
                 'owner_name': name,
                 'owner_legal_id': legal_id or '',
-                'gross_revenue': f"{agg['gross_revenue']:.2f}",
-                'abattement_amount': f"{abattement_amount:.2f}",
-                'tax_after_rate_minus_deduction': f"{tax_after_rate_minus_deduction:.2f}",
-                'family_deduction': f"{agg['family_deduction']:.2f}",
-                'final_tax_unrounded': f"{final_unrounded:.2f}",
-                'rounded_tax': f"{rounded_tax}",
-                'ras_withheld': f"{agg['ras_withheld']:.2f}",
-                'due_tax': f"{due_tax:.2f}",
+                'gross_revenue': money(agg['gross_revenue']),
+                'abattement_amount': money(abattement_amount),
+                'tax_after_rate_minus_deduction': money(tax_after_rate_minus_deduction),
+                'family_deduction': money(agg['family_deduction']),
+                'final_tax_unrounded': money(final_unrounded),
+                'rounded_tax': rounded_tax if typed else f"{rounded_tax}",
+                'ras_withheld': money(agg['ras_withheld']),
+                'due_tax': money(due_tax),
             }
-        )
 
-    conn.close()
 
-    return headers, report_rows
+@instrumented
+def generate_taxes_report(year, csv_format='detailed', owner_id=None):
+    """Generate taxes report data for the given year.
+
+    csv_format: 'detailed' (one line per owner with fields),
+                'by-assignment' (lines per assignment then owner summary),
+                'minimal' (owner, year, gross, rounded_tax)
+    If owner_id is provided, limit report to that owner.
+
+    Returns: (headers, rows) where rows is list of dicts.
+    Use iter_taxes_report to stream large reports instead.
+    """
+    headers, rows = iter_taxes_report(year, csv_format, owner_id)
+    return headers, list(rows)
 
 
 def write_csv_file(path, headers, rows):
-    mode = 'w'
+    """Write rows (any iterable of dicts) as CSV to path, or to stdout when path is '-'.
+
+    Rows are written as they are produced, so generator-based reports stream straight
+    to disk. Missing columns are left empty.
+    """
     if path == '-':
-        # return string
-        sio = io.StringIO()
-        writer = csv.DictWriter(sio, fieldnames=headers)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-        return sio.getvalue()
-
-    with open(path, mode, newline='', encoding='utf-8') as fh:
-        writer = csv.DictWriter(fh, fieldnames=headers)
-        writer.writeheader()
-        for r in rows:
-            # ensure all headers present
-            row = {k: r.get(k, '') for k in headers}
-            writer.writerow(row)
-    return None
\ No newline at end of file
+        _write_csv(sys.stdout, headers, rows)
+        return None
+
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        _write_csv(fh, headers, rows)
+    return None
+
+
+def _write_csv(fh, headers, rows):
+    writer = csv.DictWriter(fh, fieldnames=headers, restval='', extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rows)
@@ -1,4 +1,4 @@
-from database import get_connection
+from database import get_connection, keyset_page, transaction
 
 
 def create_unit(reference, city=None, neighborhood=None, floor=None, unit_type=None):
@@ -7,35 +7,60 @@ def create_unit(reference, city=None, neighborhood=None, floor=None, unit_type=N
     if unit_type is not None and unit_type not in ("apt", "store", "building"):
         raise ValueError("unit_type must be one of: apt, store, building")
 
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO units (reference, city, neighborhood, floor, unit_type)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (reference.strip(), city, neighborhood, floor, unit_type),
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO units (reference, city, neighborhood, floor, unit_type)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (reference.strip(), city, neighborhood, floor, unit_type),
+        )
 
 
 def list_units():
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM units ORDER BY id")
-    units = cur.fetchall()
-    conn.close()
-    return units
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM units ORDER BY id")
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+# sort name -> column usable as a keyset (must be NOT NULL)
+_UNIT_SORTS = {'id': 'id', 'reference': 'reference'}
+
+
+def list_units_page(limit=50, after=None, sort='id', descending=False, city=None, search=None):
+    """Return (units, next_after) for one page of units, for large tables.
+
+    Pass next_after back as after to get the following page; it is None on the last page.
+    Optional filters: exact city, reference prefix (search).
+    """
+    if sort not in _UNIT_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(_UNIT_SORTS)}")
+    where, params = [], []
+    if city is not None:
+        where.append("city = ?")
+        params.append(city)
+    if search:
+        where.append("reference LIKE ? ESCAPE '\\'")
+        params.append(_like_prefix(search))
+    return keyset_page("*", "units", where, params, _UNIT_SORTS[sort], "id", limit, after, descending)
+
+
+def _like_prefix(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
 
 
 def get_unit(unit_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM units WHERE id = ?", (unit_id,))
-    unit = cur.fetchone()
-    conn.close()
-    return unit
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM units WHERE id = ?", (unit_id,))
+        return cur.fetchone()
+    finally:
+        conn.close()
 
 
 def update_unit(unit_id, reference=None, city=None, neighborhood=None, floor=None, unit_type=None):
@@ -66,22 +91,14 @@ def update_unit(unit_id, reference=None, city=None, neighborhood=None, floor=Non
         return
 
     params.append(unit_id)
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(f"UPDATE units SET {', '.join(fields)} WHERE id = ?", tuple(params))
-    conn.commit()
+    with transaction() as conn:
+        cur = conn.execute(f"UPDATE units SET {', '.join(fields)} WHERE id = ?", tuple(params))
     if cur.rowcount == 0:
-        conn.close()
         raise ValueError(f"Unit {unit_id} not found")
-    conn.close()
 
 
 def delete_unit(unit_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM units WHERE id = ?", (unit_id,))
-    conn.commit()
+    with transaction() as conn:
+        cur = conn.execute("DELETE FROM units WHERE id = ?", (unit_id,))
     if cur.rowcount == 0:
-        conn.close()
         raise ValueError(f"Unit {unit_id} not found")
-    conn.close()
@@ -34,6 +34,10 @@ CREATE TABLE IF NOT EXISTS units (
     unit_type TEXT CHECK (unit_type IN ('apt','store','building'))
 );
 
+-- Unit listings filtered by city (keyset pages ordered by id)
+CREATE INDEX IF NOT EXISTS idx_units_city
+    ON units (city);
+
 -------------------------------------------------
 -- OWNERSHIP (supports shared + alternating)
 -------------------------------------------------
@@ -48,6 +52,10 @@ CREATE TABLE IF NOT EXISTS ownerships (
     FOREIGN KEY (owner_id) REFERENCES owners(id)
 );
 
+-- Split plans and ownership validation look ownerships up by unit
+CREATE INDEX IF NOT EXISTS idx_ownerships_unit
+    ON ownerships (unit_id);
+
 -------------------------------------------------
 -- ASSIGNMENTS (CONTRACTS)
 -------------------------------------------------
@@ -69,6 +77,15 @@ CREATE TABLE IF NOT EXISTS assignments (
     FOREIGN KEY (client_id) REFERENCES clients(id)
 );
 
+-- Overlap checks and "active in month" lookups
+CREATE INDEX IF NOT EXISTS idx_assignments_unit_dates
+    ON assignments (unit_id, start_date, end_date);
+-- Assignment listings filtered by owner or client
+CREATE INDEX IF NOT EXISTS idx_assignments_owner
+    ON assignments (owner_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_client
+    ON assignments (client_id);
+
 -------------------------------------------------
 -- RECEIPT DEFINITIONS (STATIC)
 -------------------------------------------------
@@ -98,6 +115,20 @@ CREATE TABLE IF NOT EXISTS receipt_log (
     FOREIGN KEY (client_id) REFERENCES clients(id)
 );
 
+-- One receipt per owner per assignment and period; makes generation idempotent
+CREATE UNIQUE INDEX IF NOT EXISTS ux_receipt_log_assignment_period_owner
+    ON receipt_log (assignment_id, period, owner_id);
+
+-- Yearly filters use period ranges (period >= 'YYYY-01-01' AND period < 'YYYY+1-01-01');
+-- amount is included so per-owner sums are answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_receipt_log_owner_period
+    ON receipt_log (owner_id, period, amount);
+CREATE INDEX IF NOT EXISTS idx_receipt_log_period
+    ON receipt_log (period);
+-- Bank statement reconciliation loads a client's receipts
+CREATE INDEX IF NOT EXISTS idx_receipt_log_client_period
+    ON receipt_log (client_id, period);
+
 -------------------------------------------------
 -- PAYMENTS (records actual amounts received per receipt log)
 -------------------------------------------------
@@ -109,3 +140,290 @@ CREATE TABLE IF NOT EXISTS payments (
     note TEXT,
     FOREIGN KEY (receipt_log_uid) REFERENCES receipt_log(uid)
 );
+
+CREATE INDEX IF NOT EXISTS idx_payments_receipt_log_uid
+    ON payments (receipt_log_uid, amount_received);
+
+-------------------------------------------------
+-- RECEIPT GENERATION CHECKPOINTS (resumable multi-month runs)
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS receipt_generation_checkpoints (
+    run_id TEXT PRIMARY KEY,
+    start_period TEXT NOT NULL,
+    end_period TEXT NOT NULL,
+    last_period TEXT,
+    receipts_generated INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+
+-------------------------------------------------
+-- TAX SCHEDULES (per-year rules, JSON in the shape of config.TAX_CONFIG)
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS tax_schedules (
+    year INTEGER PRIMARY KEY,
+    config TEXT NOT NULL,
+    updated_at TEXT
+);
+
+-------------------------------------------------
+-- DEFERRED SUMMARIES
+-- A bulk writer that maintains owner_year_ledger and open_receivables itself
+-- with set-based statements (batch receipt generation) inserts a row here for
+-- the length of its transaction; the per-row receipt_log insert triggers skip
+-- while one exists. The row is deleted before commit, so no other connection
+-- ever sees it.
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS deferred_summaries (
+    name TEXT PRIMARY KEY
+);
+
+-------------------------------------------------
+-- OWNER YEAR LEDGER (billed / received totals per owner and year)
+-- Kept current by the triggers below; year is the first 4 characters of
+-- receipt_log.period. services/ledger_service.py can verify and rebuild it.
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS owner_year_ledger (
+    owner_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    billed REAL NOT NULL DEFAULT 0,
+    received REAL NOT NULL DEFAULT 0,
+    receipts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, year)
+) WITHOUT ROWID;
+
+-- Backfill once when the ledger is added to a database that already has receipts
+INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts)
+SELECT owner_id, year, SUM(billed), SUM(received), SUM(receipts)
+FROM (
+    SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER) AS year, amount AS billed, 0.0 AS received, 1 AS receipts
+    FROM receipt_log
+    UNION ALL
+    SELECT rl.owner_id, CAST(substr(rl.period, 1, 4) AS INTEGER), 0.0, p.amount_received, 0
+    FROM payments p JOIN receipt_log rl ON rl.uid = p.receipt_log_uid
+)
+WHERE NOT EXISTS (SELECT 1 FROM owner_year_ledger)
+GROUP BY owner_id, year;
+
+-- recreated so databases with the earlier unconditional trigger pick up the WHEN clause
+DROP TRIGGER IF EXISTS trg_ledger_receipt_log_insert;
+CREATE TRIGGER trg_ledger_receipt_log_insert
+AFTER INSERT ON receipt_log
+WHEN NOT EXISTS (SELECT 1 FROM deferred_summaries)
+BEGIN
+    INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts)
+    VALUES (NEW.owner_id, CAST(substr(NEW.period, 1, 4) AS INTEGER), NEW.amount, 0, 1)
+    ON CONFLICT (owner_id, year) DO UPDATE SET
+        billed = billed + excluded.billed,
+        receipts = receipts + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_receipt_log_delete
+AFTER DELETE ON receipt_log
+BEGIN
+    UPDATE owner_year_ledger SET
+        billed = billed - OLD.amount,
+        received = received - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = OLD.uid),
+        receipts = receipts - 1
+    WHERE owner_id = OLD.owner_id AND year = CAST(substr(OLD.period, 1, 4) AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_receipt_log_update
+AFTER UPDATE OF owner_id, period, amount ON receipt_log
+BEGIN
+    UPDATE owner_year_ledger SET
+        billed = billed - OLD.amount,
+        received = received - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = OLD.uid),
+        receipts = receipts - 1
+    WHERE owner_id = OLD.owner_id AND year = CAST(substr(OLD.period, 1, 4) AS INTEGER);
+    INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts)
+    VALUES (
+        NEW.owner_id, CAST(substr(NEW.period, 1, 4) AS INTEGER), NEW.amount,
+        (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = NEW.uid), 1
+    )
+    ON CONFLICT (owner_id, year) DO UPDATE SET
+        billed = billed + excluded.billed,
+        received = received + excluded.received,
+        receipts = receipts + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_payments_insert
+AFTER INSERT ON payments
+BEGIN
+    INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts)
+    SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER), 0, NEW.amount_received, 0
+    FROM receipt_log WHERE uid = NEW.receipt_log_uid
+    ON CONFLICT (owner_id, year) DO UPDATE SET received = received + excluded.received;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_payments_delete
+AFTER DELETE ON payments
+BEGIN
+    UPDATE owner_year_ledger SET received = received - OLD.amount_received
+    WHERE (owner_id, year) = (
+        SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER) FROM receipt_log WHERE uid = OLD.receipt_log_uid
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ledger_payments_update
+AFTER UPDATE OF receipt_log_uid, amount_received ON payments
+BEGIN
+    UPDATE owner_year_ledger SET received = received - OLD.amount_received
+    WHERE (owner_id, year) = (
+        SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER) FROM receipt_log WHERE uid = OLD.receipt_log_uid
+    );
+    INSERT INTO owner_year_ledger (owner_id, year, billed, received, receipts)
+    SELECT owner_id, CAST(substr(period, 1, 4) AS INTEGER), 0, NEW.amount_received, 0
+    FROM receipt_log WHERE uid = NEW.receipt_log_uid
+    ON CONFLICT (owner_id, year) DO UPDATE SET received = received + excluded.received;
+END;
+
+-------------------------------------------------
+-- OPEN RECEIVABLES (receipt_log rows with an unpaid balance)
+-- One row per receipt_log entry whose amount is not fully covered by payments,
+-- kept current by the triggers below, so outstanding balances and aging
+-- (services/receivables_service.py) never scan all receipts and payments.
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS open_receivables (
+    uid INTEGER PRIMARY KEY,
+    owner_id INTEGER NOT NULL,
+    client_id INTEGER NOT NULL,
+    unit_id INTEGER NOT NULL,
+    issue_date TEXT NOT NULL,
+    balance REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_open_receivables_owner
+    ON open_receivables (owner_id, issue_date);
+CREATE INDEX IF NOT EXISTS idx_open_receivables_client
+    ON open_receivables (client_id, issue_date);
+CREATE INDEX IF NOT EXISTS idx_open_receivables_unit
+    ON open_receivables (unit_id, issue_date);
+
+-- Backfill when the table is added to a database that already has unpaid receipts
+INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+SELECT uid, owner_id, client_id, unit_id, issue_date, balance
+FROM (
+    SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+           rl.amount - COALESCE(SUM(p.amount_received), 0) AS balance
+    FROM receipt_log rl
+    JOIN assignments a ON a.id = rl.assignment_id
+    LEFT JOIN payments p ON p.receipt_log_uid = rl.uid
+    GROUP BY rl.uid
+)
+WHERE balance > 0.005 AND NOT EXISTS (SELECT 1 FROM open_receivables);
+
+DROP TRIGGER IF EXISTS trg_open_receivables_receipt_log_insert;
+CREATE TRIGGER trg_open_receivables_receipt_log_insert
+AFTER INSERT ON receipt_log
+WHEN NEW.amount > 0.005 AND NOT EXISTS (SELECT 1 FROM deferred_summaries)
+BEGIN
+    INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+    SELECT NEW.uid, NEW.owner_id, NEW.client_id, unit_id, NEW.issue_date, NEW.amount
+    FROM assignments WHERE id = NEW.assignment_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_open_receivables_receipt_log_delete
+AFTER DELETE ON receipt_log
+BEGIN
+    DELETE FROM open_receivables WHERE uid = OLD.uid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_open_receivables_receipt_log_update
+AFTER UPDATE OF assignment_id, owner_id, client_id, issue_date, amount ON receipt_log
+BEGIN
+    DELETE FROM open_receivables WHERE uid = NEW.uid;
+    INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+    SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+           rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid)
+    FROM receipt_log rl JOIN assignments a ON a.id = rl.assignment_id
+    WHERE rl.uid = NEW.uid
+      AND rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid) > 0.005;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_open_receivables_payments_insert
+AFTER INSERT ON payments
+BEGIN
+    DELETE FROM open_receivables WHERE uid = NEW.receipt_log_uid;
+    INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+    SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+           rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid)
+    FROM receipt_log rl JOIN assignments a ON a.id = rl.assignment_id
+    WHERE rl.uid = NEW.receipt_log_uid
+      AND rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid) > 0.005;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_open_receivables_payments_delete
+AFTER DELETE ON payments
+BEGIN
+    DELETE FROM open_receivables WHERE uid = OLD.receipt_log_uid;
+    INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+    SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+           rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid)
+    FROM receipt_log rl JOIN assignments a ON a.id = rl.assignment_id
+    WHERE rl.uid = OLD.receipt_log_uid
+      AND rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid) > 0.005;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_open_receivables_payments_update
+AFTER UPDATE OF receipt_log_uid, amount_received ON payments
+BEGIN
+    DELETE FROM open_receivables WHERE uid = OLD.receipt_log_uid;
+    INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+    SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+           rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid)
+    FROM receipt_log rl JOIN assignments a ON a.id = rl.assignment_id
+    WHERE rl.uid = OLD.receipt_log_uid
+      AND rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid) > 0.005;
+    DELETE FROM open_receivables WHERE uid = NEW.receipt_log_uid;
+    INSERT INTO open_receivables (uid, owner_id, client_id, unit_id, issue_date, balance)
+    SELECT rl.uid, rl.owner_id, rl.client_id, a.unit_id, rl.issue_date,
+           rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid)
+    FROM receipt_log rl JOIN assignments a ON a.id = rl.assignment_id
+    WHERE rl.uid = NEW.receipt_log_uid
+      AND rl.amount - (SELECT COALESCE(SUM(amount_received), 0) FROM payments WHERE receipt_log_uid = rl.uid) > 0.005;
+END;
+
+-------------------------------------------------
+-- CACHE VERSIONS (bumped on writes so in-process caches in every
+-- process can tell their entries are stale)
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('split_plans', 0);
+
+-- split plans (services/split_plan.py) depend on ownerships and owner names
+CREATE TRIGGER IF NOT EXISTS trg_split_plans_ownerships_insert
+AFTER INSERT ON ownerships
+BEGIN
+    UPDATE cache_versions SET version = version + 1 WHERE name = 'split_plans';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_split_plans_ownerships_update
+AFTER UPDATE ON ownerships
+BEGIN
+    UPDATE cache_versions SET version = version + 1 WHERE name = 'split_plans';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_split_plans_ownerships_delete
+AFTER DELETE ON ownerships
+BEGIN
+    UPDATE cache_versions SET version = version + 1 WHERE name = 'split_plans';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_split_plans_owners_rename
+AFTER UPDATE OF name ON owners
+BEGIN
+    UPDATE cache_versions SET version = version + 1 WHERE name = 'split_plans';
+END;
+
+-------------------------------------------------
+-- RECEIPT SEQUENCES (next receipt_no per numbering scope, see
+-- services/receipt_numbering.py; rows are seeded lazily from receipt_log)
+-------------------------------------------------
+CREATE TABLE IF NOT EXISTS receipt_sequences (
+    scope TEXT PRIMARY KEY,
+    last_no INTEGER NOT NULL
+) WITHOUT ROWID;
@@ -160,3 +160,84 @@ def test_rent_amount_required(tmp_path, monkeypatch):
             INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (unit_id, owner_id, client_id, 100, 'none', None, None, '2026-01-01', None, None, 0))
+
+
+def test_find_assignment_conflicts_batch(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U2')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C1','PP')")
+    for unit_id, start, end in ((1, '2026-01-01', '2026-03-31'), (1, '2026-07-01', None), (2, '2025-01-01', '2025-12-31')):
+        cur.execute(
+            "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, end_date, rent_amount) VALUES (?, 1, 1, 100, ?, ?, 500)",
+            (unit_id, start, end),
+        )
+    conn.commit()
+    conn.close()
+
+    items = [
+        {'unit_id': 1, 'start_date': '01/04/2026', 'end_date': '30/06/2026'},  # fits the gap
+        {'unit_id': 1, 'start_date': '15/03/2026', 'end_date': '15/07/2026'},  # assignment 1 and item 0
+        {'unit_id': 1, 'start_date': '01/06/2026', 'end_date': '10/06/2026'},  # inside item 0
+        {'unit_id': 2, 'start_date': '01/01/2026'},
+        {'unit_id': 2, 'start_date': '01/01/2030'},  # after item 3's open end
+        {'unit_id': 1, 'assignment_id': 2, 'start_date': '01/08/2026'},  # renewal: its old range no longer counts
+    ]
+    assert asv.find_assignment_conflicts(items) == [
+        {'index': 1, 'unit_id': 1, 'assignment_ids': [1], 'item_indexes': [0]},
+        {'index': 2, 'unit_id': 1, 'assignment_ids': [], 'item_indexes': [0]},
+        {'index': 4, 'unit_id': 2, 'assignment_ids': [], 'item_indexes': [3]},
+    ]
+    assert asv.find_assignment_conflicts([]) == []
+    with pytest.raises(ValueError, match="item 0"):
+        asv.find_assignment_conflicts([{'unit_id': 1, 'start_date': '2026-01-01'}])
+
+
+def test_unit_intervals_overlapping():
+    index = asv.UnitIntervals()
+    index.add('2026-05-01', '2026-05-31', 3)
+    index.add('2026-01-01', '2026-01-31', 1)
+    index.add('2026-03-01', None, 2)
+    assert [r[2] for r in index.overlapping('2026-01-15', '2026-03-01')] == [1, 2]
+    assert index.overlapping('2026-02-01', '2026-02-28') == []
+    index.remove(2)
+    assert [r[2] for r in index.overlapping('2026-02-01', None)] == [3]
+
+
+def test_unit_intervals_with_overlapping_legacy_ranges():
+    index = asv.UnitIntervals()
+    index.add('2020-01-01', None, 1)
+    index.add('2021-01-01', '2021-02-01', 2)
+    assert [r[2] for r in index.overlapping('2022-01-01', '2022-01-31')] == [1]
+    assert [r[2] for r in index.overlapping('2021-01-15', '2021-01-20')] == [1, 2]
+    index.remove(1)
+    assert index.overlapping('2022-01-01', '2022-01-31') == []
+    assert [r[2] for r in index.copy().overlapping('2021-01-31', None)] == [2]
+
+
+def test_find_assignment_conflicts_keeps_range_of_conflicting_update(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U1')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C1','PP')")
+    for start, end in (('2026-01-01', '2026-03-31'), ('2026-04-01', '2026-06-30')):
+        cur.execute(
+            "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, end_date, rent_amount) VALUES (1, 1, 1, 100, ?, ?, 500)",
+            (start, end),
+        )
+    conn.commit()
+    conn.close()
+
+    items = [
+        {'unit_id': 1, 'assignment_id': 2, 'start_date': '01/03/2026', 'end_date': '30/06/2026'},  # overlaps assignment 1
+        {'unit_id': 1, 'start_date': '01/05/2026', 'end_date': '31/05/2026'},  # assignment 2 still holds May
+    ]
+    assert asv.find_assignment_conflicts(items) == [
+        {'index': 0, 'unit_id': 1, 'assignment_ids': [1], 'item_indexes': []},
+        {'index': 1, 'unit_id': 1, 'assignment_ids': [2], 'item_indexes': []},
+    ]
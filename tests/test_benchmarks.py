@@ -0,0 +1,85 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import database
+from benchmarks import suite
+from benchmarks.synthetic import generate_portfolio
+from database import initialize_database
+
+
+def _setup_db(tmp_path, monkeypatch, name="database.db"):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / name)
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def _dump(db):
+    conn = sqlite3.connect(db)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+            for table in ('owners', 'units', 'ownerships', 'assignments', 'receipt_log', 'payments')
+        }
+    finally:
+        conn.close()
+
+
+def test_generate_portfolio_is_deterministic(tmp_path, monkeypatch):
+    first = _setup_db(tmp_path, monkeypatch, "first.db")
+    counts = generate_portfolio(owners=10, units=40, years=1, seed=7)
+    with pytest.raises(ValueError):
+        generate_portfolio(owners=10, units=40, years=1, seed=7)
+
+    second = _setup_db(tmp_path, monkeypatch, "second.db")
+    assert generate_portfolio(owners=10, units=40, years=1, seed=7) == counts
+    assert _dump(first) == _dump(second)
+
+    data = _dump(first)
+    assert counts['units'] == 40 and counts['assignments'] == len(data['assignments']) == 40
+    # one assignment per unit, as create_assignment allows; shares live in ownerships
+    assert len({a[1] for a in data['assignments']}) == 40
+    assert counts['ownerships'] == len(data['ownerships']) > 40
+    assert counts['receipt_log'] == len(data['receipt_log']) > 0
+    assert 0 < counts['payments'] < counts['receipt_log']
+    assert {a[5] for a in data['assignments']} <= {'none', 'odd_even', 'cycle'}
+    # derived tables stay consistent with the generated history
+    conn = sqlite3.connect(first)
+    billed = conn.execute("SELECT ROUND(SUM(billed), 2) FROM owner_year_ledger").fetchone()[0]
+    assert billed == round(sum(r[8] for r in data['receipt_log']), 2)
+    conn.close()
+
+
+def test_run_benchmarks_writes_comparable_results(tmp_path, monkeypatch):
+    monkeypatch.setitem(suite.SCALES, 'tiny', {'owners': 5, 'units': 20, 'years': 1})
+    saved = database.DB_PATH
+    out = tmp_path / "bench.json"
+
+    report = suite.run_benchmarks(['tiny'], out_path=out, workdir=tmp_path / "bench")
+    assert database.DB_PATH == saved
+    assert json.loads(out.read_text()) == report
+    [result] = report['results']
+    names = [w['name'] for w in result['workflows']]
+    assert names[0] == 'generate_portfolio' and 'generate_taxes_report' in names
+    assert all(w['seconds'] >= 0 and w['rows'] >= 0 for w in result['workflows'])
+
+    comparison = suite.compare_results(out, report)
+    assert [c['name'] for c in comparison] == names
+    assert all(c['before_s'] == c['after_s'] for c in comparison)
+
+    assert suite.check_thresholds(report) == []
+    monkeypatch.setitem(suite.THRESHOLDS, 'tiny', {'generate_portfolio': 0.0, 'aging_report': 60.0})
+    assert [(o['name'], o['threshold_s']) for o in suite.check_thresholds(out)] == [('generate_portfolio', 0.0)]
+
+    with pytest.raises(ValueError):
+        suite.run_benchmarks(['huge'])
@@ -0,0 +1,102 @@
+import sqlite3
+from pathlib import Path
+
+from database import initialize_database
+import services.dashboard_service as dsvc
+import services.receipt_service as rsvc
+import services.payments_service as psvc
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def test_dashboard_counts_recent_and_kpis(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-D')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-D','PP')")
+    for i in range(3):
+        cur.execute("INSERT INTO units (reference) VALUES (?)", (f"U-D{i}",))
+    cur.execute(
+        """
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (1, 1, 1, 100, 'none', NULL, NULL, '2026-01-01', NULL, 1000, 0),
+               (2, 1, 1, 100, 'none', NULL, NULL, '2025-01-01', '2025-12-31', 500, 0)
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    counts = dsvc.get_counts(today='2026-03-15')
+    assert counts == {'owners': 1, 'units': 3, 'clients': 1, 'assignments': 2, 'active_assignments': 1}
+
+    for month in ('01/2026', '02/2026', '03/2026'):
+        rsvc.batch_generate_receipts_for_month(month, '05/' + month)
+
+    recent = dsvc.get_recent_receipts(2)
+    assert [r['period'] for r in recent] == ['2026-03-01', '2026-02-01']
+    assert recent[0]['unit_reference'] == 'U-D0'
+
+    kpis = dsvc.get_monthly_kpis('2026-02-01')
+    assert kpis == {'period': '2026-02-01', 'receipts': 1, 'billed': 1000.0, 'received': 0.0, 'outstanding': 1000.0}
+
+    # a payment on this thread's connection invalidates the cached figures
+    psvc.create_payment(recent[1]['uid'], 400, '2026-02-10')
+    assert dsvc.get_monthly_kpis('2026-02-01')['outstanding'] == 600.0
+
+    # so does a write made through another connection
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO owners (name) VALUES ('O-D2')")
+    conn.commit()
+    conn.close()
+    assert dsvc.get_counts(today='2026-03-15')['owners'] == 2
+
+
+def test_dashboard_cache_is_not_shared_stale_across_threads(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    import threading
+
+    import database
+    import services.owner_service as osvc
+
+    def on_thread(fn):
+        out = []
+
+        def run():
+            try:
+                out.append(fn())
+            finally:
+                database.close_connection()
+
+        t = threading.Thread(target=run)
+        t.start()
+        t.join()
+        return out[0]
+
+    # thread A caches the empty figures, thread B writes, thread C must see the write
+    assert on_thread(lambda: dsvc.get_counts(today='2026-03-15'))['owners'] == 0
+    assert on_thread(lambda: dsvc.get_monthly_kpis('2026-02-01'))['receipts'] == 0
+    on_thread(lambda: osvc.create_owner('O-T'))
+    assert on_thread(lambda: dsvc.get_counts(today='2026-03-15'))['owners'] == 1
+
+    # and concurrent readers on several threads all get current numbers
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(on_thread(lambda: dsvc.get_counts(today='2026-03-15')['owners'])))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [1, 1, 1, 1]
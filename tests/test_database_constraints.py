@@ -140,3 +140,22 @@ def test_assignment_rent_amount_not_null(tmp_path, monkeypatch):
         )
 
     conn.close()
+
+
+def test_yearly_owner_queries_use_indexes(tmp_path, monkeypatch):
+    db_path = _setup_db(tmp_path, monkeypatch)
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute(
+        "EXPLAIN QUERY PLAN SELECT COALESCE(SUM(p.amount_received), 0.0) FROM payments p "
+        "JOIN receipt_log rl ON p.receipt_log_uid = rl.uid "
+        "WHERE rl.owner_id = ? AND rl.period >= ? AND rl.period < ?",
+        (1, '2026-01-01', '2027-01-01'),
+    )
+    details = [r[3] for r in cur.fetchall()]
+    conn.close()
+
+    assert any('idx_receipt_log_owner_period' in d for d in details)
+    assert any('idx_payments_receipt_log_uid' in d for d in details)
+    assert not any(d.startswith('SCAN') for d in details)
@@ -50,3 +50,78 @@ def test_initialize_database_success(tmp_path, monkeypatch):
     rows = cur.fetchall()
     conn.close()
     assert len(rows) == 1
+
+
+def _old_schema_db(tmp_path, monkeypatch):
+    """A database created by a schema without the receipt_log unique index, holding duplicate receipts."""
+    project_root = Path(__file__).resolve().parents[1]
+    schema = (project_root / 'sql' / 'schema.sql').read_text()
+    index = ("CREATE UNIQUE INDEX IF NOT EXISTS ux_receipt_log_assignment_period_owner\n"
+             "    ON receipt_log (assignment_id, period, owner_id);")
+    assert index in schema
+    old_schema = tmp_path / 'old_schema.sql'
+    old_schema.write_text(schema.replace(index, ''))
+    schema_file = tmp_path / 'schema.sql'
+    schema_file.write_text(schema)
+    db_path = Path(tmp_path / 'database.db')
+    monkeypatch.setattr(__import__('database'), 'DB_PATH', db_path)
+    monkeypatch.setattr(__import__('database'), 'SCHEMA_PATH', old_schema)
+    initialize_database()
+    monkeypatch.setattr(__import__('database'), 'SCHEMA_PATH', schema_file)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO owners (name) VALUES ('O')")
+    conn.execute("INSERT INTO clients (name, client_type) VALUES ('C', 'PP')")
+    conn.execute("INSERT INTO units (reference) VALUES ('U')")
+    conn.execute(
+        "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, rent_amount) VALUES (1, 1, 1, 100, '2026-01-01', 800)"
+    )
+    # January generated twice, February once
+    for receipt_id, period in ((1, '2026-01-01'), (2, '2026-01-01'), (3, '2026-02-01')):
+        conn.execute("INSERT INTO receipts (id, assignment_id) VALUES (?, 1)", (receipt_id,))
+        conn.execute(
+            "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount)"
+            " VALUES (?, 1, 1, 1, ?, ?, ?, 800)",
+            (receipt_id, receipt_id, period, period),
+        )
+    conn.execute("INSERT INTO payments (receipt_log_uid, amount_received, received_at) VALUES (2, 300, '2026-01-10')")
+    conn.commit()
+    return db_path, conn
+
+
+def test_upgrade_merges_duplicate_receipt_logs(tmp_path, monkeypatch):
+    db_path, conn = _old_schema_db(tmp_path, monkeypatch)
+    conn.close()
+
+    initialize_database()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT uid, receipt_id, period FROM receipt_log ORDER BY uid").fetchall() == [
+        (1, 1, '2026-01-01'), (3, 3, '2026-02-01'),
+    ]
+    assert conn.execute("SELECT id FROM receipts ORDER BY id").fetchall() == [(1,), (3,)]
+    # the payment made against the removed duplicate now pays the kept receipt
+    assert conn.execute("SELECT receipt_log_uid, amount_received FROM payments").fetchall() == [(1, 300.0)]
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ux_receipt_log_assignment_period_owner'"
+    ).fetchone()
+    assert conn.execute("SELECT billed, received FROM owner_year_ledger").fetchall() == [(1600.0, 300.0)]
+    assert conn.execute("SELECT uid, balance FROM open_receivables ORDER BY uid").fetchall() == [(1, 500.0), (3, 800.0)]
+    conn.close()
+
+
+def test_upgrade_refuses_conflicting_duplicates(tmp_path, monkeypatch):
+    db_path, conn = _old_schema_db(tmp_path, monkeypatch)
+    conn.execute("UPDATE receipt_log SET amount = 750 WHERE uid = 2")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(sqlite3.DatabaseError, match="different amounts"):
+        initialize_database()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM receipt_log").fetchone()[0] == 3
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ux_receipt_log_assignment_period_owner'"
+    ).fetchone() is None
+    conn.close()
@@ -0,0 +1,221 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+import database
+from database import initialize_database, get_connection, transaction
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def test_connection_reused_on_same_thread(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    c1 = get_connection()
+    c1.close()
+    c2 = get_connection()
+    c2.close()
+    assert c1 is c2
+    # still usable after close()
+    assert c2.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_connection_per_thread(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    main_conn = get_connection()
+    main_conn.close()
+    seen = []
+
+    def worker():
+        c = get_connection()
+        seen.append(c)
+        c.close()
+        database.close_connection()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert seen and seen[0] is not main_conn
+
+
+def test_new_connection_when_db_path_changes(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    c1 = get_connection()
+    c1.close()
+    monkeypatch.setattr(database, 'DB_PATH', Path(tmp_path / "other.db"))
+    c2 = get_connection()
+    c2.close()
+    assert c1 is not c2
+
+
+def test_transaction_commits_and_rolls_back(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    with transaction() as conn:
+        conn.execute("INSERT INTO owners (name) VALUES ('T-OK')")
+
+    with pytest.raises(RuntimeError):
+        with transaction() as conn:
+            conn.execute("INSERT INTO owners (name) VALUES ('T-FAIL')")
+            raise RuntimeError("boom")
+
+    conn = get_connection()
+    names = [r[0] for r in conn.execute("SELECT name FROM owners ORDER BY id")]
+    conn.close()
+    assert names == ['T-OK']
+
+
+def test_nested_close_keeps_outer_transaction(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    import services.owner_service as osvc
+
+    with transaction() as conn:
+        conn.execute("INSERT INTO owners (name) VALUES ('Outer')")
+        # a service call inside the block checks out and releases the same connection
+        osvc.list_owners()
+        assert conn.in_transaction
+
+    owners = osvc.list_owners()
+    assert [o['name'] for o in owners] == ['Outer']
+
+
+def test_failure_rolls_back_nested_service_writes(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    import services.client_service as csvc
+    import services.owner_service as osvc
+    import services.unit_service as usvc
+
+    usvc.create_unit('Kept')
+    with pytest.raises(RuntimeError):
+        with transaction() as conn:
+            # service writes join the enclosing transaction instead of committing it
+            osvc.create_owner('Nested')
+            csvc.create_client('Nested', 'PP')
+            usvc.update_unit(1, reference='Renamed')
+            assert conn.in_transaction
+            raise RuntimeError("boom")
+
+    assert osvc.list_owners() == []
+    assert csvc.list_clients() == []
+    assert usvc.get_unit(1)['reference'] == 'Kept'
+
+
+def test_storage_profile_applied(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    conn = get_connection()
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    finally:
+        conn.close()
+
+
+def test_concurrent_writers_queue_while_reader_runs(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    with transaction() as conn:
+        conn.executemany("INSERT INTO owners (name) VALUES (?)", [(f"R{i}",) for i in range(50)])
+
+    # a reader holds an open read transaction for the whole test
+    reader = get_connection()
+    cur = reader.execute("SELECT name FROM owners")
+    cur.fetchone()
+
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(20):
+                with transaction(immediate=True) as conn:
+                    conn.execute("INSERT INTO owners (name) VALUES (?)", (f"W{n}-{i}",))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+        finally:
+            database.close_connection()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(cur.fetchall()) == 49  # the reader's snapshot is unaffected
+    reader.close()
+    assert database.pending_writes() == 0
+    conn = get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM owners").fetchone()[0] == 130
+    conn.close()
+
+
+def test_service_writes_go_through_the_write_queue(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    import time
+    import services.client_service as csvc
+    import services.owner_service as osvc
+
+    errors = []
+
+    def service_writer(n):
+        try:
+            for i in range(15):
+                osvc.create_owner(f"S{n}-{i}")
+                csvc.create_client(f"S{n}-{i}", 'PP')
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+        finally:
+            database.close_connection()
+
+    # while this thread holds the writer slot, a service write from another thread queues behind it
+    with transaction(immediate=True) as conn:
+        conn.execute("INSERT INTO owners (name) VALUES ('First')")
+        blocked = threading.Thread(target=service_writer, args=(0,))
+        blocked.start()
+        deadline = time.monotonic() + 5
+        while database.pending_writes() < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert database.pending_writes() == 2
+    other = threading.Thread(target=service_writer, args=(1,))
+    other.start()
+    blocked.join()
+    other.join()
+
+    assert errors == []
+    assert database.pending_writes() == 0
+    names = [o['name'] for o in osvc.list_owners()]
+    assert names[0] == 'First' and len(names) == 31
+    assert len(csvc.list_clients()) == 30
+
+
+def test_connection_of_exited_thread_is_released(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    import gc
+    import weakref
+
+    refs = []
+
+    def worker():
+        # no close_connection(): the thread just ends
+        conn = get_connection()
+        conn.execute("SELECT 1")
+        conn.close()
+        refs.append(weakref.ref(conn))
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    del t
+    gc.collect()
+    assert refs[0]() is None
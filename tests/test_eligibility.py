@@ -0,0 +1,108 @@
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database import initialize_database
+import services.eligibility as elig
+from services import forecast_service
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def _assignment(alternation_type='none', cycle_length=None, cycle_position=None, start_date='2026-01-01', end_date=None):
+    return {
+        'alternation_type': alternation_type, 'cycle_length': cycle_length, 'cycle_position': cycle_position,
+        'start_date': start_date, 'end_date': end_date,
+    }
+
+
+def test_eligibility_rules():
+    months = [(2026, m) for m in range(1, 13)]
+    cases = [
+        (_assignment(), [True] * 12),
+        (_assignment(start_date='2026-03-15', end_date='2026-06-10'), [m in (4, 5, 6) for m in range(1, 13)]),
+        (_assignment('odd_even', cycle_position=1), [m % 2 == 1 for m in range(1, 13)]),
+        (_assignment('odd_even', cycle_position=2), [m % 2 == 0 for m in range(1, 13)]),
+        (_assignment('cycle', cycle_length=2, start_date='2025-12-01'), [m in (1, 4, 5, 8, 9, 12) for m in range(1, 13)]),
+        (_assignment(start_date='01/02/2026'), [m >= 2 for m in range(1, 13)]),
+    ]
+    matrix = elig.eligibility_matrix([a for a, _ in cases], months)
+    for i, (assignment, expected) in enumerate(cases):
+        assert [bool(matrix[i][j]) for j in range(12)] == expected
+        assert [elig.is_eligible(assignment, 2026, m) for m in range(1, 13)] == expected
+    assert elig.eligible_by_month([a for a, _ in cases], [(2026, 3)]) == [[0, 2, 5]]
+
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    if elig.np is None:
+        pytest.skip("NumPy not installed")
+    rng = random.Random(7)
+    assignments = []
+    for _ in range(300):
+        start = f"{rng.randint(2020, 2027)}-{rng.randint(1, 12):02d}-{rng.choice(['01', '15'])}"
+        end = None if rng.random() < 0.5 else f"{int(start[:4]) + rng.randint(0, 3)}-{rng.randint(1, 12):02d}-28"
+        kind = rng.choice(['none', 'odd_even', 'cycle'])
+        assignments.append(_assignment(kind, rng.randint(0, 4), rng.choice([None, 1, 2]), start, end))
+    months = [(y, m) for y in range(2019, 2029) for m in range(1, 13)]
+
+    amounts = [rng.randint(100, 5000) / 4 for _ in assignments]
+    units = [rng.randint(1, 40) for _ in assignments]
+
+    fast = elig.eligibility_matrix(assignments, months)
+    fast_totals = elig.billed_by_month(assignments, months, amounts)
+    fast_groups = elig.billed_groups(assignments, months, units)
+    monkeypatch.setattr(elig, 'np', None)
+    slow = elig.eligibility_matrix(assignments, months)
+    assert fast.tolist() == slow
+    slow_totals = elig.billed_by_month(assignments, months, amounts)
+    assert [c for c, _ in fast_totals] == [c for c, _ in slow_totals]
+    assert [t for _, t in fast_totals] == pytest.approx([t for _, t in slow_totals])
+    assert fast_groups == elig.billed_groups(assignments, months, units)
+
+
+def test_forecast_and_vacancy(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-F')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-F','PP')")
+    for ref in ('U-F1', 'U-F2', 'U-F3'):
+        cur.execute("INSERT INTO units (reference) VALUES (?)", (ref,))
+    for unit_id, alt, position, share, start, end in (
+        (1, 'none', None, 100, '2026-01-01', None),
+        (2, 'odd_even', 1, 50, '2026-01-01', '2026-03-31'),
+    ):
+        cur.execute(
+            "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_position, start_date, end_date, rent_amount)"
+            " VALUES (?, 1, 1, ?, ?, ?, ?, ?, 1000)",
+            (unit_id, share, alt, position, start, end),
+        )
+    conn.commit()
+    conn.close()
+
+    assert forecast_service.forecast_billing('01/2026', '04/2026') == [
+        {'period': '2026-01-01', 'assignments': 2, 'amount': 1500.0},
+        {'period': '2026-02-01', 'assignments': 1, 'amount': 1000.0},
+        {'period': '2026-03-01', 'assignments': 2, 'amount': 1500.0},
+        {'period': '2026-04-01', 'assignments': 1, 'amount': 1000.0},
+    ]
+    assert forecast_service.vacancy_report('01/2026', '04/2026') == [
+        {'unit_id': 2, 'reference': 'U-F2', 'vacant_months': ['2026-02-01', '2026-04-01']},
+        {'unit_id': 3, 'reference': 'U-F3', 'vacant_months': ['2026-01-01', '2026-02-01', '2026-03-01', '2026-04-01']},
+    ]
+    with pytest.raises(ValueError):
+        forecast_service.forecast_billing('05/2026', '04/2026')
@@ -0,0 +1,138 @@
+import csv
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database import initialize_database
+import services.import_service as isvc
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def test_import_portfolio_with_rejects(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+
+    owners = _write_csv(tmp_path / "owners.csv", [
+        ["id", "name", "phone", "legal_id", "family_count"],
+        ["10", "O-I1", "", "", "2"],
+        ["11", "O-I2", "0600", "", ""],
+        ["10", "O-dup", "", "", ""],
+        ["", "", "", "", ""],
+        ["12", "", "", "", ""],
+    ])
+    result = isvc.import_file('owners', owners, chunk_size=2)
+    assert result == {'imported': 2, 'rejected': [(4, "Owner 10 already exists"), (6, "name is required")]}
+
+    assert isvc.import_rows('clients', [{'id': 5, 'name': 'C-I', 'client_type': 'PP'}, {'name': 'C-X', 'client_type': 'XX'}])['imported'] == 1
+    units = [{'id': i, 'reference': f"U-{i}", 'unit_type': 'apt', 'floor': '2'} for i in range(1, 6)]
+    assert isvc.import_rows('units', units, chunk_size=2) == {'imported': 5, 'rejected': []}
+
+    ownerships = _write_csv(tmp_path / "ownerships.csv", [
+        ["unit_id", "owner_id", "share_percent", "alternate", "odd_even"],
+        ["1", "10", "60", "0", ""],
+        ["1", "11", "40", "0", ""],
+        ["1", "11", "10", "0", ""],  # 110% once the previous chunk is counted
+        ["2", "10", "100", "1", "odd"],  # even months would have no owner
+        ["9", "10", "50", "0", ""],
+        ["3", "10", "abc", "0", ""],
+    ])
+    rejects = tmp_path / "rejects.csv"
+    result = isvc.import_file('ownerships', ownerships, rejects_path=rejects, chunk_size=2)
+    assert result['imported'] == 2
+    assert [line for line, _ in result['rejected']] == [4, 5, 6, 7]
+    with open(rejects, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['line', 'error', 'unit_id', 'owner_id', 'share_percent', 'alternate', 'odd_even']
+    assert rows[1][:3] == ['4', 'Odd-month ownership total cannot exceed 100%', '1']
+    assert rows[3][:2] == ['6', 'Unit 9 not found']
+    assert rows[4][:2] == ['7', 'share_percent must be a number']
+
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, end_date, rent_amount)"
+        " VALUES (1, 10, 5, 100, '2026-01-01', '2026-06-30', 1000)"
+    )
+    conn.commit()
+    assignments = [
+        {'unit_id': 1, 'owner_id': 10, 'client_id': 5, 'share_percent': 100, 'start_date': '01/07/2026', 'rent_amount': 900},
+        {'unit_id': 1, 'owner_id': 10, 'client_id': 5, 'share_percent': 100, 'start_date': '01/06/2026', 'end_date': '30/06/2026', 'rent_amount': 900},
+        {'unit_id': 2, 'owner_id': 10, 'client_id': 5, 'share_percent': 100, 'start_date': '01/01/2026', 'end_date': '31/12/2026', 'rent_amount': 800},
+        {'unit_id': 2, 'owner_id': 10, 'client_id': 5, 'share_percent': 100, 'start_date': '01/01/2027', 'rent_amount': 800},
+        {'unit_id': 2, 'owner_id': 10, 'client_id': 5, 'share_percent': 100, 'start_date': '01/02/2027', 'rent_amount': 800},
+        {'unit_id': 3, 'owner_id': 10, 'client_id': 6, 'share_percent': 100, 'start_date': '01/01/2026', 'rent_amount': 800},
+        {'unit_id': 3, 'owner_id': 10, 'client_id': 5, 'share_percent': 100, 'start_date': '2026-01-01', 'rent_amount': 800},
+    ]
+    result = isvc.import_rows('assignments', assignments, chunk_size=3)
+    assert result['imported'] == 3
+    assert result['rejected'] == [
+        (2, "Assignment overlaps with an existing assignment for this unit"),
+        (5, "Assignment overlaps with an existing assignment for this unit"),
+        (6, "Client 6 not found"),
+        (7, "start_date must be in dd/mm/yyyy format"),
+    ]
+    rows = conn.execute("SELECT unit_id, start_date, end_date FROM assignments ORDER BY id").fetchall()
+    assert rows[1:] == [(1, '2026-07-01', None), (2, '2026-01-01', '2026-12-31'), (2, '2027-01-01', None)]
+    conn.close()
+
+
+def test_import_rejects_unknown_kind_and_missing_openpyxl(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    with pytest.raises(ValueError, match="kind must be one of"):
+        isvc.import_rows('payments', [])
+    monkeypatch.setattr(isvc, 'openpyxl', None)
+    with pytest.raises(ValueError, match="openpyxl"):
+        isvc.import_file('owners', tmp_path / "owners.xlsx")
+
+
+def test_failed_chunk_insert_does_not_poison_later_chunks(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    conn.executescript("""
+        CREATE TRIGGER refuse_unit BEFORE INSERT ON units WHEN NEW.reference = 'BAD'
+        BEGIN SELECT RAISE(ABORT, 'unit refused'); END;
+        CREATE TRIGGER refuse_ownership BEFORE INSERT ON ownerships WHEN NEW.share_percent = 99
+        BEGIN SELECT RAISE(ABORT, 'ownership refused'); END;
+    """)
+    conn.close()
+
+    units = [
+        {'id': 1, 'reference': 'U-1'}, {'id': 2, 'reference': 'BAD'},  # chunk refused by the database
+        {'id': 1, 'reference': 'U-1'}, {'id': 2, 'reference': 'U-2'},
+    ]
+    result = isvc.import_rows('units', units, chunk_size=2)
+    assert result['imported'] == 2
+    assert [line for line, _ in result['rejected']] == [1, 2]
+    assert all('unit refused' in message for _, message in result['rejected'])
+
+    isvc.import_rows('owners', [{'id': 1, 'name': 'O-1'}])
+    ownerships = [
+        {'unit_id': 1, 'owner_id': 1, 'share_percent': 99},  # refused, so unit 1 is still at 0%
+        {'unit_id': 1, 'owner_id': 1, 'share_percent': 100},
+    ]
+    result = isvc.import_rows('ownerships', ownerships, chunk_size=1)
+    assert result['imported'] == 1
+    assert [line for line, _ in result['rejected']] == [1]
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT id, reference FROM units ORDER BY id").fetchall() == [(1, 'U-1'), (2, 'U-2')]
+    assert conn.execute("SELECT unit_id, share_percent FROM ownerships").fetchall() == [(1, 100.0)]
+    conn.close()
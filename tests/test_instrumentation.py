@@ -0,0 +1,72 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import instrumentation
+from database import initialize_database
+import services.receipt_service as rsvc
+import services.taxes_service as tsvc
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def test_instrumented_calls_are_recorded_only_when_enabled(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-I')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-I','PP')")
+    for i in range(3):
+        cur.execute("INSERT INTO units (reference) VALUES (?)", (f"U-I{i}",))
+        cur.execute(
+            "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, rent_amount) VALUES (?, 1, 1, 100, '2026-01-01', 1000)",
+            (i + 1,),
+        )
+    conn.commit()
+    conn.close()
+
+    instrumentation.reset()
+    rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026')
+    assert instrumentation.get_calls() == []
+
+    instrumentation.enable(slow_query_ms=0)
+    try:
+        rsvc.batch_generate_receipts_for_month('02/2026', '05/02/2026')
+        tsvc.compute_owner_taxes_for_year(1, 2026)
+    finally:
+        instrumentation.disable()
+        monkeypatch.setattr(instrumentation, '_slow_query_ms', instrumentation.SLOW_QUERY_MS)
+
+    calls = instrumentation.get_calls()
+    assert [c['name'] for c in calls] == ['receipt_service.batch_generate_receipts_for_month', 'taxes_service.compute_owner_taxes_for_year']
+    assert all(c['error'] is None and c['seconds'] > 0 for c in calls)
+    assert calls[0]['statements'] > 0 and calls[1]['statements'] > 0
+    assert calls[1]['rows'] > 0
+    # with a 0 ms threshold every execute/fetch is kept, attributed to the innermost call
+    slow = instrumentation.get_slow_queries()
+    assert sum(c['slow_queries'] for c in calls) == len(slow)
+    assert any('INSERT INTO receipt_log' in q['sql'] for q in slow if q['call'] == calls[0]['name'])
+
+    out = tmp_path / "instrumentation.json"
+    data = json.loads(instrumentation.export_json(out))
+    assert data == json.loads(out.read_text())
+    assert [t['name'] for t in data['summary']] and all(t['calls'] == 1 for t in data['summary'])
+    table = instrumentation.format_summary().splitlines()
+    assert table[0].startswith('name') and len(table) == 4
+
+    # disabled again: pooled connections drop the trace callback
+    rsvc.batch_generate_receipts_for_month('03/2026', '05/03/2026')
+    assert len(instrumentation.get_calls()) == 2
+    instrumentation.reset()
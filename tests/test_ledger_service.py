@@ -0,0 +1,118 @@
+import sqlite3
+from pathlib import Path
+
+from database import initialize_database
+import services.ledger_service as lsvc
+import services.receipt_service as rsvc
+import services.payments_service as psvc
+import services.taxes_service as tsvc
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def _seed(db):
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name, family_count) VALUES ('O-L1', 0)")
+    cur.execute("INSERT INTO owners (name, family_count) VALUES ('O-L2', 1)")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-L','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-L1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-L2')")
+    cur.execute(
+        """
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (1, 1, 1, 100, 'none', NULL, NULL, '2025-01-01', NULL, 1000, 0),
+               (2, 2, 1, 100, 'none', NULL, NULL, '2025-01-01', NULL, 750.5, 0)
+        """
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_ledger_follows_receipts_and_payments(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    _seed(db)
+
+    rsvc.batch_generate_receipts_for_month('12/2025', '05/12/2025')
+    rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026')
+    rsvc.batch_generate_receipts_for_month('02/2026', '05/02/2026')
+    psvc.create_payment(3, 300, '2026-01-10')
+    psvc.create_payment(3, 200, '2026-01-20')
+    psvc.create_payment(4, 750.5, '2026-01-20')
+
+    assert lsvc.get_owner_year_totals(1, 2025) == {'billed': 1000.0, 'received': 0.0, 'receipts': 1}
+    assert lsvc.get_owner_year_totals(1, 2026) == {'billed': 2000.0, 'received': 500.0, 'receipts': 2}
+    assert lsvc.get_owner_year_totals(2, 2026)['received'] == 750.5
+    assert lsvc.get_owner_year_totals(3, 2026) == {'billed': 0.0, 'received': 0.0, 'receipts': 0}
+
+    # raw edits are tracked too
+    conn = sqlite3.connect(db)
+    conn.execute("DELETE FROM payments WHERE amount_received = 200")
+    conn.execute("UPDATE receipt_log SET amount = 1100 WHERE uid = 5")
+    conn.execute("UPDATE receipt_log SET period = '2025-11-01' WHERE uid = 3")
+    conn.commit()
+    conn.close()
+    assert lsvc.get_owner_year_totals(1, 2026) == {'billed': 1100.0, 'received': 0.0, 'receipts': 1}
+    assert lsvc.get_owner_year_totals(1, 2025) == {'billed': 2000.0, 'received': 300.0, 'receipts': 2}
+    assert lsvc.verify_owner_year_ledger() == []
+
+    # two payments on one receipt must not double the billed total
+    psvc.create_payment(5, 100, '2026-02-10')
+    psvc.create_payment(5, 100, '2026-02-11')
+    _, rows = rsvc.generate_receipts_report(2026, csv_format='by-owner')
+    assert rows[0]['total_nominal'] == '1100.00'
+    assert rows[0]['outstanding'] == '900.00'
+
+    res = tsvc.compute_owner_taxes_for_year(1, 2026)
+    assert res['gross_revenue'] == 1100.0
+    assert res['ras_withheld'] == 900.0
+    assert tsvc.compute_taxes_for_year(2026, [1])[0] == res
+
+
+def test_verify_and_rebuild_ledger(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    _seed(db)
+    rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026')
+    psvc.create_payment(1, 400, '2026-01-10')
+
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE owner_year_ledger SET billed = 0 WHERE owner_id = 1")
+    conn.execute("DELETE FROM owner_year_ledger WHERE owner_id = 2")
+    conn.commit()
+    conn.close()
+
+    problems = lsvc.verify_owner_year_ledger()
+    assert [(p['owner_id'], p['year']) for p in problems] == [(1, 2026), (2, 2026)]
+    assert problems[1]['ledger'] is None
+
+    assert lsvc.rebuild_owner_year_ledger() == 2
+    assert lsvc.verify_owner_year_ledger() == []
+    assert lsvc.get_owner_year_totals(1, 2026) == {'billed': 1000.0, 'received': 400.0, 'receipts': 1}
+
+
+def test_ledger_backfilled_for_existing_database(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    _seed(db)
+    rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026')
+
+    # simulate a database created before the ledger existed
+    conn = sqlite3.connect(db)
+    conn.execute("DROP TABLE owner_year_ledger")
+    conn.commit()
+    conn.close()
+
+    initialize_database()
+    assert lsvc.verify_owner_year_ledger() == []
+    assert lsvc.get_owner_year_totals(2, 2026)['billed'] == 750.5
@@ -0,0 +1,30 @@
+import json
+
+import database
+from benchmarks import query_plans
+
+
+def test_service_queries_do_not_scan_large_tables(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_plans, 'LARGE_TABLE_ROWS', 100)
+    saved = database.DB_PATH
+    out = tmp_path / "plans.json"
+
+    result = query_plans.check_query_plans(
+        out_path=out, workdir=tmp_path, portfolio={'owners': 10, 'units': 150, 'years': 1},
+    )
+    assert database.DB_PATH == saved
+    assert json.loads(out.read_text()) == result
+    assert {'assignments', 'receipt_log', 'payments'} <= set(result['large_tables'])
+    assert len(result['statements']) > 30
+    assert not [s for s in result['statements'] if 'error' in s]
+    assert result['flagged'] == 0, query_plans.format_report(result)
+
+
+def test_full_scans_are_flagged(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_plans, 'LARGE_TABLE_ROWS', 100)
+    monkeypatch.setattr(query_plans, 'ALLOWED_SCANS', {})
+
+    result = query_plans.check_query_plans(workdir=tmp_path, portfolio={'owners': 10, 'units': 150, 'years': 1})
+    flagged = [s for s in result['statements'] if s['flagged']]
+    assert any('list_receipt_logs_with_names' in s['steps'] and s['scans'] == ['receipt_log'] for s in flagged)
+    assert "SCAN receipt_log" in query_plans.format_report(result)
@@ -142,3 +142,167 @@ def test_receipt_incrementing_number_and_rounding(tmp_path, monkeypatch):
     assert round(total, 2) == 100.0
 
     conn.close()
+
+
+def _insert_assignment(cur, unit_id, owner_id, client_id, alternation_type='none', cycle_length=None, cycle_position=None, start_date='2026-01-01', share=100, rent=1000):
+    cur.execute("""
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (unit_id, owner_id, client_id, share, alternation_type, cycle_length, cycle_position, start_date, None, rent, 0))
+    return cur.lastrowid
+
+
+def test_batch_generate_filters_alternation(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO owners (name) VALUES ('OB')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('CB','PP')")
+    for ref in ('U-NONE', 'U-ODD', 'U-EVEN', 'U-CYC'):
+        cur.execute("INSERT INTO units (reference) VALUES (?)", (ref,))
+    conn.commit()
+    owner_id = cur.execute("SELECT id FROM owners LIMIT 1").fetchone()[0]
+    client_id = cur.execute("SELECT id FROM clients LIMIT 1").fetchone()[0]
+    units = [r[0] for r in cur.execute("SELECT id FROM units ORDER BY id")]
+
+    a_none = _insert_assignment(cur, units[0], owner_id, client_id, share=50, rent=999.99)
+    a_odd = _insert_assignment(cur, units[1], owner_id, client_id, 'odd_even', cycle_position=1)
+    a_even = _insert_assignment(cur, units[2], owner_id, client_id, 'odd_even', cycle_position=2)
+    # 2 months on, 2 months off starting January: billed Jan, Feb, May, Jun...
+    a_cyc = _insert_assignment(cur, units[3], owner_id, client_id, 'cycle', cycle_length=2, cycle_position=1)
+    conn.commit()
+
+    timings = {}
+    assert rsvc.batch_generate_receipts_for_month('03/2026', '05/03/2026', timings=timings) == 2
+    assert set(timings) == {'select', 'prepare', 'insert', 'commit', 'total'}
+    assert rsvc.batch_generate_receipts_for_month('04/2026', '05/04/2026') == 2
+    assert rsvc.batch_generate_receipts_for_month('05/2026', '05/05/2026') == 3
+
+    cur.execute("SELECT assignment_id, period FROM receipt_log ORDER BY uid")
+    rows = cur.fetchall()
+    assert rows == [
+        (a_none, '2026-03-01'), (a_odd, '2026-03-01'),
+        (a_none, '2026-04-01'), (a_even, '2026-04-01'),
+        (a_none, '2026-05-01'), (a_odd, '2026-05-01'), (a_cyc, '2026-05-01'),
+    ]
+
+    # each log row points at its own receipts row for the same assignment
+    cur.execute("SELECT COUNT(*) FROM receipt_log rl JOIN receipts r ON r.id = rl.receipt_id AND r.assignment_id = rl.assignment_id")
+    assert cur.fetchone()[0] == 7
+    cur.execute("SELECT amount FROM receipt_log WHERE assignment_id = ? LIMIT 1", (a_none,))
+    assert cur.fetchone()[0] == 500.0
+
+    conn.close()
+
+
+def test_batch_generate_range_matches_monthly_and_resumes(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO owners (name) VALUES ('OR')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('CR','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-R1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-R2')")
+    conn.commit()
+    owner_id = cur.execute("SELECT id FROM owners LIMIT 1").fetchone()[0]
+    client_id = cur.execute("SELECT id FROM clients LIMIT 1").fetchone()[0]
+    units = [r[0] for r in cur.execute("SELECT id FROM units ORDER BY id")]
+    a_odd = _insert_assignment(cur, units[0], owner_id, client_id, 'odd_even', cycle_position=1)
+    a_cyc = _insert_assignment(cur, units[1], owner_id, client_id, 'cycle', cycle_length=3, cycle_position=1, start_date='2026-02-01')
+    conn.commit()
+
+    # simulate an interrupted run: only the first chunk (Jan-Mar) was committed
+    real_insert = rsvc._insert_generated_rows
+    calls = []
+
+    def failing_insert(c, rows):
+        if calls:
+            raise RuntimeError("interrupted")
+        calls.append(len(rows))
+        real_insert(c, rows)
+
+    monkeypatch.setattr(rsvc, '_insert_generated_rows', failing_insert)
+    with pytest.raises(RuntimeError):
+        rsvc.batch_generate_receipts_for_range('01/2026', '12/2026', issue_day=5, chunk_months=3)
+    cur.execute("SELECT last_period FROM receipt_generation_checkpoints")
+    assert cur.fetchone()[0] == '2026-03-01'
+
+    monkeypatch.setattr(rsvc, '_insert_generated_rows', real_insert)
+    resumed = rsvc.batch_generate_receipts_for_range('01/2026', '12/2026', issue_day=5, chunk_months=3)
+    assert calls[0] + resumed == cur.execute("SELECT COUNT(*) FROM receipt_log").fetchone()[0]
+    # a finished run generates nothing more
+    assert rsvc.batch_generate_receipts_for_range('01/2026', '12/2026', issue_day=5) == 0
+
+    cur.execute("SELECT assignment_id, period FROM receipt_log ORDER BY period, assignment_id")
+    got = cur.fetchall()
+    odd_months = [(a_odd, f"2026-{m:02d}-01") for m in range(1, 13, 2)]
+    # 3 months on (Feb-Apr), 3 off, then Aug-Oct
+    cyc_months = [(a_cyc, f"2026-{m:02d}-01") for m in (2, 3, 4, 8, 9, 10)]
+    assert got == sorted(odd_months + cyc_months, key=lambda r: (r[1], r[0]))
+    cur.execute("SELECT DISTINCT substr(issue_date, 9, 2) FROM receipt_log")
+    assert cur.fetchall() == [('05',)]
+
+    conn.close()
+
+
+def test_batch_generate_is_idempotent_and_diff(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO owners (name) VALUES ('OI')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('CI','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-I1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-I2')")
+    conn.commit()
+    owner_id = cur.execute("SELECT id FROM owners LIMIT 1").fetchone()[0]
+    client_id = cur.execute("SELECT id FROM clients LIMIT 1").fetchone()[0]
+    units = [r[0] for r in cur.execute("SELECT id FROM units ORDER BY id")]
+    a1 = _insert_assignment(cur, units[0], owner_id, client_id)
+    conn.commit()
+
+    diff = rsvc.diff_receipts_for_month('01/2026', '05/01/2026')
+    assert diff['already_present'] == 0
+    assert [r['assignment_id'] for r in diff['to_add']] == [a1]
+    # dry run writes nothing
+    assert cur.execute("SELECT COUNT(*) FROM receipt_log").fetchone()[0] == 0
+
+    assert rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026') == 1
+    a2 = _insert_assignment(cur, units[1], owner_id, client_id, rent=700)
+    conn.commit()
+
+    diff = rsvc.diff_receipts_for_month('01/2026', '05/01/2026')
+    assert diff['already_present'] == 1
+    assert [(r['assignment_id'], r['amount']) for r in diff['to_add']] == [(a2, 700.0)]
+
+    # retrying only adds the missing receipt
+    assert rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026') == 1
+    assert rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026') == 0
+    assert cur.execute("SELECT COUNT(*) FROM receipt_log").fetchone()[0] == 2
+    assert cur.execute("SELECT COUNT(*) FROM receipts").fetchone()[0] == 2
+
+    with pytest.raises(ValueError):
+        rsvc.create_receipt(a1, '2026-01-01', '2026-01-05', 1000)
+    with pytest.raises(sqlite3.IntegrityError):
+        cur.execute(
+            "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (1, ?, ?, ?, 9, '2026-01-01', '2026-01-05', 1)",
+            (a1, owner_id, client_id),
+        )
+
+    # the batch path updates the summary tables itself; the per-row triggers are back on afterwards
+    from services import ledger_service, receivables_service
+    conn.rollback()
+    assert cur.execute("SELECT COUNT(*) FROM deferred_summaries").fetchone()[0] == 0
+    assert cur.execute("SELECT billed, receipts FROM owner_year_ledger").fetchall() == [(1700.0, 2)]
+    assert cur.execute("SELECT COUNT(*) FROM open_receivables").fetchone()[0] == 2
+    cur.execute(
+        "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (1, ?, ?, ?, 9, '2026-02-01', '2026-02-05', 1000)",
+        (a1, owner_id, client_id),
+    )
+    conn.commit()
+    assert ledger_service.verify_owner_year_ledger() == []
+    assert receivables_service.verify_open_receivables() == []
+
+    conn.close()
@@ -63,3 +63,178 @@ def test_list_receipt_logs_with_names(tmp_path, monkeypatch):
     assert r['client_name'] == 'C-R'
 
     conn.close()
+
+
+def test_list_receipt_logs_page(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO units (reference) VALUES ('U-P')")
+    cur.execute("INSERT INTO owners (name) VALUES ('O-P')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-P','PP')")
+    cur.execute(
+        """
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (1, 1, 1, 100, 'none', NULL, NULL, '2025-01-01', NULL, 300, 0)
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    # Dec 2025 is generated after 2026 so uid order differs from period order
+    for month in ('01/2026', '02/2026', '03/2026', '12/2025'):
+        rsvc.batch_generate_receipts_for_month(month, '05/' + month)
+
+    rows, after = rsvc.list_receipt_logs_page(limit=3)
+    assert [r['uid'] for r in rows] == [1, 2, 3]
+    assert rows[0]['owner_name'] == 'O-P' and rows[0]['unit_reference'] == 'U-P'
+    rows, after = rsvc.list_receipt_logs_page(limit=3, after=after)
+    assert [r['uid'] for r in rows] == [4] and after is None
+
+    rows, after = rsvc.list_receipt_logs_page(limit=2, sort='period')
+    assert [r['period'] for r in rows] == ['2025-12-01', '2026-01-01']
+    rows, after = rsvc.list_receipt_logs_page(limit=2, sort='period', after=after)
+    assert [r['period'] for r in rows] == ['2026-02-01', '2026-03-01']
+    assert after is None
+
+    rows, _ = rsvc.list_receipt_logs_page(year=2026, descending=True)
+    assert [r['period'] for r in rows] == ['2026-03-01', '2026-02-01', '2026-01-01']
+
+
+def test_create_receipts_bulk_modes(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-B1')")
+    cur.execute("INSERT INTO owners (name) VALUES ('O-B2')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-B','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-B1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-B2')")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 1, 70, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 2, 30, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate, odd_even) VALUES (2, 2, 100, 1, 'odd')")
+    for unit_id in (1, 2):
+        cur.execute(
+            """
+            INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+            VALUES (?, 1, 1, 100, 'none', NULL, NULL, '2026-01-01', NULL, 1000, 0)
+            """,
+            (unit_id,),
+        )
+    conn.commit()
+
+    first = rsvc.create_receipt(1, '2026-01-01', '2026-01-05', 1000)
+
+    items = [
+        (1, '2026-02-01', '2026-02-05', 1000.01),
+        {'assignment_id': 2, 'period': '2026-01-01', 'issue_date': '2026-01-05', 'total_amount': 500, 'base_label': 'feed'},
+        (1, '2026-01-01', '2026-01-05', 1000),  # already exists
+        (2, '2026-02-01', '2026-02-05', 500),  # no ownership in even months
+        (9, '2026-01-01', '2026-01-05', 500),  # unknown assignment
+        (1, '2026-03-01', '2026-03-05', 1000),
+    ]
+    with pytest.raises(ValueError, match="3 invalid"):
+        rsvc.create_receipts_bulk(items)
+    assert cur.execute("SELECT COUNT(*) FROM receipts").fetchone()[0] == 1
+
+    result = rsvc.create_receipts_bulk(items, partial=True)
+    assert [i for i, _ in result['errors']] == [2, 3, 4]
+    assert result['created'] == [first + 1, first + 2, first + 3]
+
+    rows = cur.execute(
+        "SELECT receipt_id, assignment_id, owner_id, receipt_no, period, amount FROM receipt_log ORDER BY uid"
+    ).fetchall()
+    assert rows[2:] == [
+        (first + 1, 1, 1, 2, '2026-02-01', 700.01),
+        (first + 1, 1, 2, 2, '2026-02-01', 300.0),
+        (first + 2, 2, 2, 1, '2026-01-01', 500.0),
+        (first + 3, 1, 1, 3, '2026-03-01', 700.0),
+        (first + 3, 1, 2, 3, '2026-03-01', 300.0),
+    ]
+    assert cur.execute("SELECT base_label FROM receipts WHERE id = ?", (first + 2,)).fetchone()[0] == 'feed'
+
+    # duplicates inside one batch are rejected too
+    result = rsvc.create_receipts_bulk([(2, '2026-03-01', '2026-03-05', 10), (2, '2026-03-01', '2026-03-05', 10)], partial=True)
+    assert len(result['created']) == 1 and result['errors'][0][0] == 1
+
+    # items are validated up front: ids given as strings are coerced, bad values reported per item
+    result = rsvc.create_receipts_bulk([
+        ('1', '01/04/2026', '05/04/2026', '1000'),
+        ('one', '2026-05-01', '2026-05-05', 1000),
+        (1, '2026-05-01', '2026-13-45', 1000),
+        (1, '2026-06-01', '2026-06-05', 'lots'),
+        (1.5, '2026-07-01', '2026-07-05', 1000),
+    ], partial=True)
+    assert len(result['created']) == 1
+    assert [(i, msg.split()[0]) for i, msg in result['errors']] == [
+        (1, 'assignment_id'), (2, 'issue_date'), (3, 'total_amount'), (4, 'assignment_id'),
+    ]
+    assert cur.execute(
+        "SELECT DISTINCT period, issue_date FROM receipt_log WHERE receipt_id = ?", (result['created'][0],)
+    ).fetchall() == [('2026-04-01', '2026-04-05')]
+    conn.close()
+
+
+def test_receipt_numbering_schemes(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-N1')")
+    cur.execute("INSERT INTO owners (name) VALUES ('O-N2')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-N','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-N1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-N2')")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 1, 100, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (2, 1, 50, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (2, 2, 50, 0)")
+    for unit_id, owner_id in ((1, 1), (2, 2)):
+        cur.execute(
+            """
+            INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+            VALUES (?, ?, 1, 100, 'none', NULL, NULL, '2026-01-01', NULL, 1000, 0)
+            """,
+            (unit_id, owner_id),
+        )
+    # a receipt written before receipt_sequences existed seeds the counter
+    cur.execute("INSERT INTO receipts (assignment_id) VALUES (1)")
+    cur.execute(
+        "INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount)"
+        " VALUES (1, 1, 1, 1, 7, '2025-12-01', '2025-12-05', 1000)"
+    )
+    conn.commit()
+
+    # per_assignment (default): create_receipt, batch generation and bulk share one counter
+    rsvc.create_receipt(1, '2026-01-01', '2026-01-05', 1000)
+    assert rsvc.batch_generate_receipts_for_month('02/2026', '05/02/2026') == 2
+    rsvc.create_receipts_bulk([(1, '2026-03-01', '2026-03-05', 1000), (2, '2026-03-01', '2026-03-05', 1000)])
+    numbers = cur.execute("SELECT assignment_id, period, receipt_no FROM receipt_log WHERE owner_id = 1 ORDER BY uid").fetchall()
+    assert numbers == [
+        (1, '2025-12-01', 7), (1, '2026-01-01', 8), (1, '2026-02-01', 9),
+        (1, '2026-03-01', 10), (2, '2026-03-01', 2),
+    ]
+    assert cur.execute("SELECT last_no FROM receipt_sequences WHERE scope = 'assignment:1'").fetchone()[0] == 10
+
+    # per_owner_year: every owner's receipt_log rows are numbered per year
+    monkeypatch.setattr(__import__("config"), 'RECEIPT_NUMBERING', 'per_owner_year')
+    rsvc.create_receipt(2, '2026-04-01', '2026-04-05', 1000)
+    rows = cur.execute("SELECT owner_id, receipt_no FROM receipt_log WHERE period = '2026-04-01' ORDER BY owner_id").fetchall()
+    assert rows == [(1, 11), (2, 3)]
+
+    # global: one counter for every receipt, seeded from the highest number in use
+    monkeypatch.setattr(__import__("config"), 'RECEIPT_NUMBERING', 'global')
+    result = rsvc.create_receipts_bulk([(1, '2026-05-01', '2026-05-05', 1000), (2, '2026-05-01', '2026-05-05', 1000)])
+    rows = cur.execute("SELECT receipt_id, receipt_no FROM receipt_log WHERE period = '2026-05-01' ORDER BY uid").fetchall()
+    assert rows == [(result['created'][0], 12), (result['created'][1], 13), (result['created'][1], 13)]
+
+    # back to per_assignment: the old assignment:1 counter (10) is stale, numbers go on after 12
+    monkeypatch.setattr(__import__("config"), 'RECEIPT_NUMBERING', 'per_assignment')
+    rsvc.create_receipt(1, '2026-06-01', '2026-06-05', 1000)
+    assert rsvc.batch_generate_receipts_for_month('07/2026', '05/07/2026') == 2
+    rows = cur.execute("SELECT assignment_id, receipt_no FROM receipt_log WHERE period >= '2026-06-01' ORDER BY uid").fetchall()
+    assert rows == [(1, 13), (1, 14), (2, 14)]
+    assert cur.execute("SELECT assignment_id, receipt_no FROM receipt_log GROUP BY 1, 2 HAVING COUNT(DISTINCT receipt_id) > 1").fetchall() == []
+
+    monkeypatch.setattr(__import__("config"), 'RECEIPT_NUMBERING', 'daily')
+    with pytest.raises(ValueError, match="numbering scheme"):
+        rsvc.create_receipt(1, '2026-08-01', '2026-08-05', 1000)
+    conn.close()
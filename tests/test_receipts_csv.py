@@ -1,5 +1,6 @@
 from pathlib import Path
 import sqlite3
+import pytest
 from database import initialize_database
 import services.receipt_service as rsvc
 
@@ -126,4 +127,118 @@ def test_cli_export_receipts_stdout(tmp_path, monkeypatch, capsys):
     captured = capsys.readouterr()
     # Should contain CSV headers for detailed format
     assert 'uid,receipt_id,assignment_id,unit_reference,owner_id,owner_name' in captured.out
-    assert '500.00' in captured.out
\ No newline at end of file
+    assert '500.00' in captured.out
+
+def test_iter_receipts_report_streams_to_file(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO owners (name, family_count, legal_id) VALUES ('OS', 0, 'LIDS')")
+    cur.execute("INSERT INTO clients (name, client_type, legal_id) VALUES ('CS','PP','CLIDS')")
+    owner_id, client_id = 1, 1
+    for i in range(5):
+        cur.execute("INSERT INTO units (reference, city) VALUES (?, 'CS')", (f"US{i}",))
+        cur.execute(
+            """
+            INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+            VALUES (?, ?, ?, 100, 'none', NULL, NULL, '2026-01-01', NULL, ?, 0)
+            """,
+            (cur.lastrowid, owner_id, client_id, 100 * (i + 1)),
+        )
+    conn.commit()
+    conn.close()
+
+    assert rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026') == 5
+
+    headers, rows = rsvc.iter_receipts_report(2026, csv_format='detailed', batch_size=2)
+    assert not isinstance(rows, list)
+    out = tmp_path / 'receipts.csv'
+    rsvc.write_csv_file(str(out), headers, rows)
+    lines = out.read_text().splitlines()
+    assert len(lines) == 6
+    assert lines[-1].endswith(',500.00,0.00,500.00')
+
+    assert list(rsvc.iter_receipts_report(2026, csv_format='by-owner')[1]) == rsvc.generate_receipts_report(2026, csv_format='by-owner')[1]
+
+
+def _seed_paid_receipt(db):
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name, family_count, legal_id) VALUES ('OT', 0, 'LIDT')")
+    cur.execute("INSERT INTO units (reference, city) VALUES ('UT','CT')")
+    cur.execute("INSERT INTO clients (name, client_type, legal_id) VALUES ('CT','PP','CLIDT')")
+    cur.execute(
+        """
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (1, 1, 1, 100, 'none', NULL, NULL, '2026-01-01', NULL, 1000, 0)
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    assert rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026') == 1
+    import services.payments_service as psvc
+    psvc.create_payment(1, 400, '2026-01-06')
+
+
+def test_export_receipts_report_ndjson(tmp_path, monkeypatch):
+    import json
+    from services.report_export import write_report, export_format_for_path
+
+    db = _setup_db(tmp_path, monkeypatch)
+    _seed_paid_receipt(db)
+
+    out = tmp_path / 'receipts.ndjson'
+    assert export_format_for_path(out) == 'ndjson'
+    headers, rows = rsvc.iter_receipts_report(2026, csv_format='detailed', typed=True)
+    write_report(str(out), headers, rows, 'ndjson', rsvc.RECEIPTS_REPORT_COLUMN_TYPES)
+
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(records) == 1
+    assert list(records[0]) == headers
+    assert records[0]['amount'] == 1000.0
+    assert records[0]['amount_received'] == 400.0
+    assert records[0]['balance'] == 600.0
+    assert records[0]['receipt_no'] == 1
+
+
+def test_report_columns_match_typed_rows(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    _seed_paid_receipt(db)
+    import services.payments_service as psvc
+    psvc.create_payment(1, 0.125, '2026-01-07')
+
+    for fmt in ('detailed', 'by-owner', 'minimal'):
+        headers, rows = rsvc.iter_receipts_report(2026, csv_format=fmt, typed=True)
+        rows = list(rows)
+        col_headers, batches = rsvc.iter_receipts_report_columns(2026, csv_format=fmt, batch_size=1)
+        columns = {h: [] for h in col_headers}
+        for batch in batches:
+            assert list(batch) == headers
+            for h, values in batch.items():
+                columns[h].extend(values)
+        assert col_headers == headers
+        assert columns == {h: [row[h] for row in rows] for h in headers}
+        assert all(isinstance(v, float) for v in columns[headers[-1]])
+
+
+def test_export_receipts_report_arrow_and_parquet(tmp_path, monkeypatch):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    from services.report_export import write_column_batches, write_report
+
+    db = _setup_db(tmp_path, monkeypatch)
+    _seed_paid_receipt(db)
+
+    headers, rows = rsvc.iter_receipts_report(2026, csv_format='by-owner', typed=True)
+    write_report(str(tmp_path / 'r.arrow'), headers, rows, 'arrow', rsvc.RECEIPTS_REPORT_COLUMN_TYPES, batch_size=1)
+    table = pa.ipc.open_file(str(tmp_path / 'r.arrow')).read_all()
+    assert table.schema.field('total_nominal').type == pa.float64()
+    assert table.column('outstanding').to_pylist() == [600.0]
+
+    headers, batches = rsvc.iter_receipts_report_columns(2026, csv_format='detailed')
+    write_column_batches(str(tmp_path / 'r.parquet'), headers, batches, 'parquet', rsvc.RECEIPTS_REPORT_COLUMN_TYPES)
+    table = pq.read_table(str(tmp_path / 'r.parquet'))
+    assert table.column_names == headers
+    assert table.column('uid').type == pa.int64()
@@ -0,0 +1,71 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database import initialize_database
+import services.payments_service as psvc
+import services.receipt_service as rsvc
+import services.receivables_service as rec
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def test_aging_report_follows_payments(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-A1')")
+    cur.execute("INSERT INTO owners (name) VALUES ('O-A2')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-A','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-A')")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 1, 50, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 2, 50, 0)")
+    cur.execute(
+        "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, rent_amount) VALUES (1, 1, 1, 100, '2026-01-01', 1000)"
+    )
+    conn.commit()
+
+    rsvc.create_receipt(1, '2026-01-01', '2026-01-01', 1000)  # 120 days old on 2026-05-01
+    rsvc.create_receipt(1, '2026-03-01', '2026-03-01', 1000)  # 61 days
+    rsvc.create_receipt(1, '2026-04-01', '2026-04-10', 1000)  # 21 days
+    uids = [r[0] for r in cur.execute("SELECT uid FROM receipt_log WHERE owner_id = 1 ORDER BY uid")]
+    psvc.create_payment(uids[0], 200.0, '2026-02-01')
+    psvc.create_payment(uids[1], 500.0, '2026-03-05')  # paid in full: leaves the index
+
+    report = rec.aging_report('owner', as_of='2026-05-01')
+    assert report == [
+        {'id': 1, 'name': 'O-A1', 'current': 500.0, 'days_30': 0.0, 'days_60': 0.0, 'days_90_plus': 300.0, 'total': 800.0, 'receipts': 2},
+        {'id': 2, 'name': 'O-A2', 'current': 500.0, 'days_30': 0.0, 'days_60': 500.0, 'days_90_plus': 500.0, 'total': 1500.0, 'receipts': 3},
+    ]
+    assert rec.aging_report('unit', as_of='2026-05-01')[0]['total'] == 2300.0
+    assert [r['balance'] for r in rec.list_outstanding(owner_id=1)] == [300.0, 500.0]
+
+    # deleting and editing payments reopens / adjusts balances
+    cur.execute("DELETE FROM payments WHERE receipt_log_uid = ?", (uids[1],))
+    cur.execute("UPDATE payments SET amount_received = 450 WHERE receipt_log_uid = ?", (uids[0],))
+    conn.commit()
+    assert [r['balance'] for r in rec.list_outstanding(owner_id=1)] == [50.0, 500.0, 500.0]
+    assert rec.verify_open_receivables() == []
+
+    cur.execute("DELETE FROM open_receivables")
+    conn.commit()
+    assert len(rec.verify_open_receivables()) == 6
+    assert rec.rebuild_open_receivables() == 6
+    assert rec.verify_open_receivables() == []
+
+    with pytest.raises(ValueError):
+        rec.aging_report('year')
+    conn.close()
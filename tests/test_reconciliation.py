@@ -0,0 +1,121 @@
+import csv
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database import initialize_database
+import services.payments_service as psvc
+import services.receipt_service as rsvc
+from services.reconciliation_service import _parse_cents, reconcile_bank_statement
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def test_reconcile_bank_statement(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-R1')")
+    cur.execute("INSERT INTO owners (name) VALUES ('O-R2')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('Tenant A','PP')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('Tenant B','PP')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-R1')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-R2')")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 1, 60, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (1, 2, 40, 0)")
+    cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (2, 2, 100, 0)")
+    for unit_id, client_id in ((1, 1), (2, 2)):
+        cur.execute(
+            "INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, start_date, rent_amount) VALUES (?, 1, ?, 100, '2026-01-01', 1000)",
+            (unit_id, client_id),
+        )
+    conn.commit()
+    r_jan = rsvc.create_receipt(1, '2026-01-01', '2026-01-05', 1000)
+    r_feb = rsvc.create_receipt(1, '2026-02-01', '2026-02-05', 1000)
+    r_b = rsvc.create_receipt(2, '2026-01-01', '2026-01-05', 750)
+    # Tenant B already paid part of January
+    uid_b = cur.execute("SELECT uid FROM receipt_log WHERE receipt_id = ?", (r_b,)).fetchone()[0]
+    psvc.create_payment(uid_b, 250.0, '2026-01-10')
+
+    statement = tmp_path / "statement.csv"
+    with open(statement, 'w', newline='') as f:
+        csv.writer(f).writerows([
+            ["Date", "Amount", "Client", "Client_ID", "Period", "Reference"],
+            ["03/02/2026", "1,000.00", "tenant a", "", "02/2026", "TRF-1"],  # February by period
+            ["04/02/2026", "1000", "Tenant A", "", "", "TRF-2"],  # oldest open: January
+            ["05/02/2026", "1000", "Tenant A", "", "", "TRF-3"],  # nothing left to pay
+            ["05/02/2026", "500,00", "", "2", "", ""],  # rest of Tenant B's January
+            ["06/02/2026", "99", "Nobody", "", "", ""],
+            ["bad", "10", "Tenant A", "", "", ""],
+        ])
+
+    review = tmp_path / "review.csv"
+    # a dry run only reads: it works while another connection holds the write lock
+    cur.execute("BEGIN IMMEDIATE")
+    preview = reconcile_bank_statement(statement, dry_run=True)
+    conn.rollback()
+    assert preview['payments'] == 0 and len(preview['matched']) == 3
+    assert cur.execute("SELECT COUNT(*) FROM payments").fetchone()[0] == 1
+
+    result = reconcile_bank_statement(statement, review_path=review)
+    assert [(m['line'], m['receipt_id']) for m in result['matched']] == [(2, r_feb), (3, r_jan), (5, r_b)]
+    assert result['unmatched'] == [
+        (4, "no open receipt for this client and amount"),
+        (6, "unknown client: Nobody"),
+        (7, "date must be dd/mm/yyyy or yyyy-mm-dd"),
+    ]
+    assert result['payments'] == 5
+    rows = cur.execute(
+        "SELECT rl.receipt_id, rl.owner_id, p.amount_received, p.received_at, p.note"
+        " FROM payments p JOIN receipt_log rl ON rl.uid = p.receipt_log_uid ORDER BY p.id"
+    ).fetchall()
+    assert rows[1:] == [
+        (r_feb, 1, 600.0, '2026-02-03', 'TRF-1'),
+        (r_feb, 2, 400.0, '2026-02-03', 'TRF-1'),
+        (r_jan, 1, 600.0, '2026-02-04', 'TRF-2'),
+        (r_jan, 2, 400.0, '2026-02-04', 'TRF-2'),
+        (r_b, 2, 500.0, '2026-02-05', 'bank statement line 5'),
+    ]
+    with open(review, newline='') as f:
+        lines = list(csv.reader(f))
+    assert [l[0] for l in lines[1:]] == ['4', '6', '7']
+
+    # a second run finds everything paid
+    assert reconcile_bank_statement(statement)['payments'] == 0
+    conn.close()
+
+
+def test_create_payments_bulk_is_all_or_nothing(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    with pytest.raises(ValueError, match="not found"):
+        psvc.create_payments_bulk([(1, 10.0, None, None)])
+    with pytest.raises(ValueError, match="positive"):
+        psvc.create_payments_bulk([(1, 0, None, None)])
+    assert psvc.create_payments_bulk([]) == 0
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("1.234,50", 123450), ("1,234.50", 123450), ("1,234", 123400), ("1 234,50", 123450),
+    ("1234.5", 123450), ("500,00", 50000), ("1.234.567,89", 123456789),
+])
+def test_parse_cents(text, cents):
+    assert _parse_cents(text) == cents
+
+
+@pytest.mark.parametrize("text", ["0,125", "1,234,50", "1.234,567", "12,3456", "1,23.45"])
+def test_parse_cents_rejects_ambiguous_amounts(text):
+    with pytest.raises(ValueError, match="ambiguous"):
+        _parse_cents(text)
@@ -0,0 +1,79 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database import initialize_database, get_connection
+import services.ownership_service as osvc
+import services.receipt_service as rsvc
+from services.split_plan import get_split_plan
+
+
+def _setup_db(tmp_path, monkeypatch):
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def _plan(unit_id, parity):
+    conn = get_connection()
+    try:
+        return get_split_plan(conn, unit_id, parity)
+    finally:
+        conn.close()
+
+
+def test_split_plan_cached_and_invalidated(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO owners (name) VALUES ('O-S1')")
+    cur.execute("INSERT INTO owners (name) VALUES ('O-S2')")
+    cur.execute("INSERT INTO units (reference) VALUES ('U-S')")
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('C-S','PP')")
+    cur.execute(
+        """
+        INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+        VALUES (1, 1, 1, 100, 'none', NULL, NULL, '2026-01-01', NULL, 1000, 0)
+        """
+    )
+    conn.commit()
+
+    osvc.create_ownership(1, 1, 60)
+    osvc.create_ownership(1, 2, 40, alternate=1, odd_even='odd')
+
+    odd = _plan(1, 'odd')
+    assert odd.owner_ids == (1, 2) and odd.shares == (60.0, 40.0)
+    assert odd.amounts(100.01) == [60.01, 40.0]
+    assert _plan(1, 'odd') is odd
+    assert _plan(1, 'even').owner_ids == (1,)
+
+    split = rsvc.compute_receipt_split(1, '2026-01-01', 1000)
+    assert [(e['owner_name'], e['amount']) for e in split] == [('O-S1', 600.0), ('O-S2', 400.0)]
+
+    # ownership_service drops the unit's plans
+    osvc.update_ownership(1, share_percent=50)
+    assert _plan(1, 'odd') is not odd
+    assert _plan(1, 'odd').shares == (50.0, 40.0)
+
+    # a change made by another connection (or process) is caught by the version counter
+    cached = _plan(1, 'odd')
+    cur.execute("UPDATE owners SET name = 'O-S2 renamed' WHERE id = 2")
+    conn.commit()
+    fresh = _plan(1, 'odd')
+    assert fresh is not cached
+    assert fresh.names[2] == 'O-S2 renamed'
+
+    cur.execute("DELETE FROM ownerships")
+    conn.commit()
+    conn.close()
+    with pytest.raises(ValueError):
+        rsvc.compute_receipt_split(1, '2026-01-01', 1000)
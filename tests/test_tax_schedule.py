@@ -0,0 +1,112 @@
+import pytest
+
+from config import TAX_CONFIG
+from services.tax_schedule import TaxSchedule
+
+
+def test_brackets_match_config_boundaries():
+    s = TaxSchedule(TAX_CONFIG)
+    assert s.ir_bracket(0) == (0.00, 0, (0, 40000))
+    assert s.ir_bracket(40000) == (0.00, 0, (0, 40000))
+    assert s.ir_bracket(40001) == (0.10, 4000, (40001, 60000))
+    assert s.ir_bracket(180000) == (0.34, 22000, (100001, 180000))
+    assert s.ir_bracket(10 ** 9) == (0.37, 27400, (180001, None))
+    assert s.ras_rate(119999) == (0.10, (40001, 119999))
+    assert s.ras_rate(120000) == (0.15, (120000, None))
+
+
+def test_fractional_amounts_fall_in_next_bracket():
+    s = TaxSchedule(TAX_CONFIG)
+    # previously matched no bracket and fell back to a 0% rate
+    assert s.ir_bracket(40000.5)[:2] == (0.10, 4000)
+    assert s.ras_rate(40000.01)[0] == 0.10
+    assert s.ras_rate(119999.5)[0] == 0.15
+
+
+def test_negative_amount_uses_fallback():
+    s = TaxSchedule(TAX_CONFIG)
+    assert s.ir_bracket(-1) == (0.0, 0, (0, 0))
+    assert s.ras_rate(-1) == (0.0, (0, 0))
+
+
+def test_many_matches_single_lookups():
+    s = TaxSchedule(TAX_CONFIG)
+    values = [0, 39999.99, 40000.5, 59999, 60000.2, 95000, 250000]
+    assert s.ir_brackets(values) == [s.ir_bracket(v) for v in values]
+    assert s.ras_rates(values) == [s.ras_rate(v) for v in values]
+
+
+def test_many_lookups_with_and_without_numpy(monkeypatch):
+    import random
+    import services.tax_schedule as ts
+
+    s = TaxSchedule(TAX_CONFIG)
+    rng = random.Random(3)
+    values = [rng.choice([-5, 0, 40000, 40000.5, 120000, 180000, 180000.01]) for _ in range(50)]
+    values += [rng.uniform(-1000, 300000) for _ in range(500)]
+    expected_ir = [s.ir_bracket(v) for v in values]
+    expected_ras = [s.ras_rate(v) for v in values]
+    capped = TaxSchedule(dict(TAX_CONFIG, ras_thresholds=[(0, 1000, 0.1), (1001, 5000, 0.2)]))
+    expected_capped = [capped.ras_rate(v) for v in values]
+    for numpy in (ts.np, None):
+        monkeypatch.setattr(ts, 'np', numpy)
+        assert s.ir_brackets(values) == expected_ir
+        assert s.ras_rates(iter(values)) == expected_ras
+        assert capped.ras_rates(values) == expected_capped
+        assert s.ir_brackets([]) == []
+
+
+@pytest.mark.parametrize("brackets, message", [
+    ([(0, 40000, 0.0, 0), (40000, None, 0.1, 4000)], "overlap"),
+    ([(0, 40000, 0.0, 0), (45000, None, 0.1, 4000)], "gap"),
+    ([(0, None, 0.0, 0), (40001, None, 0.1, 4000)], "open-ended"),
+])
+def test_invalid_brackets_rejected(brackets, message):
+    config = dict(TAX_CONFIG, ir_brackets=brackets)
+    with pytest.raises(ValueError, match=message):
+        TaxSchedule(config)
+
+
+def _setup_db(tmp_path, monkeypatch):
+    from pathlib import Path
+    from database import initialize_database
+
+    project_root = Path(__file__).resolve().parents[1]
+    orig_schema = project_root / "sql" / "schema.sql"
+    schema_file = tmp_path / "schema.sql"
+    schema_file.write_text(orig_schema.read_text())
+
+    monkeypatch.setattr(__import__("database"), 'SCHEMA_PATH', schema_file)
+    db_path = Path(tmp_path / "database.db")
+    monkeypatch.setattr(__import__("database"), 'DB_PATH', db_path)
+
+    initialize_database()
+    return db_path
+
+
+def test_schedule_selected_by_year(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    import services.tax_schedule as ts
+
+    # no stored rules: the config default applies to every year
+    assert ts.get_tax_schedule(2020).ir_bracket(50000)[0] == 0.10
+
+    rules_2025 = dict(TAX_CONFIG, ir_brackets=[(0, 30000, 0.0, 0), (30001, None, 0.2, 6000)])
+    ts.set_tax_schedule(2025, rules_2025)
+
+    assert ts.get_tax_schedule(2024).ir_bracket(50000)[0] == 0.10
+    assert ts.get_tax_schedule(2025).ir_bracket(50000) == (0.2, 6000, (30001, None))
+    # later years inherit the closest earlier schedule
+    assert ts.get_tax_schedule(2027).ir_bracket(50000)[0] == 0.2
+    assert ts.get_tax_schedule(2025) is ts.get_tax_schedule(2026)
+
+    # editing a year takes effect without restarting
+    ts.set_tax_schedule(2025, dict(rules_2025, abattement=0.5))
+    assert ts.get_tax_schedule(2025).abattement == 0.5
+    assert [r['year'] for r in ts.list_tax_schedules()] == [2025]
+
+    with pytest.raises(ValueError):
+        ts.set_tax_schedule(2026, dict(TAX_CONFIG, ir_brackets=[(0, 100, 0.0, 0), (50, None, 0.1, 0)]))
+
+    ts.delete_tax_schedule(2025)
+    assert ts.get_tax_schedule(2025).abattement == TAX_CONFIG['abattement']
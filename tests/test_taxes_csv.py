@@ -1,5 +1,6 @@
 from pathlib import Path
 import sqlite3
+import pytest
 from database import initialize_database
 import services.taxes_service as tsvc
 
@@ -102,4 +103,48 @@ def test_generate_by_assignment_csv(tmp_path, monkeypatch):
     summary_rows = [r for r in rows if r.get('rounded_tax')]
     assert len(summary_rows) == 1
 
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+def test_streamed_taxes_report_matches_list(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO clients (name, client_type, legal_id) VALUES ('CS','PP','CLIDS')")
+    client_id = cur.lastrowid
+    for i in range(3):
+        cur.execute("INSERT INTO owners (name, family_count, legal_id) VALUES (?, 0, ?)", (f"OS{i}", f"LS{i}"))
+        owner_id = cur.lastrowid
+        cur.execute("INSERT INTO units (reference, city) VALUES (?, 'CityS')", (f"US{i}",))
+        unit_id = cur.lastrowid
+        cur.execute("INSERT INTO ownerships (unit_id, owner_id, share_percent, alternate) VALUES (?, ?, 100, 0)", (unit_id, owner_id))
+        cur.execute(
+            """
+            INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+            VALUES (?, ?, ?, 100, 'none', NULL, NULL, '2026-01-01', NULL, 1000, 0)
+            """,
+            (unit_id, owner_id, client_id),
+        )
+    conn.commit()
+    conn.close()
+
+    import services.receipt_service as rsvc
+    assert rsvc.batch_generate_receipts_for_month('01/2026', '05/01/2026') == 3
+
+    for fmt in ('detailed', 'by-assignment', 'minimal'):
+        headers, rows = tsvc.generate_taxes_report(2026, csv_format=fmt)
+        s_headers, s_rows = tsvc.iter_taxes_report(2026, csv_format=fmt, batch_size=2)
+        assert not isinstance(s_rows, list)
+        assert (s_headers, list(s_rows)) == (headers, rows)
+
+    # streamed straight to a file
+    out = tmp_path / 'taxes.csv'
+    headers, rows = tsvc.iter_taxes_report(2026, csv_format='by-assignment', batch_size=1)
+    tsvc.write_csv_file(str(out), headers, rows)
+    lines = out.read_text().splitlines()
+    assert lines[0] == ','.join(headers)
+    # per owner: one assignment line, a separator and a summary line
+    assert len(lines) == 1 + 3 * 3
+
+    with pytest.raises(ValueError):
+        tsvc.iter_taxes_report(2026, csv_format='nope')
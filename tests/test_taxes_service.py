@@ -168,3 +168,48 @@ def test_final_tax_rounds_up(tmp_path, monkeypatch):
     assert res['final_tax'] == 1
 
     conn.close()
+
+
+def test_bulk_taxes_match_per_owner(tmp_path, monkeypatch):
+    db = _setup_db(tmp_path, monkeypatch)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO clients (name, client_type) VALUES ('CB','PP')")
+    client_id = cur.lastrowid
+    # owner 1: high income with RAS withheld, owner 2: low income, owner 3: nothing this year
+    grosses = [(150000.0, 135000.0, 3), (20000.0, 20000.0, 0), (0.0, 0.0, 7)]
+    owner_ids = []
+    for i, (gross, received, fam) in enumerate(grosses):
+        cur.execute("INSERT INTO owners (name, family_count) VALUES (?, ?)", (f"B{i}", fam))
+        oid = cur.lastrowid
+        owner_ids.append(oid)
+        cur.execute("INSERT INTO units (reference) VALUES (?)", (f"UB{i}",))
+        uid = cur.lastrowid
+        cur.execute("""
+            INSERT INTO assignments (unit_id, owner_id, client_id, share_percent, alternation_type, cycle_length, cycle_position, start_date, end_date, rent_amount, ras_ir)
+            VALUES (?, ?, ?, 100, 'none', NULL, NULL, '2025-01-01', NULL, 1, 0)
+        """, (uid, oid, client_id))
+        aid = cur.lastrowid
+        cur.execute("INSERT INTO receipts (assignment_id) VALUES (?)", (aid,))
+        rid = cur.lastrowid
+        if gross:
+            for m in range(1, 4):
+                cur.execute("INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (rid, aid, oid, client_id, m, f"2026-0{m}-01", f"2026-0{m}-05", gross / 3))
+                cur.execute("INSERT INTO payments (receipt_log_uid, amount_received) VALUES (?, ?)", (cur.lastrowid, received / 3))
+        # receipts from another year must not count
+        cur.execute("INSERT INTO receipt_log (receipt_id, assignment_id, owner_id, client_id, receipt_no, period, issue_date, amount) VALUES (?, ?, ?, ?, 9, '2025-12-01', '2025-12-05', 999)",
+                    (rid, aid, oid, client_id))
+    conn.commit()
+
+    bulk = tsvc.compute_taxes_for_year(2026)
+    assert [r['owner_id'] for r in bulk] == owner_ids
+    for res in bulk:
+        assert res == tsvc.compute_owner_taxes_for_year(res['owner_id'], 2026)
+
+    subset = tsvc.compute_taxes_for_year(2026, owner_ids=[owner_ids[1]])
+    assert len(subset) == 1 and subset[0]['gross_revenue'] == 20000.0
+    assert tsvc.compute_taxes_for_year(2026, owner_ids=[]) == []
+
+    conn.close()
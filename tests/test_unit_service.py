@@ -59,3 +59,31 @@ def test_invalid_unit_type_and_reference(tmp_path, monkeypatch):
 
     with pytest.raises(ValueError):
         us.update_unit(uid, unit_type='bad')
+
+
+def test_list_units_page_keyset(tmp_path, monkeypatch):
+    _setup_db(tmp_path, monkeypatch)
+    for i in range(7):
+        us.create_unit(f'P-{i}', city='A' if i % 2 else 'B')
+
+    seen, after = [], None
+    while True:
+        units, after = us.list_units_page(limit=3, after=after)
+        seen.extend(u['reference'] for u in units)
+        if after is None:
+            break
+    assert seen == [f'P-{i}' for i in range(7)]
+
+    units, after = us.list_units_page(limit=2, sort='reference', descending=True, city='A')
+    assert [u['reference'] for u in units] == ['P-5', 'P-3']
+    units, after = us.list_units_page(limit=2, sort='reference', descending=True, city='A', after=after)
+    assert [u['reference'] for u in units] == ['P-1']
+    assert after is None
+
+    units, _ = us.list_units_page(search='P-4')
+    assert [u['reference'] for u in units] == ['P-4']
+
+    with pytest.raises(ValueError):
+        us.list_units_page(sort='city')
+    with pytest.raises(ValueError):
+        us.list_units_page(limit=0)
@@ -0,0 +1,7 @@
+def year_bounds(year):
+    """Return (first_day, first_day_of_next_year) as ISO strings.
+
+    Used for index-friendly period filters: period >= first AND period < next.
+    """
+    year = int(year)
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"